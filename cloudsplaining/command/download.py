@@ -8,23 +8,42 @@ account-alias.json"""
 # or https://opensource.org/licenses/BSD-3-Clause
 from __future__ import annotations
 
-import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from queue import Full, Queue
+from typing import TYPE_CHECKING, Any, cast
 
-import boto3
 import click
-from botocore.config import Config
 
 from cloudsplaining import set_log_level
+from cloudsplaining.shared import aws_login
+from cloudsplaining.shared.json_stream import AUTHORIZATION_DETAILS_LIST_KEYS, open_json_file, write_json_object
+from cloudsplaining.shared.rate_limiter import get_rate_limiter
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+    import boto3
     from types_boto3_iam import IAMClient
+    from types_boto3_iam.literals import EntityTypeType
 
 logger = logging.getLogger(__name__)
 
+# How many pages of each filter are fetched ahead of the one that is being written
+DEFAULT_PREFETCH_PAGES = 4
+
+# The get_account_authorization_details filters, in the order their items are merged into the results
+AUTHORIZATION_DETAILS_FILTERS: tuple[EntityTypeType, ...] = (
+    "User",
+    "Group",
+    "Role",
+    "LocalManagedPolicy",
+    "AWSManagedPolicy",
+)
+
 
 @click.command(
     short_help="Runs aws iam get-authorization-details on all accounts specified in the aws credentials "
@@ -51,8 +70,28 @@ logger = logging.getLogger(__name__)
     default=False,
     help="When downloading AWS managed policy documents, also include the non-default policy versions. Note that this will dramatically increase the size of the downloaded file.",
 )
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Write the JSON without indentation, which makes the file about a third smaller.",
+)
+@click.option(
+    "--gzip",
+    "compress",
+    is_flag=True,
+    default=False,
+    help="Compress the output file with gzip. The file name ends in .json.gz, and can be scanned as it is.",
+)
 @click.option("-v", "--verbose", "verbosity", help="Log verbosity level.", count=True)
-def download(profile: str, output: str, include_non_default_policy_versions: bool, verbosity: int) -> int:
+def download(
+    profile: str,
+    output: str,
+    include_non_default_policy_versions: bool,
+    compact: bool,
+    compress: bool,
+    verbosity: int,
+) -> int:
     """
     Runs aws iam get-authorization-details on all accounts specified in the aws credentials file, and stores them in
     account-alias.json
@@ -63,75 +102,165 @@ def download(profile: str, output: str, include_non_default_policy_versions: boo
     session_data = {"region_name": default_region}
 
     output_path = Path(output)
+    suffix = ".json.gz" if compress else ".json"
     if profile:
         session_data["profile_name"] = profile
-        output_filename = output_path / f"{profile}.json"
+        output_filename = output_path / f"{profile}{suffix}"
     else:
-        output_filename = output_path / "default.json"
+        output_filename = output_path / f"default{suffix}"
 
-    results = get_account_authorization_details(session_data, include_non_default_policy_versions)
-    with output_filename.open("w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, default=str)
-    # output_filename.write_text(json.dumps(results, indent=4, default=str))
+    # Each page is written as soon as it arrives, so the memory use does not grow with the size of the account
+    details = iter_account_authorization_details(session_data, include_non_default_policy_versions)
+    with open_json_file(output_filename, "w") as f:
+        write_json_object(f, AUTHORIZATION_DETAILS_LIST_KEYS, details, indent=None if compact else 4)
     print(f"Saved results to {output_filename}")
+    logger.info("IAM rate limiter: %s", get_rate_limiter("iam").metrics())
     return 1
 
 
 def get_account_authorization_details(
-    session_data: dict[str, str], include_non_default_policy_versions: bool
+    session_data: dict[str, str],
+    include_non_default_policy_versions: bool,
+    session: boto3.Session | None = None,
 ) -> dict[str, list[Any]]:
     """Runs aws-iam-get-account-authorization-details"""
-    session = boto3.Session(**session_data)  # ty: ignore[invalid-argument-type]
-    config = Config(connect_timeout=5, retries={"max_attempts": 10})
-    iam_client: IAMClient = session.client("iam", config=config)
-
-    results: dict[str, list[Any]] = {
-        "UserDetailList": [],
-        "GroupDetailList": [],
-        "RoleDetailList": [],
-        "Policies": [],
-    }
-    paginator = iam_client.get_paginator("get_account_authorization_details")
-    for page in paginator.paginate(Filter=["User"]):
+    results: dict[str, list[Any]] = {key: [] for key in AUTHORIZATION_DETAILS_LIST_KEYS}
+    # Every filter is fetched as fast as possible, since the results are held in memory anyway
+    for key, items in iter_account_authorization_details(
+        session_data, include_non_default_policy_versions, prefetch_pages=0, session=session
+    ):
+        results[key].extend(items)
+    return results
+
+
+def iter_account_authorization_details(
+    session_data: dict[str, str],
+    include_non_default_policy_versions: bool,
+    prefetch_pages: int = DEFAULT_PREFETCH_PAGES,
+    session: boto3.Session | None = None,
+) -> Iterator[tuple[str, list[Any]]]:
+    """
+    Runs aws-iam-get-account-authorization-details, yielding the items to add to each key of the results page by page
+
+    Each filter is paginated in its own thread, on one IAM client. The pages are yielded in the order of
+    AUTHORIZATION_DETAILS_FILTERS, so the results are the same as fetching the filters one after another.
+
+    :param prefetch_pages: How many pages each filter can fetch ahead of the consumer. 0 means no limit.
+    :param session: The session to download with, like a target account session. By default, the shared session
+        for session_data is used.
+    """
+    if session is None:
+        session = aws_login.get_boto3_session(**session_data)
+    # The shared client retries throttling errors with exponential backoff, and its rate limiter slows down before
+    # that happens. One pooled connection per filter, so the threads do not wait on each other for a connection.
+    iam_client = cast(
+        "IAMClient",
+        aws_login.get_boto3_client(
+            "iam",
+            region=session_data.get("region_name") or "us-east-1",
+            session=session,
+            max_pool_connections=len(AUTHORIZATION_DETAILS_FILTERS),
+        ),
+    )
+
+    stopped = threading.Event()
+    page_queues: list[Queue[list[tuple[str, list[Any]]] | Exception | None]] = [
+        Queue(maxsize=prefetch_pages) for _ in AUTHORIZATION_DETAILS_FILTERS
+    ]
+    with ThreadPoolExecutor(max_workers=len(AUTHORIZATION_DETAILS_FILTERS)) as executor:
+        for entity_filter, page_queue in zip(AUTHORIZATION_DETAILS_FILTERS, page_queues, strict=True):
+            executor.submit(
+                fetch_filter_details,
+                iam_client,
+                entity_filter,
+                include_non_default_policy_versions,
+                page_queue,
+                stopped,
+            )
+        try:
+            for page_queue in page_queues:
+                while (page_details := page_queue.get()) is not None:
+                    if isinstance(page_details, Exception):
+                        raise page_details
+                    yield from page_details
+        finally:
+            # Lets the threads exit if the consumer stops early
+            stopped.set()
+
+
+def fetch_filter_details(
+    iam_client: IAMClient,
+    entity_filter: EntityTypeType,
+    include_non_default_policy_versions: bool,
+    page_queue: Queue[list[tuple[str, list[Any]]] | Exception | None],
+    stopped: threading.Event,
+) -> None:
+    """Paginate over one get_account_authorization_details filter, putting the details of each page on the queue,
+    followed by None. An error is put on the queue instead."""
+
+    def put(item: list[tuple[str, list[Any]]] | Exception | None) -> bool:
+        while not stopped.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+            except Full:
+                continue
+            return True
+        return False
+
+    try:
+        paginator = iam_client.get_paginator("get_account_authorization_details")
+        for page in paginator.paginate(Filter=[entity_filter]):
+            if not put(get_page_details(entity_filter, page, include_non_default_policy_versions)):
+                return
+    except Exception as exc:
+        put(exc)
+        return
+    put(None)
+
+
+def get_page_details(
+    entity_filter: EntityTypeType, page: Mapping[str, Any], include_non_default_policy_versions: bool
+) -> list[tuple[str, list[Any]]]:
+    """Get the items that the results keep from one page of a get_account_authorization_details filter"""
+    if entity_filter == "User":
         # Always add inline user policies
-        results["UserDetailList"].extend(page["UserDetailList"])
-    for page in paginator.paginate(Filter=["Group"]):
-        results["GroupDetailList"].extend(page["GroupDetailList"])
-    for page in paginator.paginate(Filter=["Role"]):
-        results["RoleDetailList"].extend(page["RoleDetailList"])
+        return [("UserDetailList", page["UserDetailList"])]
+    if entity_filter == "Group":
+        return [("GroupDetailList", page["GroupDetailList"])]
+    if entity_filter == "Role":
         # Ignore Service Linked Roles
-        for policy in page["Policies"]:
-            if policy["Path"] != "/service-role/":
-                results["RoleDetailList"].append(policy)
-    for page in paginator.paginate(Filter=["LocalManagedPolicy"]):
+        return [
+            ("RoleDetailList", page["RoleDetailList"]),
+            ("RoleDetailList", [policy for policy in page["Policies"] if policy["Path"] != "/service-role/"]),
+        ]
+    if entity_filter == "LocalManagedPolicy":
         # Add customer-managed policies IF they are attached to IAM principals
-        for policy in page["Policies"]:
-            if policy["AttachmentCount"] > 0:
-                results["Policies"].append(policy)
-    for page in paginator.paginate(Filter=["AWSManagedPolicy"]):
-        # Add customer-managed policies IF they are attached to IAM principals
-        for policy in page["Policies"]:
-            if policy["AttachmentCount"] > 0:
-                if include_non_default_policy_versions:
-                    results["Policies"].append(policy)
-                else:
-                    policy_version_list = []
-                    for policy_version in policy.get("PolicyVersionList") or []:
-                        if policy_version.get("VersionId") == policy.get("DefaultVersionId"):
-                            policy_version_list.append(policy_version)
-                            break
-                    entry = {
-                        "PolicyName": policy.get("PolicyName"),
-                        "PolicyId": policy.get("PolicyId"),
-                        "Arn": policy.get("Arn"),
-                        "Path": policy.get("Path"),
-                        "DefaultVersionId": policy.get("DefaultVersionId"),
-                        "AttachmentCount": policy.get("AttachmentCount"),
-                        "PermissionsBoundaryUsageCount": policy.get("PermissionsBoundaryUsageCount"),
-                        "IsAttachable": policy.get("IsAttachable"),
-                        "CreateDate": policy.get("CreateDate"),
-                        "UpdateDate": policy.get("UpdateDate"),
-                        "PolicyVersionList": policy_version_list,
-                    }
-                    results["Policies"].append(entry)
-    return results
+        return [("Policies", [policy for policy in page["Policies"] if policy["AttachmentCount"] > 0])]
+
+    # Add customer-managed policies IF they are attached to IAM principals
+    policies = []
+    for policy in page["Policies"]:
+        if policy["AttachmentCount"] > 0:
+            if include_non_default_policy_versions:
+                policies.append(policy)
+            else:
+                policy_version_list = []
+                for policy_version in policy.get("PolicyVersionList") or []:
+                    if policy_version.get("VersionId") == policy.get("DefaultVersionId"):
+                        policy_version_list.append(policy_version)
+                        break
+                entry = {
+                    "PolicyName": policy.get("PolicyName"),
+                    "PolicyId": policy.get("PolicyId"),
+                    "Arn": policy.get("Arn"),
+                    "Path": policy.get("Path"),
+                    "DefaultVersionId": policy.get("DefaultVersionId"),
+                    "AttachmentCount": policy.get("AttachmentCount"),
+                    "PermissionsBoundaryUsageCount": policy.get("PermissionsBoundaryUsageCount"),
+                    "IsAttachable": policy.get("IsAttachable"),
+                    "CreateDate": policy.get("CreateDate"),
+                    "UpdateDate": policy.get("UpdateDate"),
+                    "PolicyVersionList": policy_version_list,
+                }
+                policies.append(entry)
+    return [("Policies", policies)]
@@ -9,10 +9,10 @@ Scan a single account authorization file
 # or https://opensource.org/licenses/BSD-3-Clause
 from __future__ import annotations
 
-import json
 import logging
 import os
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Literal, cast, overload
 
@@ -22,11 +22,18 @@ from click import Context
 from policy_sentry.util.arns import get_account_from_arn
 
 from cloudsplaining import set_log_level
-from cloudsplaining.output.report import HTMLReport
+from cloudsplaining.output.report import RESULTS_COMPRESSION_WBITS, HTMLReport
+from cloudsplaining.output.results_format import normalize_results
 from cloudsplaining.scan.authorization_details import AuthorizationDetails
 from cloudsplaining.shared.constants import EXCLUSIONS_FILE
-from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
-from cloudsplaining.shared.utils import write_results_data_file
+from cloudsplaining.shared.exclusions import (
+    DEFAULT_EXCLUSIONS,
+    Exclusions,
+    get_exclusion_output,
+    set_exclusion_output,
+)
+from cloudsplaining.shared.json_stream import load_authorization_details_file
+from cloudsplaining.shared.utils import print_red, write_results_data_file
 from cloudsplaining.shared.validation import check_authorization_details_schema
 
 
@@ -73,6 +80,23 @@ from cloudsplaining.shared.validation import check_authorization_details_schema
     is_flag=True,
     help="Reduce the size of the HTML Report by pulling the Cloudsplaining Javascript code over the internet.",
 )
+@click.option(
+    "--compress-results",
+    "compress_results",
+    required=False,
+    default=None,
+    type=click.Choice(list(RESULTS_COMPRESSION_WBITS)),
+    help="Reduce the size of the HTML Report by embedding the results compressed, for the browser to decompress.",
+)
+@click.option(
+    "--normalize-results",
+    "normalized_results",
+    required=False,
+    default=False,
+    is_flag=True,
+    help="Write the results in the normalized format, which references groups by ID and risk descriptions from a "
+    "lookup table, instead of repeating them.",
+)
 @click.option(
     "-aR",
     "--flag-all-risky-actions",
@@ -104,16 +128,27 @@ from cloudsplaining.shared.validation import check_authorization_details_schema
     is_flag=True,
     help="Flag risky trust policies in roles.",
 )
+@click.option(
+    "-w",
+    "--workers",
+    required=False,
+    default=1,
+    type=click.IntRange(min=1),
+    help="When --input-file is a directory, the number of files to scan in parallel processes.",
+)
 def scan(
     input_file: str,
     exclusions_file: str,
     output: str,
     skip_open_report: bool,
     minimize: bool,
+    compress_results: str | None,
+    normalized_results: bool,
     flag_all_risky_actions: bool,
     verbosity: int,
     severity: list[str],
     flag_trust_policies: bool,
+    workers: int,
 ) -> None:  # pragma: no cover
     """
     Given the path to account authorization details files and the exclusions config file, scan all inline and
@@ -142,9 +177,10 @@ def scan(
     output_path = Path(output)
     input_file_path = Path(input_file)
     if input_file_path.is_file():
-        account_name = input_file_path.stem
-        account_authorization_details_cfg = json.loads(input_file_path.read_text(encoding="utf-8"))
-        rendered_html_report = scan_account_authorization_details(
+        account_name = get_account_name(input_file_path)
+        # Decoded item by item, so the raw text of large files is never held in memory all at once
+        account_authorization_details_cfg = load_authorization_details_file(input_file_path)
+        html_report = get_account_html_report(
             account_authorization_details_cfg,
             exclusions,
             account_name,
@@ -155,14 +191,11 @@ def scan(
             flag_resource_arn_statements=flag_resource_arn_statements,
             flag_trust_policies=flag_trust_policies,
             severity=severity,
+            compress_results=compress_results,
+            normalized_results=normalized_results,
         )
-        html_output_file = output_path / f"iam-report-{account_name}.html"
-        logger.info("Saving the report to %s", html_output_file)
-        if html_output_file.exists():
-            html_output_file.unlink()
-
-        html_output_file.write_text(rendered_html_report, encoding="utf-8")
-
+        del account_authorization_details_cfg
+        html_output_file = write_html_report(html_report, account_name, output_path)
         print(f"Wrote HTML results to: {html_output_file}")
 
         # Open the report by default
@@ -173,37 +206,67 @@ def scan(
 
     if input_file_path.is_dir():
         logger.info("The path given is a directory. Scanning for account authorization files and generating report.")
-        input_files = get_authorization_files_in_directory(input_file_path)
-        for file in input_files:
-            logger.info(f"Scanning file: {file}")
-            account_authorization_details_cfg = json.loads(Path(file).read_text(encoding="utf-8"))
-
-            account_name = input_file_path.parent.stem
-            # Scan the Account Authorization Details config
-            rendered_html_report = scan_account_authorization_details(
-                account_authorization_details_cfg,
-                exclusions,
-                account_name,
-                output_path,
-                write_data_files=True,
-                minimize=minimize,
-                severity=severity,
-            )
-            html_output_file = output_path / f"iam-report-{account_name}.html"
-            logger.info("Saving the report to %s", html_output_file)
-            if html_output_file.exists():
-                html_output_file.unlink()
-
-            html_output_file.write_text(rendered_html_report, encoding="utf-8")
-
+        input_files = [str(file) for file in get_authorization_file_paths(input_file_path)]
+        scan_options: dict[str, Any] = {
+            "exclusions": exclusions,
+            "output_directory": output_path,
+            "minimize": minimize,
+            "flag_conditional_statements": flag_conditional_statements,
+            "flag_resource_arn_statements": flag_resource_arn_statements,
+            "flag_trust_policies": flag_trust_policies,
+            "severity": severity,
+            "compress_results": compress_results,
+            "normalized_results": normalized_results,
+        }
+        failures: dict[str, str] = {}
+        skipped = 0
+
+        def handle_result(file: str, html_output_file: Path | None) -> None:
+            nonlocal skipped
+            if html_output_file is None:
+                skipped += 1
+                logger.warning("Skipping %s: it is not a valid account authorization details file", file)
+                return
             print(f"Wrote HTML results to: {html_output_file}")
-
             # Open the report by default
             if not skip_open_report:
                 print("Opening the HTML report")
                 url = f"file://{html_output_file.absolute()}"
                 webbrowser.open(url, new=2)
 
+        if workers == 1:
+            for file in input_files:
+                try:
+                    html_output_file = scan_authorization_file(file, **scan_options)
+                except Exception as exc:
+                    logger.exception("Failed to scan %s", file)
+                    failures[file] = repr(exc)
+                    continue
+                handle_result(file, html_output_file)
+        else:
+            # Each file is parsed, validated, scanned, and written in one worker, and reported here as it finishes
+            # The workers start with the default settings, so they are told whether to print the exclusion matches
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=set_exclusion_output, initargs=(get_exclusion_output(),)
+            ) as executor:
+                futures = {executor.submit(scan_authorization_file, file, **scan_options): file for file in input_files}
+                for future in as_completed(futures):
+                    file = futures[future]
+                    try:
+                        html_output_file = future.result()
+                    except Exception as exc:
+                        logger.exception("Failed to scan %s", file)
+                        failures[file] = repr(exc)
+                        continue
+                    handle_result(file, html_output_file)
+
+        scanned = len(input_files) - len(failures) - skipped
+        print(f"Scanned {scanned} of {len(input_files)} files ({skipped} skipped, {len(failures)} failed)")
+        if failures:
+            for file, error in sorted(failures.items()):
+                print_red(f"Failed to scan {file}: {error}")
+            raise click.ClickException(f"{len(failures)} of {len(input_files)} files could not be scanned")
+
 
 logger = logging.getLogger(__name__)
 
@@ -221,6 +284,8 @@ def scan_account_authorization_details(
     flag_resource_arn_statements: bool = ...,
     flag_trust_policies: bool = ...,
     severity: list[str] | None = ...,
+    compress_results: str | None = ...,
+    normalized_results: bool = ...,
 ) -> dict[str, Any]: ...
 
 
@@ -237,6 +302,8 @@ def scan_account_authorization_details(
     flag_resource_arn_statements: bool = ...,
     flag_trust_policies: bool = ...,
     severity: list[str] | None = ...,
+    compress_results: str | None = ...,
+    normalized_results: bool = ...,
 ) -> str: ...
 
 
@@ -252,14 +319,64 @@ def scan_account_authorization_details(
     flag_resource_arn_statements: bool = False,
     flag_trust_policies: bool = False,
     severity: list[str] | None = None,
+    compress_results: str | None = None,
+    normalized_results: bool = False,
 ) -> str | dict[str, Any]:  # pragma: no cover
     """
     Given the path to account authorization details files and the exclusions config file, scan all inline and
     managed policies in the account to identify actions that do not leverage resource constraints.
     """
+    html_report = get_account_html_report(
+        account_authorization_details_cfg,
+        exclusions,
+        account_name,
+        output_directory,
+        write_data_files=write_data_files,
+        minimize=minimize,
+        flag_conditional_statements=flag_conditional_statements,
+        flag_resource_arn_statements=flag_resource_arn_statements,
+        flag_trust_policies=flag_trust_policies,
+        severity=severity,
+        compress_results=compress_results,
+        normalized_results=normalized_results,
+    )
+    rendered_report = html_report.get_html_report()
+
+    if return_json_results:
+        return {
+            "iam_results": html_report.iam_data,
+            "iam_findings": html_report.iam_data,
+            "rendered_report": rendered_report,
+        }
+
+    return rendered_report
+
 
+def get_account_html_report(
+    account_authorization_details_cfg: dict[str, Any],
+    exclusions: Exclusions,
+    account_name: str = "default",
+    output_directory: str | Path | None = None,
+    write_data_files: bool = False,
+    minimize: bool = False,
+    flag_conditional_statements: bool = False,
+    flag_resource_arn_statements: bool = False,
+    flag_trust_policies: bool = False,
+    severity: list[str] | None = None,
+    compress_results: str | None = None,
+    normalized_results: bool = False,
+    validate_schema: bool = True,
+) -> HTMLReport:  # pragma: no cover
+    """
+    Scan the account authorization details like scan_account_authorization_details, and write the data files, but
+    return the HTML report unrendered, so that it can be streamed to a file with write_html_report.
+
+    :param validate_schema: Check the account authorization details against the schema first. Callers that already
+        checked them can skip it.
+    """
     logger.debug("Identifying modify-only actions that are not leveraging resource constraints...")
-    check_authorization_details_schema(account_authorization_details_cfg)
+    if validate_schema:
+        check_authorization_details_schema(account_authorization_details_cfg)
     authorization_details = AuthorizationDetails(
         account_authorization_details_cfg,
         exclusions=exclusions,
@@ -277,46 +394,104 @@ def scan_account_authorization_details(
             account_id = get_account_from_arn(results["roles"][role]["arn"])
             break
 
-    html_report = HTMLReport(
-        account_id=account_id,
-        account_name=account_name,
-        results=results,
-        minimize=minimize,
-    )
-    rendered_report = html_report.get_html_report()
+    if normalized_results:
+        results = normalize_results(results)
 
     # Raw data file
     if write_data_files:
         output_directory = Path(output_directory) if output_directory else Path.cwd()
 
         results_data_file = output_directory / f"iam-results-{account_name}.json"
-        results_data_filepath = write_results_data_file(authorization_details.results, results_data_file)
+        results_data_filepath = write_results_data_file(results, results_data_file)
         print(f"Results data saved: {results_data_filepath}")
 
         findings_data_file = output_directory / f"iam-findings-{account_name}.json"
         findings_data_filepath = write_results_data_file(results, findings_data_file)
         print(f"Findings data file saved: {findings_data_filepath}")
 
-    if return_json_results:
-        return {
-            "iam_results": authorization_details.results,
-            "iam_findings": results,
-            "rendered_report": rendered_report,
-        }
+    return HTMLReport(
+        account_id=account_id,
+        account_name=account_name,
+        results=results,
+        minimize=minimize,
+        compression=compress_results,
+    )
+
+
+def get_authorization_file_paths(directory: Path) -> list[Path]:
+    """Get the JSON files in a directory, including the ones compressed with gzip, like cloudsplaining download makes"""
+    return sorted(file.absolute() for pattern in ("*.json", "*.json.gz") for file in directory.glob(pattern))
+
+
+def get_account_name(file: Path) -> str:
+    """Name the reports of an authorization details file after the file, without the .json or .json.gz extension"""
+    return Path(file.name.removesuffix(".gz")).stem
 
-    return rendered_report
+
+def write_html_report(html_report: HTMLReport, account_name: str, output_directory: Path) -> Path:
+    """Stream the HTML report of an account to its file, replacing any previous report"""
+    html_output_file = output_directory / f"iam-report-{account_name}.html"
+    logger.info("Saving the report to %s", html_output_file)
+    if html_output_file.exists():
+        html_output_file.unlink()
+
+    with html_output_file.open("w", encoding="utf-8") as fp:
+        html_report.write_html_report(fp)
+    return html_output_file
+
+
+def scan_authorization_file(
+    file: str | Path,
+    exclusions: Exclusions,
+    output_directory: Path,
+    minimize: bool = False,
+    flag_conditional_statements: bool = False,
+    flag_resource_arn_statements: bool = False,
+    flag_trust_policies: bool = False,
+    severity: list[str] | None = None,
+    compress_results: str | None = None,
+    normalized_results: bool = False,
+) -> Path | None:  # pragma: no cover
+    """
+    Scan one account authorization details file and write its reports, named after the file.
+
+    The file is parsed once, for both the schema validation and the scan, so this can run in a worker process.
+
+    :return: The path of the HTML report, or None if the file is not an account authorization details file
+    """
+    file = Path(file)
+    logger.info(f"Scanning file: {file}")
+    account_authorization_details_cfg = load_authorization_details_file(file)
+    if not check_authorization_details_schema(account_authorization_details_cfg):
+        return None
+
+    account_name = get_account_name(file)
+    html_report = get_account_html_report(
+        account_authorization_details_cfg,
+        exclusions,
+        account_name,
+        output_directory,
+        write_data_files=True,
+        minimize=minimize,
+        flag_conditional_statements=flag_conditional_statements,
+        flag_resource_arn_statements=flag_resource_arn_statements,
+        flag_trust_policies=flag_trust_policies,
+        severity=severity,
+        compress_results=compress_results,
+        normalized_results=normalized_results,
+        validate_schema=False,
+    )
+    del account_authorization_details_cfg
+    return write_html_report(html_report, account_name, output_directory)
 
 
 def get_authorization_files_in_directory(
     directory: Path,
 ) -> list[str]:  # pragma: no cover
     """Get a list of download-account-authorization-files in a directory"""
-    file_list_with_full_path = [file.absolute() for file in directory.glob("*.json")]
-
     new_file_list = []
-    for file in file_list_with_full_path:
-        contents = file.read_text()
-        account_authorization_details_cfg = json.loads(contents, default=str)
+    for file in get_authorization_file_paths(directory):
+        account_authorization_details_cfg = load_authorization_details_file(file)
         valid_schema = check_authorization_details_schema(account_authorization_details_cfg)
         if valid_schema:
             new_file_list.append(str(file))
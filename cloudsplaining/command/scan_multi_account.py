@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import json
+import contextvars
 import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
 
 import click
 import yaml
@@ -14,15 +16,31 @@ from click_option_group import optgroup
 
 from cloudsplaining import set_log_level
 from cloudsplaining.command.download import get_account_authorization_details
-from cloudsplaining.output.report import HTMLReport
+from cloudsplaining.output.report import (
+    REPORT_ASSETS_DIRECTORY,
+    RESULTS_COMPRESSION_WBITS,
+    HTMLReport,
+    get_report_asset_paths,
+    write_report_assets,
+)
+from cloudsplaining.output.results_format import normalize_results
 from cloudsplaining.scan.authorization_details import AuthorizationDetails
+from cloudsplaining.scan.statement_expansion import STATEMENT_EXPANSION_CACHE
 from cloudsplaining.shared import aws_login, utils
 from cloudsplaining.shared.constants import EXCLUSIONS_FILE
-from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
+from cloudsplaining.shared.exclusions import (
+    DEFAULT_EXCLUSIONS,
+    Exclusions,
+    get_exclusion_output,
+    set_exclusion_output,
+)
+from cloudsplaining.shared.json_stream import iter_encode_json
+from cloudsplaining.shared.rate_limiter import RATE_LIMITED_SERVICES, get_rate_limiter
+from cloudsplaining.shared.s3_upload import ReportUploader
 from cloudsplaining.shared.validation import check_authorization_details_schema
 
 if TYPE_CHECKING:
-    from types_boto3_s3 import S3ServiceResource
+    from types_boto3_s3 import S3Client
 
 logger = logging.getLogger(__name__)
 OK_GREEN = "\033[92m"
@@ -94,6 +112,40 @@ class MultiAccountConfig:
     type=str,
     help="The S3 bucket to save the results. Supply this and/or --output-directory.",
 )
+@optgroup.option(
+    "--compress-uploads",
+    "compress_uploads",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Upload the files to the S3 bucket gzip-encoded, with Content-Encoding: gzip.",
+)
+@optgroup.option(
+    "--split-report",
+    "split_report",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Save the JS bundles once, to an assets directory next to the reports, and each account's results to a data "
+    "file next to its report, instead of embedding both in every report.",
+)
+@optgroup.option(
+    "--compress-results",
+    "compress_results",
+    required=False,
+    default=None,
+    type=click.Choice(list(RESULTS_COMPRESSION_WBITS)),
+    help="Embed each account's results compressed, for the browser to decompress, instead of as JSON.",
+)
+@optgroup.option(
+    "--normalize-results",
+    "normalized_results",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Save the results in the normalized format, which references groups by ID and risk descriptions from a "
+    "lookup table, instead of repeating them.",
+)
 @optgroup.group("Other Options", help="")
 @optgroup.option(
     "-w",
@@ -103,6 +155,22 @@ class MultiAccountConfig:
     default=False,
     help="Save the cloudsplaining JSON-formatted data results.",
 )
+@optgroup.option(
+    "--io-workers",
+    "io_workers",
+    type=click.IntRange(min=1),
+    required=False,
+    default=1,
+    help="How many accounts to download and save at once, in threads.",
+)
+@optgroup.option(
+    "--analysis-workers",
+    "analysis_workers",
+    type=click.IntRange(min=1),
+    required=False,
+    default=1,
+    help="How many processes analyze accounts. 1 analyzes them in the download threads.",
+)
 @click.option(
     "-aR",
     "--flag-all-risky-actions",
@@ -135,11 +203,17 @@ def scan_multi_account(
     exclusions_file: str,
     output_directory: str,
     output_bucket: str,
+    compress_uploads: bool,
+    split_report: bool,
+    compress_results: str | None,
+    normalized_results: bool,
     write_data_file: bool,
     flag_all_risky_actions: bool,
     verbosity: int,
     severity: list[str],
     flag_trust_policies: bool,
+    io_workers: int,
+    analysis_workers: int,
 ) -> None:
     """Scan multiple accounts via AssumeRole"""
     set_log_level(verbosity)
@@ -170,9 +244,30 @@ def scan_multi_account(
         flag_conditional_statements=flag_conditional_statements,
         flag_resource_arn_statements=flag_resource_arn_statements,
         flag_trust_policies=flag_trust_policies,
+        io_workers=io_workers,
+        analysis_workers=analysis_workers,
+        compress_uploads=compress_uploads,
+        split_report=split_report,
+        compress_results=compress_results,
+        normalized_results=normalized_results,
     )
 
 
+# What was saved, like "Saved the HTML report to", and a future of where it was saved
+PendingOutput = tuple[str, "Future[str]"]
+
+
+class AccountScanResult(NamedTuple):
+    """The outcome of scanning one account with scan_accounts"""
+
+    account_name: str
+    account_id: str
+    # The locations the HTML report and JSON data file were saved to
+    outputs: list[str]
+    # The error that stopped the scan, if any
+    error: str | None = None
+
+
 def scan_accounts(
     multi_account_config: MultiAccountConfig,
     exclusions: Exclusions,
@@ -185,57 +280,255 @@ def scan_accounts(
     flag_conditional_statements: bool = False,
     flag_resource_arn_statements: bool = False,
     flag_trust_policies: bool = False,
-) -> None:
-    """Use this method as a library to scan multiple accounts"""
-    # TODO: Speed improvements? Multithreading? This currently runs sequentially.
-    for target_account_name, target_account_id in multi_account_config.accounts.items():
+    io_workers: int = 1,
+    analysis_workers: int = 1,
+    compress_uploads: bool = False,
+    split_report: bool = False,
+    compress_results: str | None = None,
+    normalized_results: bool = False,
+) -> list[AccountScanResult]:
+    """
+    Use this method as a library to scan multiple accounts
+
+    Each account is downloaded, analyzed, and saved in turn, but up to io_workers accounts are in flight at once: the
+    AssumeRole, IAM, and S3 calls run in threads, and with analysis_workers > 1 the CPU-bound analysis runs in a
+    process pool. The HTML reports are rendered as they are written, in chunks, and never held whole. Uploads to the
+    output bucket run in the background, so the next account is analyzed meanwhile. An account that fails does not
+    stop the others. The results are reported in the order of the config file, whichever account finishes first.
+
+    With split_report, the JS bundles are saved once, instead of being embedded in every report, and each account's
+    results are saved to a data file next to its report. With compress_results, the results are embedded compressed
+    with gzip or deflate, for the browser to decompress. With normalized_results, the results are saved in the
+    normalized format of cloudsplaining.output.results_format.
+    """
+    if not output_directory and not output_bucket:
+        raise Exception("Please supply --output-bucket and/or --output-directory as arguments.")
+
+    # The worker processes are started from the I/O threads, on the first submit, so they are spawned rather than
+    # forked while those threads hold locks. They start with the default settings, so they are told whether to print
+    # the exclusion matches.
+    analysis_executor = (
+        ProcessPoolExecutor(
+            max_workers=analysis_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_exclusion_output,
+            initargs=(get_exclusion_output(),),
+        )
+        if analysis_workers > 1
+        else None
+    )
+    uploader = None
+    if output_bucket:
+        s3_client = cast("S3Client", aws_login.get_boto3_client(service="s3", profile=profile))
+        uploader = ReportUploader(s3_client, output_bucket, compress=compress_uploads)
+
+    def scan_and_save(target_account_name: str, target_account_id: str) -> list[PendingOutput]:
         print(f"{OK_GREEN}Scanning account: {target_account_name} (ID: {target_account_id}){END}")
-        results = scan_account(
+        account_authorization_details = download_account_authorization_details(
             target_account_id=target_account_id,
             target_role_name=role_name,
-            exclusions=exclusions,
             profile=profile,
-            severity=severity,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-            flag_trust_policies=flag_trust_policies,
         )
+        analyze_args = (
+            account_authorization_details,
+            exclusions,
+            severity,
+            flag_conditional_statements,
+            flag_resource_arn_statements,
+            flag_trust_policies,
+            normalized_results,
+        )
+        if analysis_executor is None:
+            results = analyze_account(*analyze_args)
+        else:
+            results = analysis_executor.submit(analyze_account, *analyze_args).result()
+        del account_authorization_details, analyze_args
         html_report = HTMLReport(
             account_id=target_account_id,
             account_name=target_account_name,
             results=results,
             # minimize has to be false because changes were made on javascript code so it cannot be pulled over the internet, unless these changes are updated on the internet code
             minimize=False,
+            split=split_report,
+            compression=compress_results,
         )
-        rendered_report = html_report.get_html_report()
-        if not output_directory and not output_bucket:
-            raise Exception("Please supply --output-bucket and/or --output-directory as arguments.")
-        if output_bucket:
-            s3 = cast(
-                "S3ServiceResource",
-                aws_login.get_boto3_resource(service="s3", profile=profile),
+        return save_account_reports(
+            target_account_name=target_account_name,
+            results=results,
+            html_report=html_report,
+            profile=profile,
+            output_directory=output_directory,
+            output_bucket=output_bucket,
+            write_data_file=write_data_file,
+            uploader=uploader,
+        )
+
+    account_results = []
+    try:
+        assets_outputs = save_report_assets(output_directory, uploader) if split_report else []
+        with ThreadPoolExecutor(max_workers=io_workers) as io_executor:
+            futures = {}
+            for target_account_name, target_account_id in multi_account_config.accounts.items():
+                # Threads do not inherit the context, like whether to print the exclusion matches, so each account
+                # runs in a copy of it
+                future = io_executor.submit(
+                    contextvars.copy_context().run, scan_and_save, target_account_name, target_account_id
+                )
+                futures[target_account_name, target_account_id] = future
+            # In submission order, so the output does not depend on which account finishes first
+            for (target_account_name, target_account_id), future in futures.items():
+                outputs = []
+                error = None
+                try:
+                    for label, saved_to in future.result():
+                        outputs.append(f"{label}: {saved_to.result()}")
+                except Exception as exc:
+                    logger.exception("Failed to scan account %s (ID: %s)", target_account_name, target_account_id)
+                    error = repr(exc)
+                for output in outputs:
+                    utils.print_green(output)
+                account_results.append(AccountScanResult(target_account_name, target_account_id, outputs, error))
+        for label, saved_to in assets_outputs:
+            utils.print_green(f"{label}: {saved_to.result()}")
+    finally:
+        if analysis_executor is not None:
+            analysis_executor.shutdown()
+        if uploader is not None:
+            uploader.close()
+
+    for service in RATE_LIMITED_SERVICES:
+        logger.info("%s rate limiter: %s", service.upper(), get_rate_limiter(service).metrics())
+
+    failures = [account_result for account_result in account_results if account_result.error]
+    if failures:
+        for account_result in failures:
+            utils.print_red(
+                f"Failed to scan account {account_result.account_name} (ID: {account_result.account_id}): "
+                f"{account_result.error}"
             )
-            # Write the HTML file
-            output_file = f"{target_account_name}.html"
-            s3.Object(output_bucket, output_file).put(ACL="bucket-owner-full-control", Body=rendered_report)  # ty: ignore[unresolved-attribute]
-            utils.print_green(f"Saved the HTML report to: s3://{output_bucket}/{output_file}")
-            # Write the JSON data file
-            if write_data_file:
-                output_file = f"{target_account_name}.json"
-                body = json.dumps(results, sort_keys=True, default=str, indent=4)
-                s3.Object(output_bucket, output_file).put(ACL="bucket-owner-full-control", Body=body)  # ty: ignore[unresolved-attribute]
-                utils.print_green(f"Saved the JSON data to: s3://{output_bucket}/{output_file}")
-        if output_directory:
-            # Write the HTML file
-            output_dir_path = Path(output_directory)
-            html_output_file = output_dir_path / f"{target_account_name}.html"
-            utils.write_file(html_output_file, rendered_report)
-            utils.print_green(f"Saved the HTML report to: {html_output_file}")
-            # Write the JSON data file
-            if write_data_file:
-                results_data_file = output_dir_path / f"{target_account_name}.json"
-                results_data_filepath = utils.write_results_data_file(results, results_data_file)
-                utils.print_green(f"Saved the JSON data to: {results_data_filepath}")
+        raise Exception(f"{len(failures)} of {len(account_results)} accounts could not be scanned")
+    return account_results
+
+
+def analyze_account(
+    account_authorization_details: dict[str, list[dict[str, Any]]],
+    exclusions: Exclusions,
+    severity: list[str] | None = None,
+    flag_conditional_statements: bool = False,
+    flag_resource_arn_statements: bool = False,
+    flag_trust_policies: bool = False,
+    normalized_results: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Analyze the account authorization details of an account. Runs in a worker process when scan_accounts is given
+    analysis_workers, so the results are normalized there, before they are sent back."""
+    results = analyze_account_authorization_details(
+        account_authorization_details,
+        exclusions=exclusions,
+        severity=severity,
+        flag_conditional_statements=flag_conditional_statements,
+        flag_resource_arn_statements=flag_resource_arn_statements,
+        flag_trust_policies=flag_trust_policies,
+    )
+    # Statements repeated across accounts are only expanded once per process, since the cache is process-wide
+    logger.info("Statement expansion cache: %s", STATEMENT_EXPANSION_CACHE.cache_info())
+    if normalized_results:
+        return normalize_results(results)
+    return results
+
+
+def save_account_reports(
+    target_account_name: str,
+    results: dict[str, dict[str, Any]],
+    html_report: HTMLReport,
+    profile: str | None = None,
+    output_directory: str | None = None,
+    output_bucket: str | None = None,
+    write_data_file: bool = False,
+    uploader: ReportUploader | None = None,
+) -> list[PendingOutput]:
+    """
+    Save the HTML report, and optionally the JSON data file, of an account. The HTML report is streamed to each
+    output as it is rendered.
+
+    :param uploader: Uploads to the output bucket in the background. Without one, the files are uploaded uncompressed
+        before this returns.
+    :return: What was saved, and a future of where it was saved to, which is pending until its upload finishes
+    """
+    outputs: list[PendingOutput] = []
+    if output_bucket:
+        own_uploader = uploader is None
+        if uploader is None:
+            s3_client = cast("S3Client", aws_login.get_boto3_client(service="s3", profile=profile))
+            uploader = ReportUploader(s3_client, output_bucket)
+        # Write the HTML file
+        output_file = f"{target_account_name}.html"
+        outputs.append(
+            (
+                "Saved the HTML report to",
+                uploader.upload_stream(output_file, html_report.iter_html_report(), "text/html; charset=utf-8"),
+            )
+        )
+        # Write the data file of a split report
+        if html_report.split:
+            outputs.append(
+                (
+                    "Saved the report data to",
+                    uploader.upload_stream(
+                        html_report.data_file_name, html_report.iter_results(), "text/javascript; charset=utf-8"
+                    ),
+                )
+            )
+        # Write the JSON data file
+        if write_data_file:
+            output_file = f"{target_account_name}.json"
+            body = iter_encode_json(results, indent=4, sort_keys=True)
+            outputs.append(("Saved the JSON data to", uploader.upload_stream(output_file, body, "application/json")))
+        if own_uploader:
+            uploader.close()
+    if output_directory:
+        # Write the HTML file
+        output_dir_path = Path(output_directory)
+        html_output_file = output_dir_path / f"{target_account_name}.html"
+        if html_output_file.exists():
+            html_output_file.unlink()
+        with html_output_file.open("w", encoding="utf-8") as fp:
+            html_report.write_html_report(fp)
+        outputs.append(("Saved the HTML report to", _saved_to(str(html_output_file))))
+        # Write the data file of a split report
+        if html_report.split:
+            data_output_file = output_dir_path / html_report.data_file_name
+            with data_output_file.open("w", encoding="utf-8") as fp:
+                html_report.write_data_file(fp)
+            outputs.append(("Saved the report data to", _saved_to(str(data_output_file))))
+        # Write the JSON data file
+        if write_data_file:
+            results_data_file = output_dir_path / f"{target_account_name}.json"
+            results_data_filepath = utils.write_results_data_file(results, results_data_file)
+            outputs.append(("Saved the JSON data to", _saved_to(str(results_data_filepath))))
+    return outputs
+
+
+def save_report_assets(
+    output_directory: str | None = None, uploader: ReportUploader | None = None
+) -> list[PendingOutput]:
+    """Save the JS bundles that the split reports of every account load, once per output target"""
+    outputs: list[PendingOutput] = []
+    if uploader is not None:
+        for asset_path in get_report_asset_paths():
+            key = f"{REPORT_ASSETS_DIRECTORY}/{asset_path.name}"
+            body = asset_path.read_bytes()
+            outputs.append(("Saved the report assets to", uploader.upload(key, body, "text/javascript; charset=utf-8")))
+    if output_directory:
+        assets_directory = write_report_assets(Path(output_directory))
+        outputs.append(("Saved the report assets to", _saved_to(str(assets_directory))))
+    return outputs
+
+
+def _saved_to(location: str) -> Future[str]:
+    """A future for a file that was already saved"""
+    future: Future[str] = Future()
+    future.set_result(location)
+    return future
 
 
 def scan_account(
@@ -254,6 +547,25 @@ def scan_account(
         target_role_name=target_role_name,
         profile=profile,
     )
+    return analyze_account_authorization_details(
+        account_authorization_details,
+        exclusions=exclusions,
+        severity=severity,
+        flag_conditional_statements=flag_conditional_statements,
+        flag_resource_arn_statements=flag_resource_arn_statements,
+        flag_trust_policies=flag_trust_policies,
+    )
+
+
+def analyze_account_authorization_details(
+    account_authorization_details: dict[str, list[dict[str, Any]]],
+    exclusions: Exclusions,
+    severity: list[str] | None = None,
+    flag_conditional_statements: bool = False,
+    flag_resource_arn_statements: bool = False,
+    flag_trust_policies: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Get the results for the account authorization details of one account"""
     check_authorization_details_schema(account_authorization_details)
     authorization_details = AuthorizationDetails(
         auth_json=account_authorization_details,
@@ -262,6 +574,8 @@ def scan_account(
         flag_conditional_statements=flag_conditional_statements,
         flag_resource_arn_statements=flag_resource_arn_statements,
         flag_trust_policies=flag_trust_policies,
+        # Several accounts can be in flight at once, and only the results are kept
+        memory_lean=True,
     )
     return authorization_details.results
 
@@ -270,23 +584,16 @@ def download_account_authorization_details(
     target_account_id: str, target_role_name: str, profile: str | None = None
 ) -> dict[str, list[dict[str, Any]]]:
     """Download the account authorization details from a target account"""
-    (
-        aws_access_key_id,
-        aws_secret_access_key,
-        aws_session_token,
-    ) = aws_login.get_target_account_credentials(
+    # Shared, so the role is assumed once per account and its credentials are refreshed before they expire
+    session = aws_login.get_target_account_session(
         target_account_id=target_account_id,
         target_account_role_name=target_role_name,
         profile=profile,
     )
-    session_data = {
-        "region_name": "us-east-1",
-        "aws_access_key_id": aws_access_key_id,
-        "aws_secret_access_key": aws_secret_access_key,
-        "aws_session_token": aws_session_token,
-    }
     include_non_default_policy_versions = False
-    return get_account_authorization_details(session_data, include_non_default_policy_versions)
+    return get_account_authorization_details(
+        {"region_name": "us-east-1"}, include_non_default_policy_versions, session=session
+    )
 
 
 def get_exclusions(exclusions_file: str | None = None) -> Exclusions:
@@ -8,6 +8,7 @@
 from __future__ import annotations
 
 import logging
+from functools import cached_property
 from typing import TYPE_CHECKING, Any
 
 from cloudsplaining.shared.constants import (
@@ -16,11 +17,7 @@ from cloudsplaining.shared.constants import (
     READ_ONLY_DATA_EXFILTRATION_ACTIONS,
     RISK_DEFINITION,
 )
-from cloudsplaining.shared.exclusions import (
-    DEFAULT_EXCLUSIONS,
-    Exclusions,
-    is_name_excluded,
-)
+from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
 
 if TYPE_CHECKING:
     from cloudsplaining.scan.policy_document import PolicyDocument
@@ -79,7 +76,7 @@ class PolicyFinding:
             services_affected.add(service)
         return sorted(services_affected)
 
-    @property
+    @cached_property
     def resource_exposure(self) -> list[str]:
         """Return a list of actions that could cause resource exposure via actions at the 'Permissions management'
         access level, if applicable."""
@@ -87,7 +84,7 @@ class PolicyFinding:
             return [
                 action
                 for action in self.policy_document.permissions_management_without_constraints
-                if not is_name_excluded(action.lower(), self.always_exclude_actions)
+                if not self.exclusions.is_action_always_excluded(action)
             ]
 
         return self.policy_document.permissions_management_without_constraints
@@ -97,7 +94,7 @@ class PolicyFinding:
         """Returns privilege escalation action combinations in the policy, if present"""
         return self.policy_document.allows_privilege_escalation
 
-    @property
+    @cached_property
     def data_exfiltration(self) -> list[str]:
         """Returns data exfiltration actions in the policy, if present"""
         return [
@@ -113,7 +110,7 @@ class PolicyFinding:
         """Determine if the policy gives access to all actions within a service - simple grepping"""
         return self.policy_document.service_wildcard
 
-    @property
+    @cached_property
     def credentials_exposure(self) -> list[str]:
         """Determine if the action returns credentials"""
         # https://gist.github.com/kmcquade/33860a617e651104d243c324ddf7992a
@@ -128,60 +125,41 @@ class PolicyFinding:
     @property
     def results(self) -> dict[str, Any]:
         """Return the results as JSON"""
+        # The document's findings record applies the severity filter
+        is_enabled = self.policy_document.get_findings(self.severity).is_enabled
         return {
             "ServiceWildcard": {
                 "severity": ISSUE_SEVERITY["ServiceWildcard"],
                 "description": RISK_DEFINITION["ServiceWildcard"],
-                "findings": (
-                    self.service_wildcard
-                    if ISSUE_SEVERITY["ServiceWildcard"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
+                "findings": self.service_wildcard if is_enabled("ServiceWildcard") else [],
             },
             "ServicesAffected": self.services_affected,
             "PrivilegeEscalation": {
                 "severity": ISSUE_SEVERITY["PrivilegeEscalation"],
                 "description": RISK_DEFINITION["PrivilegeEscalation"],
-                "findings": (
-                    self.privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
+                "findings": self.privilege_escalation if is_enabled("PrivilegeEscalation") else [],
             },
             "DataExfiltration": {
                 "severity": ISSUE_SEVERITY["DataExfiltration"],
                 "description": RISK_DEFINITION["DataExfiltration"],
-                "findings": (
-                    self.data_exfiltration
-                    if ISSUE_SEVERITY["DataExfiltration"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
+                "findings": self.data_exfiltration if is_enabled("DataExfiltration") else [],
             },
             "ResourceExposure": {
                 "severity": ISSUE_SEVERITY["ResourceExposure"],
                 "description": RISK_DEFINITION["ResourceExposure"],
-                "findings": (
-                    self.resource_exposure
-                    if ISSUE_SEVERITY["ResourceExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
+                "findings": self.resource_exposure if is_enabled("ResourceExposure") else [],
             },
             "CredentialsExposure": {
                 "severity": ISSUE_SEVERITY["CredentialsExposure"],
                 "description": RISK_DEFINITION["CredentialsExposure"],
-                "findings": (
-                    self.credentials_exposure
-                    if ISSUE_SEVERITY["CredentialsExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
+                "findings": self.credentials_exposure if is_enabled("CredentialsExposure") else [],
             },
             "InfrastructureModification": {
                 "severity": ISSUE_SEVERITY["InfrastructureModification"],
                 "description": RISK_DEFINITION["InfrastructureModification"],
                 "findings": (
                     self.missing_resource_constraints_for_modify_actions
-                    if ISSUE_SEVERITY["InfrastructureModification"] in [x.lower() for x in self.severity]
-                    or not self.severity
+                    if is_enabled("InfrastructureModification")
                     else []
                 ),
             },
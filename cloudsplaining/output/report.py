@@ -2,21 +2,112 @@
 
 from __future__ import annotations
 
+import base64
 import datetime
-import json
+import functools
+import re
+import shutil
+import threading
+import zlib
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any
+from typing import IO, TYPE_CHECKING, Any
+from urllib.parse import quote
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 
 from cloudsplaining.bin.version import __version__
+from cloudsplaining.shared.json_stream import iter_encode_json
 from cloudsplaining.shared.template_config import TemplateConfig
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
 app_bundle_path = Path(__file__).parent / "dist/js/index.js"
 
+# In split reports, the directory next to the reports that the shared JS bundles are written to
+REPORT_ASSETS_DIRECTORY = "assets"
+
+# The encodings that the results can be compressed with, for the DecompressionStream of the browser, and the
+# matching zlib wbits
+RESULTS_COMPRESSION_WBITS = {"gzip": 31, "deflate": 15}
+
+
+class ReportRenderer:
+    """
+    Renders any number of reports from one compiled template.
+
+    The template is compiled once, and the inlined JS bundles are read once, then kept until the files change. That
+    matters when one process renders hundreds of account reports, like scan-multi-account.
+    """
+
+    def __init__(self, template_directory: Path = Path(__file__).parent) -> None:
+        # auto_reload recompiles the template when the file changes
+        self.environment = Environment(loader=FileSystemLoader(template_directory), auto_reload=True)  # noqa: S701
+        self._scripts: dict[Path, tuple[tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def template(self) -> Template:
+        return self.environment.get_template("template.html")
+
+    def script(self, bundle_path: Path) -> str:
+        """Get the script element that inlines a JS bundle"""
+        stat = bundle_path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._scripts.get(bundle_path)
+            if cached is None or cached[0] != version:
+                bundle_content = bundle_path.read_text(encoding="utf-8")
+                cached = (version, f'<script type="text/javascript">\n{bundle_content}\n</script>')
+                self._scripts[bundle_path] = cached
+        return cached[1]
+
+    def render(self, template_contents: Mapping[str, object]) -> str:
+        return self.template.render(t=template_contents)
+
+    def iter_render(self, template_contents: Mapping[str, object]) -> Iterator[str]:
+        """
+        Render the template in chunks.
+
+        Values that are iterators of strings, like the encoded results, are never joined: the template is rendered
+        with a marker in their place, and their chunks are yielded where the markers are.
+        """
+        streams: dict[str, Iterator[str]] = {}
+        skeleton_contents: dict[str, object] = {}
+        for key, value in template_contents.items():
+            if isinstance(value, Iterator):
+                marker = f"\x00{key}\x00"
+                streams[marker] = value
+                skeleton_contents[key] = marker
+            else:
+                skeleton_contents[key] = value
+        skeleton = self.render(skeleton_contents)
+        if not streams:
+            yield skeleton
+            return
+        for part in re.split(f"({'|'.join(map(re.escape, streams))})", skeleton):
+            if part in streams:
+                yield from streams[part]
+            elif part:
+                yield part
+
+
+@functools.cache
+def get_report_renderer() -> ReportRenderer:
+    """Get the process-wide ReportRenderer"""
+    return ReportRenderer()
+
 
 class HTMLReport:
-    """Inject the JS files and report results into the final HTML report"""
+    """
+    Inject the JS files and report results into the final HTML report
+
+    :param split: Reference the JS bundles in REPORT_ASSETS_DIRECTORY, and the results in the data file next to the
+        report, instead of embedding them. See write_report_assets and write_data_file.
+    :param compression: Embed the results compressed with "gzip" or "deflate", as base64, for the app to decompress
+        in the browser. The JSON is several times larger than the compressed results.
+    """
 
     def __init__(
         self,
@@ -24,14 +115,56 @@ class HTMLReport:
         account_name: str,
         results: dict[str, dict[str, Any]],
         minimize: bool = False,
+        split: bool = False,
+        compression: str | None = None,
     ) -> None:
+        if compression is not None and compression not in RESULTS_COMPRESSION_WBITS:
+            raise ValueError(f"The results can only be compressed with {', '.join(RESULTS_COMPRESSION_WBITS)}")
         self.account_name = account_name
         self.account_id = account_id
         self.report_generated_time = datetime.datetime.now().strftime("%Y-%m-%d")
         self.minimize = minimize
-        self.results = f"var iam_data = {json.dumps(results, default=str)}"
+        self.split = split
+        self.compression = compression
+        self.iam_data = results
         self.template_config = TemplateConfig()
 
+    @property
+    def results(self) -> str:
+        """The script statement that defines the results as iam_data"""
+        return "".join(self.iter_results())
+
+    def iter_results(self) -> Iterator[str]:
+        """
+        The script statement that defines the results as iam_data, encoded in chunks.
+
+        Compressed results are defined as iam_data_compressed instead, and iam_data is left empty until the app
+        decompresses them.
+        """
+        if self.compression is None:
+            yield "var iam_data = "
+            yield from iter_encode_json(self.iam_data)
+            return
+        yield f'var iam_data = {{}};\n    var iam_data_compressed = {{"encoding": "{self.compression}", "data": "'
+        yield from iter_compressed_base64(iter_encode_json(self.iam_data), self.compression)
+        yield '"}'
+
+    @property
+    def data_file_name(self) -> str:
+        """The name of the data file of a split report, which defines iam_data"""
+        return get_report_data_file_name(self.account_name)
+
+    def write_data_file(self, fp: IO[str]) -> None:
+        """Write the data file of a split report to a text file"""
+        fp.writelines(self.iter_results())
+
+    @property
+    def data_js(self) -> str:
+        """The script element that loads the data file of a split report"""
+        if not self.split:
+            return ""
+        return f'<script type="text/javascript" src="{quote(self.data_file_name)}"></script>'
+
     @property
     def app_bundle(self) -> str:
         """The Cloudsplaining Javascript application code should be loaded either from the CDN or locally,
@@ -39,10 +172,10 @@ class HTMLReport:
         if self.minimize:
             js_url = f"https://cdn.jsdelivr.net/gh/salesforce/cloudsplaining@{__version__}/cloudsplaining/output/dist/js/index.js"
             return f'<script type="text/javascript" src="{js_url}"></script>'
+        if self.split:
+            return f'<script type="text/javascript" src="{REPORT_ASSETS_DIRECTORY}/{app_bundle_path.name}"></script>'
 
-        bundle_content = app_bundle_path.read_text(encoding="utf-8")
-        # bundle_content = app_bundle_path.read_text(encoding="utf-8")
-        return f'<script type="text/javascript">\n{bundle_content}\n</script>'
+        return get_report_renderer().script(app_bundle_path)
 
     @property
     def vendor_bundle(self) -> str:
@@ -52,19 +185,28 @@ class HTMLReport:
         if self.minimize:
             js_url = f"https://cdn.jsdelivr.net/gh/salesforce/cloudsplaining@{__version__}/cloudsplaining/output/dist/js/chunk-vendors.js"
             return f'<script type="text/javascript" src="{js_url}"></script>'
+        if self.split:
+            vendor_bundle_name = get_vendor_bundle_path().name
+            return f'<script type="text/javascript" src="{REPORT_ASSETS_DIRECTORY}/{vendor_bundle_name}"></script>'
 
-        vendor_bundle_path = get_vendor_bundle_path()
-        bundle_content = vendor_bundle_path.read_text(encoding="utf-8")
-        # bundle_content = vendor_bundle_path.read_text(encoding="utf-8")
-        return f'<script type="text/javascript">\n{bundle_content}\n</script>'
+        return get_report_renderer().script(get_vendor_bundle_path())
 
     def get_html_report(self) -> str:
         """Returns the rendered HTML report"""
+        return "".join(self.iter_html_report())
+
+    def iter_html_report(self) -> Iterator[str]:
+        """
+        Render the HTML report in chunks. The results are encoded as they are written, and the bundles are yielded
+        as they are, so the report is never held as one string.
+        """
+        # The bundles and results are passed as streams, so they are not copied into the rendered template
         template_contents = {
-            "vendor_bundle_js": self.vendor_bundle,
-            "app_bundle_js": self.app_bundle,
+            "vendor_bundle_js": iter((self.vendor_bundle,)),
+            "app_bundle_js": iter((self.app_bundle,)),
             # results
-            "results": self.results,
+            "results": "" if self.split else self.iter_results(),
+            "data_js": self.data_js,
             # account metadata
             "account_id": self.account_id,
             "account_name": self.account_name,
@@ -75,14 +217,55 @@ class HTMLReport:
             "show_guidance_nav": self.template_config.show_guidance_nav,
             "show_appendices_nav": self.template_config.show_appendices_nav,
         }
-        env = Environment(loader=FileSystemLoader(Path(__file__).parent))  # noqa: S701
-        template = env.get_template("template.html")
-        return template.render(t=template_contents)
+        return get_report_renderer().iter_render(template_contents)
+
+    def write_html_report(self, fp: IO[str]) -> None:
+        """Write the rendered HTML report to a text file"""
+        fp.writelines(self.iter_html_report())
+
+
+def iter_compressed_base64(chunks: Iterable[str], compression: str) -> Iterator[str]:
+    """Compress chunks of text with gzip or deflate, and encode them as base64, in chunks"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, RESULTS_COMPRESSION_WBITS[compression])
+    pending = b""
+    for chunk in chunks:
+        pending += compressor.compress(chunk.encode("utf-8"))
+        # base64 encodes 3 bytes at a time, so the rest waits for the next chunk
+        complete = len(pending) - len(pending) % 3
+        if complete:
+            yield base64.b64encode(pending[:complete]).decode("ascii")
+            pending = pending[complete:]
+    yield base64.b64encode(pending + compressor.flush()).decode("ascii")
+
+
+def get_report_data_file_name(account_name: str) -> str:
+    """The name of the data file of an account's split report"""
+    return f"{account_name}.data.js"
+
+
+def get_report_asset_paths() -> list[Path]:
+    """The JS bundles that split reports load from REPORT_ASSETS_DIRECTORY"""
+    return [get_vendor_bundle_path(), app_bundle_path]
+
+
+def write_report_assets(output_directory: Path) -> Path:
+    """Copy the JS bundles of split reports to REPORT_ASSETS_DIRECTORY, in the directory of the reports"""
+    assets_directory = output_directory / REPORT_ASSETS_DIRECTORY
+    assets_directory.mkdir(exist_ok=True)
+    for asset_path in get_report_asset_paths():
+        shutil.copyfile(asset_path, assets_directory / asset_path.name)
+    return assets_directory
 
 
 def get_vendor_bundle_path() -> Path:
     """Finds the vendored javascript bundle even if it has a hash suffix"""
     vendor_bundle_directory = Path(__file__).parent / "dist/js"
+    # The directory is only listed again when its contents change
+    return _find_vendor_bundle(vendor_bundle_directory, vendor_bundle_directory.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4)
+def _find_vendor_bundle(vendor_bundle_directory: Path, mtime_ns: int) -> Path:  # noqa: ARG001
     for f in vendor_bundle_directory.iterdir():
         if f.is_file() and f.suffix == ".js" and f.stem == "chunk-vendors":
             return f.absolute()
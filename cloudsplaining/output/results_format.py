@@ -0,0 +1,68 @@
+"""The normalized format of the scan results.
+
+The default results format repeats a lot of data: every user embeds the full JSON of each of its groups, every risk
+category of every policy carries the same description text, and managed policies list all of their versions. On
+large accounts that makes up most of the results. Version 2 of the format, the normalized one, stores each of them
+once:
+
+* Users reference their groups by ID, like {"admin": "AGPAEXAMPLEID"}, and the groups are looked up in "groups".
+* The risk categories leave out their description, which is in the "risk_definitions" table instead.
+* Managed policies only list their default version in PolicyVersionList.
+
+Normalized results have a "format_version" of 2. Results without one are in the default format.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+from typing import Any
+
+from cloudsplaining.shared.constants import RISK_DEFINITION
+
+NORMALIZED_RESULTS_FORMAT_VERSION = 2
+
+_POLICY_TYPES = ("inline_policies", "aws_managed_policies", "customer_managed_policies")
+_MANAGED_POLICY_TYPES = ("aws_managed_policies", "customer_managed_policies")
+
+
+def _without_descriptions(entry: dict[str, Any]) -> dict[str, Any]:
+    """Drop the description of every risk category of a policy or role"""
+    return {
+        key: {k: v for k, v in value.items() if k != "description"}
+        if isinstance(value, dict) and "description" in value and "findings" in value
+        else value
+        for key, value in entry.items()
+    }
+
+
+def normalize_results(results: dict[str, Any]) -> dict[str, Any]:
+    """
+    Convert results in the default format to the normalized format.
+
+    The results are not modified; the parts that change are copied, and the rest is shared with the new results.
+
+    :param results: The results of AuthorizationDetails
+    :return: The same results, in version 2 of the format
+    """
+    normalized: dict[str, Any] = {"format_version": NORMALIZED_RESULTS_FORMAT_VERSION, **results}
+    normalized["users"] = {
+        user_id: {**user, "groups": {name: group["id"] for name, group in user.get("groups", {}).items()}}
+        for user_id, user in results.get("users", {}).items()
+    }
+    normalized["roles"] = {role_id: _without_descriptions(role) for role_id, role in results.get("roles", {}).items()}
+    for policy_type in _POLICY_TYPES:
+        policies: dict[str, dict[str, Any]] = {}
+        for policy_id, policy in results.get(policy_type, {}).items():
+            normalized_policy = _without_descriptions(policy)
+            if policy_type in _MANAGED_POLICY_TYPES and "PolicyVersionList" in policy:
+                normalized_policy["PolicyVersionList"] = [
+                    version for version in policy["PolicyVersionList"] if version.get("IsDefaultVersion")
+                ]
+            policies[policy_id] = normalized_policy
+        normalized[policy_type] = policies
+    normalized["risk_definitions"] = dict(RISK_DEFINITION)
+    return normalized
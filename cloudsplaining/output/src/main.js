@@ -21,4 +21,26 @@ const directiveNameFromKey = (key) =>
 Object.entries(Directives).forEach(([key, directive]) => {
   app.directive(directiveNameFromKey(key), directive);
 });
-app.mount('#app');
+
+/**
+ * Reports generated with compressed results embed them as base64 gzip or deflate in iam_data_compressed,
+ * and leave iam_data empty. Decompress them into iam_data before the app reads it.
+ *
+ * @returns {Promise<void>}
+ */
+const loadCompressedIamData = async () => {
+  if (typeof window.iam_data_compressed === 'undefined') {
+    return;
+  }
+  const { encoding, data } = window.iam_data_compressed;
+  // A data: URL decodes the base64 natively, without a copy of the payload as a binary string
+  const response = await fetch(`data:application/octet-stream;base64,${data}`);
+  const decompressed = response.body.pipeThrough(new DecompressionStream(encoding));
+  window.iam_data = JSON.parse(await new Response(decompressed).text());
+  // Let the payload be garbage collected
+  window.iam_data_compressed = undefined;
+};
+
+loadCompressedIamData()
+  .catch((error) => console.error(`Could not decompress the IAM data: ${error}`))
+  .finally(() => app.mount('#app'));
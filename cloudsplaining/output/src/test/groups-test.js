@@ -61,3 +61,18 @@ it("groups.getGroupMemberships: should return list users that are a member of gi
     assert.deepInclude(result, expectedResult)
     console.log(`Should be array of objects for the user "userwithlotsofpermissions"] : ${JSON.stringify(result)}`);
 });
+
+it("groups.getGroupMemberships: should resolve the groups of normalized results by ID", function () {
+    const normalizedIamData = {
+        ...iam_data,
+        users: Object.fromEntries(Object.entries(iam_data.users).map(([userId, user]) => [
+            userId,
+            {...user, groups: Object.fromEntries(Object.entries(user.groups).map(([name, group]) => [name, group.id]))}
+        ]))
+    };
+    assert.deepEqual(
+        groups.getGroupMemberships(normalizedIamData, "ASIAZZUSERZZPLACEHOLDER"),
+        groups.getGroupMemberships(iam_data, "ASIAZZUSERZZPLACEHOLDER")
+    );
+    assert.deepEqual(groups.getGroupMembers(normalizedIamData, "admin"), groups.getGroupMembers(iam_data, "admin"));
+});
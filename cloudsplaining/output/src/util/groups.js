@@ -4,6 +4,25 @@ function getGroupNames(iam_data) {
     return Object.keys(iam_data["groups"]);
 }
 
+/**
+ * Collects the IAM Groups a user belongs to, as group objects. Normalized results reference the groups by ID,
+ * so they are looked up in iam_data["groups"]; results in the default format embed them.
+ * @param iam_data Global container with IAM report
+ * @param userId AWS unique user identifier
+ * @returns [{string: any}]
+ */
+function getUserGroups(iam_data, userId) {
+    const groups = iam_data["users"][userId]["groups"];
+
+    if (!groups) {
+        return [];
+    }
+
+    return Object.values(groups)
+        .map(group => typeof group === "string" ? iam_data["groups"][group] : group)
+        .filter(group => group !== undefined);
+}
+
 /**
  * Collects members that belong to IAM Group matching given groupId
  * @param iam_data Global container with IAM report
@@ -22,7 +41,7 @@ function getGroupMembers(iam_data, groupId) {
     // todo: clean this up with a nicer map/filter/reduce
     for (let i = 0; i < userObjects.length; i++) {
         let userId = userObjects[i];
-        let groupMemberships = Object.values(iam_data["users"][userId]["groups"]);
+        let groupMemberships = getUserGroups(iam_data, userId);
 
         if (groupMemberships.some(group => group.id === groupId)) {
             members.push({
@@ -42,17 +61,18 @@ function getGroupMembers(iam_data, groupId) {
  */
 function getGroupMemberships(iam_data, userId) {
 
-    let groupMemberships = iam_data["users"][userId].groups;
+    let groupMemberships = getUserGroups(iam_data, userId);
 
-    if (!groupMemberships || !Object.keys(groupMemberships).length) {
+    if (!groupMemberships.length) {
         return [];
     }
 
-    return Object.values(groupMemberships).reduce((groups, group) => {
+    return groupMemberships.reduce((groups, group) => {
         return [...groups, {group_id: group.id, group_name: group.name}]
     }, [])
 }
 
 exports.getGroupNames = getGroupNames;
+exports.getUserGroups = getUserGroups;
 exports.getGroupMembers = getGroupMembers;
 exports.getGroupMemberships = getGroupMemberships;
@@ -15,6 +15,7 @@ from policy_sentry.querying.all import get_all_service_prefixes
 
 from cloudsplaining.scan.group_details import GroupDetailList
 from cloudsplaining.scan.managed_policy_detail import ManagedPolicyDetails
+from cloudsplaining.scan.policy_attachments import get_policy_attachments
 from cloudsplaining.scan.role_details import RoleDetailList
 from cloudsplaining.scan.user_details import UserDetailList
 from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
@@ -37,6 +38,7 @@ class AuthorizationDetails:
         flag_resource_arn_statements: bool = False,
         flag_trust_policies: bool = False,
         severity: list[str] | None = None,
+        memory_lean: bool = False,
     ) -> None:
         """
         Object to hold and analyze Account Authorization details.
@@ -45,51 +47,67 @@ class AuthorizationDetails:
         :param exclusions: A list of exclusions to apply to the results
         :param flag_conditional_statements: Flag IAM statements with conditions, not just wildcards
         :param flag_resource_arn_statements: Flag IAM statements with resource ARN restrictions, not just wildcards
+        :param memory_lean: Drop the raw JSON once it has been analyzed - auth_json, and the policy_detail of each
+            managed policy and role_detail of each role, the only scan objects that keep theirs - and the
+            per-statement action lists once the results have been generated. The results are the same, but scanning
+            several large accounts at once uses much less memory.
+
+        Changing the exclusions, flags, or severity afterwards analyzes the account again, from the raw JSON, which
+        memory_lean mode does not keep.
         """
-        self.severity = [] if severity is None else severity
-        self.auth_json = auth_json
+        self._severity = [] if severity is None else severity
+        self.auth_json: dict[str, list[dict[str, Any]]] | None = auth_json
+        self.memory_lean = memory_lean
+        self._results: dict[str, dict[str, Any]] | None = None
 
         if not isinstance(exclusions, Exclusions):
             raise Exception("For exclusions, please provide an object of the Exclusions type")
-        self.exclusions = exclusions
-        self.flag_conditional_statements = flag_conditional_statements
-        self.flag_resource_arn_statements = flag_resource_arn_statements
-        self.flag_trust_policies = flag_trust_policies
+        self._exclusions = exclusions
+        self._flag_conditional_statements = flag_conditional_statements
+        self._flag_resource_arn_statements = flag_resource_arn_statements
+        self._flag_trust_policies = flag_trust_policies
+
+        self._build_details(auth_json)
 
+        if memory_lean:
+            self._release_raw_data()
+
+    def _build_details(self, auth_json: dict[str, list[dict[str, Any]]]) -> None:
+        """Create the scan objects of the policies and principals, with the current options"""
         self.policies = ManagedPolicyDetails(
             auth_json.get("Policies", []),
-            exclusions,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-            severity=severity,
+            self._exclusions,
+            flag_conditional_statements=self._flag_conditional_statements,
+            flag_resource_arn_statements=self._flag_resource_arn_statements,
+            severity=self._severity,
         )
 
         # New Authorization file stuff
         self.group_detail_list = GroupDetailList(
             auth_json.get("GroupDetailList", []),
             self.policies,
-            exclusions,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-            severity=severity,
+            self._exclusions,
+            flag_conditional_statements=self._flag_conditional_statements,
+            flag_resource_arn_statements=self._flag_resource_arn_statements,
+            severity=self._severity,
         )
         self.user_detail_list = UserDetailList(
             auth_json.get("UserDetailList", []),
             self.policies,
             self.group_detail_list,
-            exclusions,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-            severity=severity,
+            self._exclusions,
+            flag_conditional_statements=self._flag_conditional_statements,
+            flag_resource_arn_statements=self._flag_resource_arn_statements,
+            severity=self._severity,
         )
         self.role_detail_list = RoleDetailList(
             auth_json.get("RoleDetailList", []),
             self.policies,
-            exclusions,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-            flag_trust_policies=flag_trust_policies,
-            severity=severity,
+            self._exclusions,
+            flag_conditional_statements=self._flag_conditional_statements,
+            flag_resource_arn_statements=self._flag_resource_arn_statements,
+            flag_trust_policies=self._flag_trust_policies,
+            severity=self._severity,
         )
 
         iam_data = {
@@ -98,10 +116,94 @@ class AuthorizationDetails:
             "roles": self.role_detail_list.json,
         }
 
-        self.policies.set_iam_data(iam_data)
-        self.group_detail_list.set_iam_data(iam_data)
-        self.user_detail_list.set_iam_data(iam_data)
-        self.role_detail_list.set_iam_data(iam_data)
+        # Built once, so each policy can look up the principals it is attached to
+        policy_attachments = get_policy_attachments(iam_data)
+
+        self.policies.set_iam_data(iam_data, policy_attachments)
+        self.group_detail_list.set_iam_data(iam_data, policy_attachments)
+        self.user_detail_list.set_iam_data(iam_data, policy_attachments)
+        self.role_detail_list.set_iam_data(iam_data, policy_attachments)
+
+    def _options_changed(self) -> None:
+        """Analyze the account again after an option changed, since the options are passed down to every policy and
+        statement"""
+        if self.auth_json is None:
+            raise Exception("The options cannot be changed in memory_lean mode, since the raw JSON was released")
+        self._build_details(self.auth_json)
+        self._results = None
+
+    def _release_raw_data(self) -> None:
+        """Drop the raw JSON that the scan objects hold on to for debugging. Everything that reaches the results
+        has already been extracted from it."""
+        self.auth_json = None
+        for policy in self.policies.policy_details:
+            policy.policy_detail = None
+        for role in self.role_detail_list.roles:
+            role.role_detail = None
+
+    def _release_cached_data(self) -> None:
+        """Drop the action lists that each statement caches while the results are generated"""
+        for policy in self.policies.policy_details:
+            policy.release_cached_data()
+        for principal in (
+            *self.group_detail_list.groups,
+            *self.user_detail_list.users,
+            *self.role_detail_list.roles,
+        ):
+            for inline_policy in principal.inline_policies:
+                inline_policy.release_cached_data()
+
+    @property
+    def exclusions(self) -> Exclusions:
+        """The exclusions applied to the results"""
+        return self._exclusions
+
+    @exclusions.setter
+    def exclusions(self, exclusions: Exclusions) -> None:
+        if not isinstance(exclusions, Exclusions):
+            raise Exception("For exclusions, please provide an object of the Exclusions type")
+        self._exclusions = exclusions
+        self._options_changed()
+
+    @property
+    def severity(self) -> list[str]:
+        """The severities of the findings in the results. Empty for all of them."""
+        return self._severity
+
+    @severity.setter
+    def severity(self, severity: list[str] | None) -> None:
+        self._severity = [] if severity is None else severity
+        self._options_changed()
+
+    @property
+    def flag_conditional_statements(self) -> bool:
+        """Whether IAM statements with conditions are flagged, not just wildcards"""
+        return self._flag_conditional_statements
+
+    @flag_conditional_statements.setter
+    def flag_conditional_statements(self, flag_conditional_statements: bool) -> None:
+        self._flag_conditional_statements = flag_conditional_statements
+        self._options_changed()
+
+    @property
+    def flag_resource_arn_statements(self) -> bool:
+        """Whether IAM statements with resource ARN restrictions are flagged, not just wildcards"""
+        return self._flag_resource_arn_statements
+
+    @flag_resource_arn_statements.setter
+    def flag_resource_arn_statements(self, flag_resource_arn_statements: bool) -> None:
+        self._flag_resource_arn_statements = flag_resource_arn_statements
+        self._options_changed()
+
+    @property
+    def flag_trust_policies(self) -> bool:
+        """Whether risky trust policies in roles are flagged"""
+        return self._flag_trust_policies
+
+    @flag_trust_policies.setter
+    def flag_trust_policies(self, flag_trust_policies: bool) -> None:
+        self._flag_trust_policies = flag_trust_policies
+        self._options_changed()
 
     @property
     def inline_policies(self) -> dict[str, dict[str, Any]]:
@@ -137,7 +239,15 @@ class AuthorizationDetails:
 
     @property
     def results(self) -> dict[str, dict[str, Any]]:
-        """Get the new JSON format of the Principals data"""
+        """Get the new JSON format of the Principals data.
+
+        The result tree is built on first access and the same object is returned afterwards, so callers should not
+        modify it. Call invalidate_results() to build it again."""
+        if self._results is None:
+            self._results = self._build_results()
+        return self._results
+
+    def _build_results(self) -> dict[str, dict[str, Any]]:
         results: dict[str, dict[str, Any]] = {
             "groups": self.group_detail_list.json,
             "users": self.user_detail_list.json,
@@ -148,4 +258,12 @@ class AuthorizationDetails:
             "exclusions": self.exclusions.config,
             "links": self.links,
         }
+        if self.memory_lean:
+            self._release_cached_data()
         return results
+
+    def invalidate_results(self) -> None:
+        """Drop the cached result tree and the per-statement action lists, so the next access to results
+        recomputes them, e.g., to release the memory they use. Changing an option drops them too."""
+        self._results = None
+        self._release_cached_data()
@@ -18,6 +18,7 @@ from cloudsplaining.shared.utils import (
 
 if TYPE_CHECKING:
     from cloudsplaining.scan.managed_policy_detail import ManagedPolicyDetails
+    from cloudsplaining.scan.policy_attachments import PolicyAttachments
     from cloudsplaining.scan.statement_detail import StatementDetail
 
 
@@ -60,10 +61,12 @@ class GroupDetailList:
             "roles": {},
         }
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for group in self.groups:
-            group.set_iam_data(iam_data)
+            group.set_iam_data(iam_data, policy_attachments)
 
     def get_group_detail(self, name: str) -> GroupDetail | None:
         """Get a GroupDetail object by providing the Name of the group. This is useful to UserDetail objects"""
@@ -118,6 +121,21 @@ class GroupDetailList:
 class GroupDetail:
     """Processes an entry under GroupDetailList"""
 
+    __slots__ = (
+        "arn",
+        "attached_managed_policies",
+        "create_date",
+        "flag_conditional_statements",
+        "flag_resource_arn_statements",
+        "group_id",
+        "group_name",
+        "iam_data",
+        "inline_policies",
+        "is_excluded",
+        "path",
+        "severity",
+    )
+
     def __init__(
         self,
         group_detail: dict[str, Any],
@@ -193,10 +211,12 @@ class GroupDetail:
             "roles": {},
         }
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for inline_policy in self.inline_policies:
-            inline_policy.set_iam_data(iam_data)
+            inline_policy.set_iam_data(iam_data, policy_attachments)
 
     def _is_excluded(self, exclusions: Exclusions) -> bool:
         """Determine whether the principal name or principal ID is excluded"""
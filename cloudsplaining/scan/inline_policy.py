@@ -3,15 +3,11 @@
 from __future__ import annotations
 
 import json
+from functools import cached_property
 from typing import Any, cast
 
-from cloudsplaining.scan.policy_document import PolicyDocument
-from cloudsplaining.shared.constants import (
-    ISSUE_SEVERITY,
-    PRIVILEGE_ESCALATION_GLOSSARY_URL,
-    PRIVILEGE_ESCALATION_PATHFINDING_PATHS,
-    RISK_DEFINITION,
-)
+from cloudsplaining.scan.policy_attachments import PRINCIPAL_TYPES, PolicyAttachments, get_attached_principals
+from cloudsplaining.scan.policy_document import PolicyDocument, PolicyDocumentFindings, get_finding_links
 from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
 from cloudsplaining.shared.utils import get_non_provider_id
 
@@ -44,16 +40,11 @@ class InlinePolicy:
         self.flag_resource_arn_statements = flag_resource_arn_statements
 
         self.policy_name = policy_detail.get("PolicyName", "")
-        self.policy_document = PolicyDocument(
-            cast("dict[str, Any]", policy_detail.get("PolicyDocument")),
-            exclusions=exclusions,
-            flag_conditional_statements=flag_conditional_statements,
-            flag_resource_arn_statements=flag_resource_arn_statements,
-        )
+        self._policy_document_json = cast("dict[str, Any]", policy_detail.get("PolicyDocument"))
         # Generating the provider ID based on a string representation of the Policy Document,
         # to avoid collisions where there are inline policies with the same name but different contents
         # self.policy_id = get_non_provider_id(self.policy_name)
-        self.policy_id = get_non_provider_id(json.dumps(self.policy_document.json))
+        self.policy_id = get_non_provider_id(json.dumps(self._policy_document_json))
 
         self.exclusions = exclusions
         self.is_excluded = self._is_excluded(exclusions)
@@ -63,25 +54,44 @@ class InlinePolicy:
             "users": {},
             "roles": {},
         }
+        self.policy_attachments: PolicyAttachments | None = None
+
+    @cached_property
+    def policy_document(self) -> PolicyDocument:
+        """The policy document. Only built when it is needed, so excluded policies
+        and findings that are filtered out by severity don't pay for it."""
+        return PolicyDocument(
+            self._policy_document_json,
+            exclusions=self.exclusions,
+            flag_conditional_statements=self.flag_conditional_statements,
+            flag_resource_arn_statements=self.flag_resource_arn_statements,
+        )
+
+    def release_cached_data(self) -> None:
+        """Drop the cached action lists of the policy document, if it was built"""
+        if "policy_document" in self.__dict__:
+            self.policy_document.release_cached_data()
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
+        self.policy_attachments = policy_attachments
 
     def _is_excluded(self, exclusions: Exclusions) -> bool:
         """Determine whether the policy name or policy ID is excluded"""
         return bool(exclusions.is_policy_excluded(self.policy_name) or exclusions.is_policy_excluded(self.policy_id))
 
     def getFindingLinks(self, findings: list[dict[str, Any]]) -> dict[str, str]:  # noqa: N802
-        links = {}
-        for finding in findings:
-            method = finding["type"]
-            links[method] = PRIVILEGE_ESCALATION_PATHFINDING_PATHS.get(method) or (
-                f"{PRIVILEGE_ESCALATION_GLOSSARY_URL}#{method}"
-            )
-        return links
+        return get_finding_links(findings)
 
     @property
     def getAttached(self) -> dict[str, list[Any]]:  # noqa: N802
+        if self.policy_attachments is not None:
+            # Same results as the loop below, as a lookup in the index built by AuthorizationDetails
+            if self.is_excluded and any(self.iam_data[principal_type] for principal_type in PRINCIPAL_TYPES):
+                return {}
+            return get_attached_principals(self.policy_attachments, "inline_policies", self.policy_id)
         attached: dict[str, list[Any]] = {"roles": [], "groups": [], "users": []}
         for principal_type in ["roles", "groups", "users"]:
             principals = (self.iam_data[principal_type]).keys()
@@ -94,6 +104,11 @@ class InlinePolicy:
                     attached[principal_type].append(self.iam_data[principal_type][principal_id]["name"])
         return attached
 
+    @property
+    def findings(self) -> PolicyDocumentFindings:
+        """The findings of the policy document, with the severity filter applied. Computed once and shared."""
+        return self.policy_document.get_findings(self.severity)
+
     @property
     def json(self) -> dict[str, Any]:
         """Return JSON output for high risk actions"""
@@ -102,56 +117,7 @@ class InlinePolicy:
             "PolicyId": self.policy_id,
             "PolicyDocument": self.policy_document.json,
             "AttachedTo": self.getAttached,
-            "PrivilegeEscalation": {
-                "severity": ISSUE_SEVERITY["PrivilegeEscalation"],
-                "description": RISK_DEFINITION["PrivilegeEscalation"],
-                "findings": (
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-                "links": self.getFindingLinks(
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "DataExfiltration": {
-                "severity": ISSUE_SEVERITY["DataExfiltration"],
-                "description": RISK_DEFINITION["DataExfiltration"],
-                "findings": (
-                    self.policy_document.allows_data_exfiltration_actions
-                    if ISSUE_SEVERITY["DataExfiltration"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ResourceExposure": {
-                "severity": ISSUE_SEVERITY["ResourceExposure"],
-                "description": RISK_DEFINITION["ResourceExposure"],
-                "findings": (
-                    self.policy_document.permissions_management_without_constraints
-                    if ISSUE_SEVERITY["ResourceExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ServiceWildcard": {
-                "severity": ISSUE_SEVERITY["ServiceWildcard"],
-                "description": RISK_DEFINITION["ServiceWildcard"],
-                "findings": (
-                    self.policy_document.service_wildcard
-                    if ISSUE_SEVERITY["ServiceWildcard"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "CredentialsExposure": {
-                "severity": ISSUE_SEVERITY["CredentialsExposure"],
-                "description": RISK_DEFINITION["CredentialsExposure"],
-                "findings": (
-                    self.policy_document.credentials_exposure
-                    if ISSUE_SEVERITY["CredentialsExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
+            **self.findings.json,
             "is_excluded": self.is_excluded,
         }
 
@@ -163,65 +129,6 @@ class InlinePolicy:
             "PolicyId": self.policy_id,
             "PolicyDocument": self.policy_document.json,
             "AttachedTo": self.getAttached,
-            "PrivilegeEscalation": {
-                "severity": ISSUE_SEVERITY["PrivilegeEscalation"],
-                "description": RISK_DEFINITION["PrivilegeEscalation"],
-                "findings": (
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-                "links": self.getFindingLinks(
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "DataExfiltration": {
-                "severity": ISSUE_SEVERITY["DataExfiltration"],
-                "description": RISK_DEFINITION["DataExfiltration"],
-                "findings": (
-                    self.policy_document.allows_data_exfiltration_actions
-                    if ISSUE_SEVERITY["DataExfiltration"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ResourceExposure": {
-                "severity": ISSUE_SEVERITY["ResourceExposure"],
-                "description": RISK_DEFINITION["ResourceExposure"],
-                "findings": (
-                    self.policy_document.permissions_management_without_constraints
-                    if ISSUE_SEVERITY["ResourceExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ServiceWildcard": {
-                "severity": ISSUE_SEVERITY["ServiceWildcard"],
-                "description": RISK_DEFINITION["ServiceWildcard"],
-                "findings": (
-                    self.policy_document.service_wildcard
-                    if ISSUE_SEVERITY["ServiceWildcard"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "CredentialsExposure": {
-                "severity": ISSUE_SEVERITY["CredentialsExposure"],
-                "description": RISK_DEFINITION["CredentialsExposure"],
-                "findings": (
-                    self.policy_document.credentials_exposure
-                    if ISSUE_SEVERITY["CredentialsExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "InfrastructureModification": {
-                "severity": ISSUE_SEVERITY["InfrastructureModification"],
-                "description": RISK_DEFINITION["InfrastructureModification"],
-                "findings": (
-                    self.policy_document.infrastructure_modification
-                    if ISSUE_SEVERITY["InfrastructureModification"] in [x.lower() for x in self.severity]
-                    or not self.severity
-                    else []
-                ),
-            },
+            **self.findings.json_large,
             "is_excluded": self.is_excluded,
         }
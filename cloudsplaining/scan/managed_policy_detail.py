@@ -8,17 +8,13 @@
 from __future__ import annotations
 
 import logging
+from functools import cached_property
 from typing import Any
 
 from policy_sentry.util.arns import get_account_from_arn
 
-from cloudsplaining.scan.policy_document import PolicyDocument
-from cloudsplaining.shared.constants import (
-    ISSUE_SEVERITY,
-    PRIVILEGE_ESCALATION_GLOSSARY_URL,
-    PRIVILEGE_ESCALATION_PATHFINDING_PATHS,
-    RISK_DEFINITION,
-)
+from cloudsplaining.scan.policy_attachments import PRINCIPAL_TYPES, PolicyAttachments, get_attached_principals
+from cloudsplaining.scan.policy_document import PolicyDocument, PolicyDocumentFindings, get_finding_links
 from cloudsplaining.shared.exceptions import NotFoundException
 from cloudsplaining.shared.exclusions import (
     DEFAULT_EXCLUSIONS,
@@ -97,12 +93,36 @@ class ManagedPolicyDetails:
                 )
             )
 
+        # Indexes for the lookups below. If there are duplicates, the first policy wins.
+        self._policies_by_arn: dict[str, ManagedPolicy] = {}
+        self._policies_by_id: dict[str, ManagedPolicy] = {}
+        self._policies_by_name: dict[str, ManagedPolicy] = {}
+        for policy in self.policy_details:
+            self._policies_by_arn.setdefault(policy.arn, policy)
+            self._policies_by_id.setdefault(policy.policy_id, policy)
+            self._policies_by_name.setdefault(policy.policy_name, policy)
+
     def get_policy_detail(self, arn: str) -> ManagedPolicy:
         """Get a ManagedPolicy object by providing the ARN. This is useful to PrincipalDetail objects"""
-        for policy_detail in self.policy_details:
-            if policy_detail.arn == arn:
-                return policy_detail
-        raise NotFoundException(f"Managed Policy ARN {arn} not found.")
+        policy_detail = self._policies_by_arn.get(arn)
+        if policy_detail is None:
+            raise NotFoundException(f"Managed Policy ARN {arn} not found.")
+        return policy_detail
+
+    def get_policy_detail_by_id(self, policy_id: str) -> ManagedPolicy:
+        """Get a ManagedPolicy object by providing the PolicyId"""
+        policy_detail = self._policies_by_id.get(policy_id)
+        if policy_detail is None:
+            raise NotFoundException(f"Managed Policy ID {policy_id} not found.")
+        return policy_detail
+
+    def get_policy_detail_by_name(self, policy_name: str) -> ManagedPolicy:
+        """Get a ManagedPolicy object by providing the PolicyName. AWS-managed and customer-managed policies
+        can share a name, in which case the first one is returned."""
+        policy_detail = self._policies_by_name.get(policy_name)
+        if policy_detail is None:
+            raise NotFoundException(f"Managed Policy {policy_name} not found.")
+        return policy_detail
 
     @property
     def all_infrastructure_modification_actions(self) -> list[str]:
@@ -134,10 +154,12 @@ class ManagedPolicyDetails:
             policy.policy_id: policy.json_large for policy in self.policy_details if policy.managed_by == "Customer"
         }
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for policy_detail in self.policy_details:
-            policy_detail.set_iam_data(iam_data)
+            policy_detail.set_iam_data(iam_data, policy_attachments)
 
 
 # pylint: disable=too-many-instance-attributes
@@ -156,8 +178,8 @@ class ManagedPolicy:
         flag_resource_arn_statements: bool = False,
         severity: list[str] | None = None,
     ) -> None:
-        # Store the Raw JSON data from this for safekeeping
-        self.policy_detail = policy_detail
+        # Store the Raw JSON data from this for safekeeping. AuthorizationDetails drops it in memory-lean mode.
+        self.policy_detail: dict[str, Any] | None = policy_detail
 
         self.flag_conditional_statements = flag_conditional_statements
         self.flag_resource_arn_statements = flag_resource_arn_statements
@@ -178,6 +200,7 @@ class ManagedPolicy:
             "users": {},
             "roles": {},
         }
+        self.policy_attachments: PolicyAttachments | None = None
 
         if not isinstance(exclusions, Exclusions):
             raise Exception(
@@ -191,12 +214,13 @@ class ManagedPolicy:
         #   with IsDefaultVersion only.
         self.policy_version_list = policy_detail.get("PolicyVersionList", [])
 
-        self.policy_document = self._policy_document()
-
         self.severity = [] if severity is None else severity
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
+        self.policy_attachments = policy_attachments
 
     def _is_excluded(self, exclusions: Exclusions) -> bool:
         """Determine whether the policy name or policy ID is excluded"""
@@ -207,6 +231,17 @@ class ManagedPolicy:
             or is_name_excluded(self.path, "/aws-service-role*")
         )
 
+    @cached_property
+    def policy_document(self) -> PolicyDocument:
+        """The default version of the policy document. Only built when it is needed, so excluded policies
+        and findings that are filtered out by severity don't pay for it."""
+        return self._policy_document()
+
+    def release_cached_data(self) -> None:
+        """Drop the cached action lists of the policy document, if it was built"""
+        if "policy_document" in self.__dict__:
+            self.policy_document.release_cached_data()
+
     def _policy_document(self) -> PolicyDocument:
         """Return the policy document object"""
         for policy_version in self.policy_version_list:
@@ -242,16 +277,16 @@ class ManagedPolicy:
         return get_account_from_arn(self.arn)
 
     def getFindingLinks(self, findings: list[dict[str, Any]]) -> dict[Any, str]:  # noqa: N802
-        links = {}
-        for finding in findings:
-            method = finding["type"]
-            links[method] = PRIVILEGE_ESCALATION_PATHFINDING_PATHS.get(method) or (
-                f"{PRIVILEGE_ESCALATION_GLOSSARY_URL}#{method}"
-            )
-        return links
+        return get_finding_links(findings)
 
     @property
     def getAttached(self) -> dict[str, Any]:  # noqa: N802
+        if self.policy_attachments is not None:
+            # Same results as the loop below, as a lookup in the index built by AuthorizationDetails
+            if self.is_excluded and any(self.iam_data[principal_type] for principal_type in PRINCIPAL_TYPES):
+                return {}
+            policy_type = "aws_managed_policies" if self.managed_by == "AWS" else "customer_managed_policies"
+            return get_attached_principals(self.policy_attachments, policy_type, self.policy_id)
         attached: dict[str, Any] = {"roles": [], "groups": [], "users": []}
         for principal_type in ("roles", "groups", "users"):
             principals = self.iam_data[principal_type].keys()
@@ -267,6 +302,11 @@ class ManagedPolicy:
                     attached[principal_type].append(self.iam_data[principal_type][principal_id]["name"])
         return attached
 
+    @property
+    def findings(self) -> PolicyDocumentFindings:
+        """The findings of the policy document, with the severity filter applied. Computed once and shared."""
+        return self.policy_document.get_findings(self.severity)
+
     @property
     def json(self) -> dict[str, Any]:
         """Return JSON output for high risk actions"""
@@ -282,56 +322,7 @@ class ManagedPolicy:
             "CreateDate": self.create_date,
             "UpdateDate": self.update_date,
             "PolicyVersionList": self.policy_version_list,
-            "PrivilegeEscalation": {
-                "severity": ISSUE_SEVERITY["PrivilegeEscalation"],
-                "description": RISK_DEFINITION["PrivilegeEscalation"],
-                "findings": (
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-                "links": self.getFindingLinks(
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "DataExfiltration": {
-                "severity": ISSUE_SEVERITY["DataExfiltration"],
-                "description": RISK_DEFINITION["DataExfiltration"],
-                "findings": (
-                    self.policy_document.allows_data_exfiltration_actions
-                    if ISSUE_SEVERITY["DataExfiltration"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ResourceExposure": {
-                "severity": ISSUE_SEVERITY["ResourceExposure"],
-                "description": RISK_DEFINITION["ResourceExposure"],
-                "findings": (
-                    self.policy_document.permissions_management_without_constraints
-                    if ISSUE_SEVERITY["ResourceExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ServiceWildcard": {
-                "severity": ISSUE_SEVERITY["ServiceWildcard"],
-                "description": RISK_DEFINITION["ServiceWildcard"],
-                "findings": (
-                    self.policy_document.service_wildcard
-                    if ISSUE_SEVERITY["ServiceWildcard"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "CredentialsExposure": {
-                "severity": ISSUE_SEVERITY["CredentialsExposure"],
-                "description": RISK_DEFINITION["CredentialsExposure"],
-                "findings": (
-                    self.policy_document.credentials_exposure
-                    if ISSUE_SEVERITY["CredentialsExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
+            **self.findings.json,
             "is_excluded": self.is_excluded,
         }
 
@@ -350,65 +341,6 @@ class ManagedPolicy:
             "CreateDate": self.create_date,
             "UpdateDate": self.update_date,
             "PolicyVersionList": self.policy_version_list,
-            "PrivilegeEscalation": {
-                "severity": ISSUE_SEVERITY["PrivilegeEscalation"],
-                "description": RISK_DEFINITION["PrivilegeEscalation"],
-                "findings": (
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-                "links": self.getFindingLinks(
-                    self.policy_document.allows_privilege_escalation
-                    if ISSUE_SEVERITY["PrivilegeEscalation"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "DataExfiltration": {
-                "severity": ISSUE_SEVERITY["DataExfiltration"],
-                "description": RISK_DEFINITION["DataExfiltration"],
-                "findings": (
-                    self.policy_document.allows_data_exfiltration_actions
-                    if ISSUE_SEVERITY["DataExfiltration"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ResourceExposure": {
-                "severity": ISSUE_SEVERITY["ResourceExposure"],
-                "description": RISK_DEFINITION["ResourceExposure"],
-                "findings": (
-                    self.policy_document.permissions_management_without_constraints
-                    if ISSUE_SEVERITY["ResourceExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "ServiceWildcard": {
-                "severity": ISSUE_SEVERITY["ServiceWildcard"],
-                "description": RISK_DEFINITION["ServiceWildcard"],
-                "findings": (
-                    self.policy_document.service_wildcard
-                    if ISSUE_SEVERITY["ServiceWildcard"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "CredentialsExposure": {
-                "severity": ISSUE_SEVERITY["CredentialsExposure"],
-                "description": RISK_DEFINITION["CredentialsExposure"],
-                "findings": (
-                    self.policy_document.credentials_exposure
-                    if ISSUE_SEVERITY["CredentialsExposure"] in [x.lower() for x in self.severity] or not self.severity
-                    else []
-                ),
-            },
-            "InfrastructureModification": {
-                "severity": ISSUE_SEVERITY["InfrastructureModification"],
-                "description": RISK_DEFINITION["InfrastructureModification"],
-                "findings": (
-                    self.policy_document.infrastructure_modification
-                    if ISSUE_SEVERITY["InfrastructureModification"] in [x.lower() for x in self.severity]
-                    or not self.severity
-                    else []
-                ),
-            },
+            **self.findings.json_large,
             "is_excluded": self.is_excluded,
         }
@@ -0,0 +1,46 @@
+"""Reverse index of which principals each policy is attached to, built from the iam_data principal JSON.
+
+ManagedPolicy.getAttached and InlinePolicy.getAttached would otherwise loop over every principal for every policy.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+from typing import Any
+
+PRINCIPAL_TYPES = ("roles", "groups", "users")
+POLICY_TYPES = ("inline_policies", "aws_managed_policies", "customer_managed_policies")
+
+# Policy type, like aws_managed_policies -> policy ID -> principal type -> principal names
+PolicyAttachments = dict[str, dict[str, dict[str, list[str]]]]
+
+
+def get_policy_attachments(iam_data: dict[str, dict[Any, Any]]) -> PolicyAttachments:
+    """
+    Build the reverse index in a single pass over the principals.
+
+    :param iam_data: The groups, users, and roles JSON, as passed to set_iam_data
+    :return: The principal names that each policy is attached to, in the same order as iam_data
+    """
+    attachments: PolicyAttachments = {policy_type: {} for policy_type in POLICY_TYPES}
+    for principal_type in PRINCIPAL_TYPES:
+        for principal in iam_data[principal_type].values():
+            for policy_type in POLICY_TYPES:
+                for policy_id in principal[policy_type]:
+                    attached_to = attachments[policy_type].setdefault(
+                        policy_id, {this_principal_type: [] for this_principal_type in PRINCIPAL_TYPES}
+                    )
+                    attached_to[principal_type].append(principal["name"])
+    return attachments
+
+
+def get_attached_principals(policy_attachments: PolicyAttachments, policy_type: str, policy_id: str) -> dict[str, Any]:
+    """Get the principal names that a policy is attached to, in the format used by getAttached"""
+    attached_to = policy_attachments.get(policy_type, {}).get(policy_id)
+    if attached_to is None:
+        return {principal_type: [] for principal_type in PRINCIPAL_TYPES}
+    return {principal_type: list(names) for principal_type, names in attached_to.items()}
@@ -9,15 +9,21 @@ aws iam get-account-authorization-details command."""
 from __future__ import annotations
 
 import logging
+from functools import cached_property
 from typing import Any
 
 from policy_sentry.querying.all import get_all_service_prefixes
 
 from cloudsplaining.scan.statement_detail import StatementDetail
+from cloudsplaining.shared.action_bitset import EMPTY_ACTION_SET, ActionSet, get_action_index
 from cloudsplaining.shared.constants import (
     ACTIONS_THAT_RETURN_CREDENTIALS,
+    ISSUE_SEVERITY,
+    PRIVILEGE_ESCALATION_GLOSSARY_URL,
     PRIVILEGE_ESCALATION_METHODS,
+    PRIVILEGE_ESCALATION_PATHFINDING_PATHS,
     READ_ONLY_DATA_EXFILTRATION_ACTIONS,
+    RISK_DEFINITION,
 )
 from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
 
@@ -50,6 +56,7 @@ class PolicyDocument:
                 "Please supply an Exclusions object and try again."
             )
         self.exclusions = exclusions
+        self._findings: dict[tuple[str, ...], PolicyDocumentFindings] = {}
 
         # leaving here but excluding from tests because IAM Policy grammar dictates that it must be a list
         if not isinstance(statement_structure, list):
@@ -69,58 +76,78 @@ class PolicyDocument:
         """Return the Policy in JSON"""
         return self.policy
 
+    def release_cached_data(self) -> None:
+        """Drop the cached action lists of the statements. The findings and allow/deny bitmaps are kept."""
+        for statement in self.statements:
+            statement.release_cached_data()
+
+    def get_findings(self, severity: list[str] | None = None) -> PolicyDocumentFindings:
+        """Get the findings in every risk category with the severity filter applied. Computed once per severity."""
+        key = tuple(sorted({x.lower() for x in severity})) if severity else ()
+        findings = self._findings.get(key)
+        if findings is None:
+            findings = self._findings[key] = PolicyDocumentFindings(self, list(key))
+        return findings
+
     @property
     def all_allowed_actions(self) -> list[str]:
         """Output all allowed IAM Actions, regardless of resource constraints"""
-        allowed_actions = set()
+        return get_action_index().actions(self._all_allowed_actions_mask)
+
+    @cached_property
+    def _all_allowed_actions_mask(self) -> ActionSet:
+        allowed_actions = EMPTY_ACTION_SET
         for statement in self.statements:
             # if Effect is "Deny" - it is not an allowed action
-            if statement.effect_allow and statement.expanded_actions:
-                allowed_actions.update(statement.expanded_actions)
-        allowed_actions = self.filter_deny_statements(allowed_actions)
-        return list(allowed_actions)
+            if statement.effect_allow:
+                allowed_actions |= statement.expanded_actions_mask
+        return allowed_actions - self._denied_actions_mask
+
+    @cached_property
+    def _denied_actions_mask(self) -> ActionSet:
+        denied_actions = EMPTY_ACTION_SET
+        for statement in self.statements:
+            if statement.effect_deny:
+                denied_actions |= statement.expanded_actions_mask
+        return denied_actions
 
     def filter_deny_statements(self, allowed_actions: set[str]) -> set[str]:
         """
         filter all denied statements from actions
         """
-        for statement in self.statements:
-            if statement.effect_deny and statement.expanded_actions:
-                allowed_actions = allowed_actions.difference(statement.expanded_actions)
-        return allowed_actions
+        action_index = get_action_index()
+        return set(action_index.actions(action_index.mask(allowed_actions) - self._denied_actions_mask))
 
     @property
     def all_allowed_unrestricted_actions(self) -> list[str]:
         """Output all IAM actions that do not practice resource constraints"""
-        allowed_actions = set()
+        return get_action_index().actions(self._all_allowed_unrestricted_actions_mask)
+
+    @cached_property
+    def _all_allowed_unrestricted_actions_mask(self) -> ActionSet:
+        allowed_actions = EMPTY_ACTION_SET
         for statement in self.statements:
-            if (
-                statement.has_resource_wildcard
-                and not statement.has_condition
-                and statement.effect_allow
-                and statement.restrictable_actions
-            ):
-                allowed_actions.update(statement.restrictable_actions)
+            if statement.has_resource_wildcard and not statement.has_condition and statement.effect_allow:
+                allowed_actions |= statement.restrictable_actions_mask
             # Fix Issue #254 - Allow flagging risky actions even when there are resource constraints
             if self.flag_resource_arn_statements and statement.effect_allow:
-                allowed_actions.update(statement.restrictable_actions)
-        allowed_actions = self.filter_deny_statements(allowed_actions)
-        return list(allowed_actions)
+                allowed_actions |= statement.restrictable_actions_mask
+        return allowed_actions - self._denied_actions_mask
 
     @property
     def all_allowed_unrestrictable_actions(self) -> list[str]:
         """Output all IAM actions that cannot be restricted by resource constraints"""
-        allowed_actions = set()
+        return get_action_index().actions(self._all_allowed_unrestrictable_actions_mask)
+
+    @cached_property
+    def _all_allowed_unrestrictable_actions_mask(self) -> ActionSet:
+        allowed_actions = EMPTY_ACTION_SET
         for statement in self.statements:
-            if statement.effect_allow and not statement.has_condition and statement.unrestrictable_actions:
-                allowed_actions.update(statement.unrestrictable_actions)
-            # Fix Issue #254 - Allow flagging risky actions even when there are resource constraints
-            if statement.effect_allow and not statement.has_condition and self.flag_resource_arn_statements:
-                allowed_actions.update(statement.unrestrictable_actions)
-        allowed_actions = self.filter_deny_statements(allowed_actions)
-        return list(allowed_actions)
+            if statement.effect_allow and not statement.has_condition:
+                allowed_actions |= statement.unrestrictable_actions_mask
+        return allowed_actions - self._denied_actions_mask
 
-    @property
+    @cached_property
     def infrastructure_modification(self) -> list[str]:
         """Return a list of modify only missing resource constraints"""
         actions_missing_resource_constraints = []
@@ -146,7 +173,7 @@ class PolicyDocument:
                     )
         return not_action_statements
 
-    @property
+    @cached_property
     def allows_privilege_escalation(self) -> list[dict[str, Any]]:
         """
         Determines whether or not the policy allows privilege escalation action combinations published by
@@ -154,19 +181,15 @@ class PolicyDocument:
         """
         # if severity
         escalations = []
-        all_allowed_unrestricted_actions_lowercase = [
-            x.lower()
-            for actions in (self.all_allowed_unrestricted_actions, self.all_allowed_unrestrictable_actions)
-            for x in actions
-        ]
+        action_index = get_action_index()
+        allowed_actions = self._all_allowed_unrestricted_actions_mask | self._all_allowed_unrestrictable_actions_mask
         for escalation_type, actions in PRIVILEGE_ESCALATION_METHODS.items():
-            if set(actions).issubset(all_allowed_unrestricted_actions_lowercase):
-                # if set(PRIVILEGE_ESCALATION_METHODS[key]).issubset(all_allowed_actions_lowercase):
+            if all(action_index.lookup(allowed_actions, action) for action in actions):
                 escalation = {"type": escalation_type, "actions": actions}
                 escalations.append(escalation)
         return escalations
 
-    @property
+    @cached_property
     def permissions_management_without_constraints(self) -> list[str]:
         """Where applicable, returns a list of 'Permissions management' IAM actions in the statement that
         do not have resource constraints"""
@@ -202,24 +225,23 @@ class PolicyDocument:
         if not isinstance(specific_actions, list):
             raise Exception("Please supply a list of actions.")
 
-        # grab the lowercase representation for unrestricted and unrestrictable actions
-        unrestricted_actions_lower = {a.lower(): a for a in self.all_allowed_unrestricted_actions}
-        unrestrictable_actions_lower = {a.lower(): a for a in self.all_allowed_unrestrictable_actions}
+        action_index = get_action_index()
+        unrestricted_actions = self._all_allowed_unrestricted_actions_mask
+        unrestrictable_actions = self._all_allowed_unrestrictable_actions_mask
 
-        # Doing this for loop so we can get results that use the official CamelCase actions, and
+        # Lookups are case-insensitive, so we can get results that use the official CamelCase actions, and
         # the results don't fail if given lowercase input.
-        # this is less efficient but more accurate and the results are pretty :)
         for specific_action in specific_actions:
-            specific_action_lower = specific_action.lower()
-            if specific_action_lower in unrestricted_actions_lower:
-                allowed.add(unrestricted_actions_lower[specific_action_lower])
-            elif specific_action_lower in unrestrictable_actions_lower:
-                allowed.add(unrestrictable_actions_lower[specific_action_lower])
+            action = action_index.lookup(unrestricted_actions, specific_action) or action_index.lookup(
+                unrestrictable_actions, specific_action
+            )
+            if action:
+                allowed.add(action)
         results = list(allowed)
         results.sort()
         return results
 
-    @property
+    @cached_property
     def allows_data_exfiltration_actions(self) -> list[str]:
         """If any 'Data exfiltration' actions are allowed without resource constraints, return those actions."""
         return [
@@ -228,7 +250,7 @@ class PolicyDocument:
             if action.lower() not in self.exclusions.exclude_actions
         ]
 
-    @property
+    @cached_property
     def credentials_exposure(self) -> list[str]:
         """Determine if the action returns credentials"""
         # https://gist.github.com/kmcquade/33860a617e651104d243c324ddf7992a
@@ -238,7 +260,7 @@ class PolicyDocument:
             if action.lower() not in self.exclusions.exclude_actions
         ]
 
-    @property
+    @cached_property
     def service_wildcard(self) -> list[str]:
         """Determine if the policy gives access to all actions within a service - simple grepping"""
         services = set()
@@ -270,3 +292,92 @@ class PolicyDocument:
                         if this_action == "*":
                             services.add(service)
         return sorted(services)
+
+
+def get_finding_links(findings: list[dict[str, Any]]) -> dict[str, str]:
+    """Get the documentation links for privilege escalation findings, keyed by the escalation type"""
+    links = {}
+    for finding in findings:
+        method = finding["type"]
+        links[method] = PRIVILEGE_ESCALATION_PATHFINDING_PATHS.get(method) or (
+            f"{PRIVILEGE_ESCALATION_GLOSSARY_URL}#{method}"
+        )
+    return links
+
+
+class PolicyDocumentFindings:
+    """
+    The findings of a PolicyDocument in every risk category, with a severity filter applied.
+
+    Get these from PolicyDocument.get_findings, so that the json and json_large outputs of the policies share them.
+    """
+
+    def __init__(self, policy_document: PolicyDocument, severity: list[str] | None = None) -> None:
+        self.policy_document = policy_document
+        self.severity = [x.lower() for x in severity] if severity else []
+
+    def is_enabled(self, risk_type: str) -> bool:
+        """Determine whether the findings for a risk type pass the severity filter"""
+        return not self.severity or ISSUE_SEVERITY[risk_type] in self.severity
+
+    @cached_property
+    def privilege_escalation(self) -> list[dict[str, Any]]:
+        return self.policy_document.allows_privilege_escalation if self.is_enabled("PrivilegeEscalation") else []
+
+    @cached_property
+    def privilege_escalation_links(self) -> dict[str, str]:
+        return get_finding_links(self.privilege_escalation)
+
+    @cached_property
+    def data_exfiltration(self) -> list[str]:
+        return self.policy_document.allows_data_exfiltration_actions if self.is_enabled("DataExfiltration") else []
+
+    @cached_property
+    def resource_exposure(self) -> list[str]:
+        return (
+            self.policy_document.permissions_management_without_constraints
+            if self.is_enabled("ResourceExposure")
+            else []
+        )
+
+    @cached_property
+    def service_wildcard(self) -> list[str]:
+        return self.policy_document.service_wildcard if self.is_enabled("ServiceWildcard") else []
+
+    @cached_property
+    def credentials_exposure(self) -> list[str]:
+        return self.policy_document.credentials_exposure if self.is_enabled("CredentialsExposure") else []
+
+    @cached_property
+    def infrastructure_modification(self) -> list[str]:
+        return self.policy_document.infrastructure_modification if self.is_enabled("InfrastructureModification") else []
+
+    def _risk_json(self, risk_type: str, findings: list[Any]) -> dict[str, Any]:
+        return {
+            "severity": ISSUE_SEVERITY[risk_type],
+            "description": RISK_DEFINITION[risk_type],
+            "findings": findings,
+        }
+
+    @property
+    def json(self) -> dict[str, Any]:
+        """Return the JSON output for high risk actions, as used by the policies' json property"""
+        return {
+            "PrivilegeEscalation": {
+                **self._risk_json("PrivilegeEscalation", self.privilege_escalation),
+                "links": self.privilege_escalation_links,
+            },
+            "DataExfiltration": self._risk_json("DataExfiltration", self.data_exfiltration),
+            "ResourceExposure": self._risk_json("ResourceExposure", self.resource_exposure),
+            "ServiceWildcard": self._risk_json("ServiceWildcard", self.service_wildcard),
+            "CredentialsExposure": self._risk_json("CredentialsExposure", self.credentials_exposure),
+        }
+
+    @property
+    def json_large(self) -> dict[str, Any]:
+        """Return the JSON output including Infra Modification actions, as used by the policies' json_large property"""
+        results = self.json
+        results["InfrastructureModification"] = self._risk_json(
+            "InfrastructureModification", self.infrastructure_modification
+        )
+        return results
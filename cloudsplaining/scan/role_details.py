@@ -28,6 +28,7 @@ from cloudsplaining.shared.utils import (
 
 if TYPE_CHECKING:
     from cloudsplaining.scan.managed_policy_detail import ManagedPolicyDetails
+    from cloudsplaining.scan.policy_attachments import PolicyAttachments
     from cloudsplaining.scan.statement_detail import StatementDetail
 
 logger = logging.getLogger(__name__)
@@ -84,10 +85,12 @@ class RoleDetailList:
                     )
                 )
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for role in self.roles:
-            role.set_iam_data(iam_data)
+            role.set_iam_data(iam_data, policy_attachments)
 
     def get_all_allowed_actions_for_role(self, name: str) -> list[str] | None:
         """Returns a list of all allowed actions by the role across all its policies"""
@@ -135,6 +138,27 @@ class RoleDetailList:
 class RoleDetail:
     """Processes an entry under RoleDetailList"""
 
+    __slots__ = (
+        "arn",
+        "assume_role_policy_document",
+        "attached_managed_policies",
+        "create_date",
+        "flag_conditional_statements",
+        "flag_resource_arn_statements",
+        "flag_trust_policies",
+        "iam_data",
+        "inline_policies",
+        "instance_profile_list",
+        "is_excluded",
+        "path",
+        "role_detail",
+        "role_id",
+        "role_last_used",
+        "role_name",
+        "severity",
+        "tags",
+    )
+
     def __init__(
         self,
         role_detail: dict[str, Any],
@@ -161,7 +185,8 @@ class RoleDetail:
         self.create_date = role_detail.get("CreateDate")
         self.tags = role_detail.get("Tags")
         self.role_last_used = role_detail.get("RoleLastUsed", {}).get("LastUsedDate")
-        self.role_detail = role_detail  # just to reference later in debugging
+        # just to reference later in debugging. AuthorizationDetails drops it in memory-lean mode.
+        self.role_detail: dict[str, Any] | None = role_detail
         if not isinstance(exclusions, Exclusions):
             raise Exception(
                 "The exclusions provided is not an Exclusions type object. "
@@ -232,10 +257,12 @@ class RoleDetail:
                     except NotFoundException as e:
                         utils.print_red(f"\tError in role {self.role_name}: {e}")
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for inline_policy in self.inline_policies:
-            inline_policy.set_iam_data(iam_data)
+            inline_policy.set_iam_data(iam_data, policy_attachments)
 
     def _is_excluded(self, exclusions: Exclusions) -> bool:
         """Determine whether the principal name or principal ID is excluded"""
@@ -3,16 +3,20 @@
 from __future__ import annotations
 
 import logging
-from functools import cached_property
+from functools import cached_property, lru_cache
 from typing import Any
 
 from policy_sentry.analysis.expand import determine_actions_to_expand
-from policy_sentry.querying.actions import (
-    get_actions_matching_arn,
-    remove_actions_not_matching_access_level,
-)
+from policy_sentry.querying.actions import get_actions_matching_arn
 from policy_sentry.querying.all import get_all_actions
 
+from cloudsplaining.scan.statement_expansion import (
+    STATEMENT_EXPANSION_CACHE,
+    StatementExpansion,
+    get_statement_cache_key,
+)
+from cloudsplaining.shared.action_bitset import ActionSet, get_action_index
+from cloudsplaining.shared.action_catalog import classify_actions_by_access_level, get_action_catalog
 from cloudsplaining.shared.exclusions import DEFAULT_EXCLUSIONS, Exclusions
 from cloudsplaining.shared.utils import (
     remove_read_level_actions,
@@ -30,6 +34,12 @@ logging.getLogger("policy_sentry").setLevel(logging.WARNING)
 ALL_ACTIONS = get_all_actions()
 
 
+@lru_cache(maxsize=1024)
+def _get_actions_matching_arn(arn: str) -> tuple[str, ...]:
+    """Cached get_actions_matching_arn, since the same ARN patterns show up in many NotAction statements"""
+    return tuple(get_actions_matching_arn(arn))
+
+
 # pylint: disable=too-many-instance-attributes
 class StatementDetail:
     """
@@ -55,13 +65,85 @@ class StatementDetail:
         self.flag_resource_arn_statements = flag_resource_arn_statements
 
         self.has_resource_wildcard = self._has_resource_wildcard()
-        self.not_action_effective_actions = self._not_action_effective_actions()
         self.not_resource = self._not_resource()
         self.has_condition = self._has_condition()
 
-        self.restrictable_actions = remove_wildcard_only_actions(self.expanded_actions)
-        self.unrestrictable_actions = list(set(self.expanded_actions or []) - set(self.restrictable_actions))
-        self.has_resource_constraints = self._has_resource_constraints()
+    # The action expansion is the expensive part, so it is only computed when a finding asks for it.
+    # Statements in excluded policies, or in findings filtered out by severity, are never expanded.
+    @cached_property
+    def _expansion(self) -> StatementExpansion:
+        """The expansion results, computed on first use. Identical statements share the same results."""
+        return STATEMENT_EXPANSION_CACHE.get(get_statement_cache_key(self.statement), self._expand)
+
+    @cached_property
+    def not_action_effective_actions(self) -> list[str] | None:
+        """If NotAction is used, the actions that the statement effectively applies to"""
+        not_action_effective_actions = self._expansion.not_action_effective_actions
+        return None if not_action_effective_actions is None else list(not_action_effective_actions)
+
+    @cached_property
+    def restrictable_actions(self) -> list[str]:
+        """The expanded actions, minus the wildcard-only actions"""
+        return list(self._expansion.restrictable_actions)
+
+    @cached_property
+    def unrestrictable_actions(self) -> list[str]:
+        """The expanded actions that cannot be restricted to resource ARNs"""
+        return list(self._expansion.unrestrictable_actions)
+
+    @cached_property
+    def _restrictable_actions_by_access_level(self) -> dict[str, list[str]]:
+        """The restrictable actions, grouped by access level, for the access level findings"""
+        return classify_actions_by_access_level(self.restrictable_actions)
+
+    # ActionSets of the lists above, for PolicyDocument's allow/deny algebra
+    @property
+    def expanded_actions_mask(self) -> ActionSet:
+        return self._expansion.expanded_actions_mask
+
+    @property
+    def restrictable_actions_mask(self) -> ActionSet:
+        return self._expansion.restrictable_actions_mask
+
+    @property
+    def unrestrictable_actions_mask(self) -> ActionSet:
+        return self._expansion.unrestrictable_actions_mask
+
+    @cached_property
+    def has_resource_constraints(self) -> bool:
+        """Determine whether or not the statement has resource constraints."""
+        return self._has_resource_constraints()
+
+    def release_cached_data(self) -> None:
+        """Drop this statement's copies of the expanded action lists, which can be large for wildcard statements.
+        They are rebuilt from the shared expansion if they are needed again."""
+        for name in (
+            "_expansion",
+            "_restrictable_actions_by_access_level",
+            "expanded_actions",
+            "not_action_effective_actions",
+            "restrictable_actions",
+            "unrestrictable_actions",
+        ):
+            self.__dict__.pop(name, None)
+
+    def _expand(self) -> StatementExpansion:
+        """Compute the expansion results. Only depends on the Effect, Action, NotAction, and Resource elements."""
+        not_action_effective_actions = self._not_action_effective_actions()
+        if self.actions:
+            expanded_actions: list[str] = determine_actions_to_expand(self.actions)
+            expanded_actions.sort()
+        elif self.not_action:
+            expanded_actions = not_action_effective_actions or []
+        else:
+            raise Exception(  # pragma: no cover
+                "The Policy should include either NotAction or Action in the statement."
+            )
+        return StatementExpansion(
+            expanded_actions=expanded_actions,
+            not_action_effective_actions=not_action_effective_actions,
+            restrictable_actions=remove_wildcard_only_actions(expanded_actions),
+        )
 
     def _actions(self) -> list[str]:
         """Holds the actions in a statement"""
@@ -111,15 +193,13 @@ class StatementDetail:
         if not self.not_action:
             return None
 
-        not_actions_expanded_lowercase = [a.lower() for a in determine_actions_to_expand(self.not_action)]
+        not_actions_expanded_lowercase = {a.lower() for a in determine_actions_to_expand(self.not_action)}
 
         # Effect: Allow && Resource != "*"
         if not self.has_resource_wildcard and self.effect_allow:
             opposite_actions = []
             for arn in self.resources:
-                actions_specific_to_arn = get_actions_matching_arn(arn)
-                if actions_specific_to_arn:
-                    opposite_actions.extend(actions_specific_to_arn)
+                opposite_actions.extend(_get_actions_matching_arn(arn))
 
             effective_actions = [
                 opposite_action
@@ -132,15 +212,13 @@ class StatementDetail:
 
         # Effect: Allow, Resource == "*", and Action == prefix:*
         if self.has_resource_wildcard and self.effect_allow:
-            # Then we calculate the reverse using all_actions
-
-            # If it's in NotActions, then it is not an action we want
-            effective_actions = [
-                action for action in ALL_ACTIONS if action.lower() not in not_actions_expanded_lowercase
-            ]
-
-            effective_actions.sort()
-            return effective_actions
+            # Then we calculate the reverse using all actions. The index is sorted, so the result is too.
+            catalog = get_action_catalog()
+            action_index = get_action_index()
+            not_actions_mask = action_index.mask(
+                catalog[action].action for action in not_actions_expanded_lowercase if action in catalog
+            )
+            return action_index.actions(action_index.all_actions - not_actions_mask)
 
         if self.has_resource_wildcard and self.effect_deny:
             logger.debug("NOTE: Haven't decided if we support Effect Deny here?")
@@ -168,17 +246,7 @@ class StatementDetail:
     @cached_property
     def expanded_actions(self) -> list[str]:
         """Expands the full list of allowed actions from the Policy/"""
-
-        if self.actions:
-            expanded: list[str] = determine_actions_to_expand(self.actions)
-            expanded.sort()
-            return expanded
-        if self.not_action:
-            return self.not_action_effective_actions or []
-
-        raise Exception(  # pragma: no cover
-            "The Policy should include either NotAction or Action in the statement."
-        )
+        return list(self._expansion.expanded_actions)
 
     @property
     def effect_deny(self) -> bool:
@@ -205,7 +273,7 @@ class StatementDetail:
         do not have resource constraints"""
         result = []
         if (not self.has_resource_constraints or self.flag_resource_arn_statements) and not self.has_condition:
-            result = remove_actions_not_matching_access_level(self.restrictable_actions, "Permissions management")
+            result = list(self._restrictable_actions_by_access_level.get("Permissions management", []))
         result.sort()
         return result
 
@@ -215,7 +283,7 @@ class StatementDetail:
         do not have resource constraints"""
         result = []
         if (not self.has_resource_constraints or self.flag_resource_arn_statements) and not self.has_condition:
-            result = remove_actions_not_matching_access_level(self.restrictable_actions, "Write")
+            result = list(self._restrictable_actions_by_access_level.get("Write", []))
         result.sort()
         return result
 
@@ -225,7 +293,7 @@ class StatementDetail:
         do not have resource constraints"""
         result = []
         if not self.has_resource_constraints:
-            result = remove_actions_not_matching_access_level(self.restrictable_actions, "Tagging")
+            result = list(self._restrictable_actions_by_access_level.get("Tagging", []))
         return result
 
     def missing_resource_constraints(self, exclusions: Exclusions = DEFAULT_EXCLUSIONS) -> list[str]:
@@ -0,0 +1,137 @@
+"""Caches the expensive, statement-level action expansion so identical statements are only expanded once per process.
+
+Copy-pasted statements are common across inline policies, groups, and accounts. The expansion results only depend
+on the Effect, Action, NotAction, and Resource elements of a statement, so we key the cache on a hash of those
+elements and share one StatementExpansion object between every StatementDetail with the same content.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from cloudsplaining.shared.action_bitset import get_action_index
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATEMENT_CACHE_SIZE = 2048
+
+
+class StatementExpansion:
+    """The expanded actions of a statement. Shared between statements, so the contents are stored as tuples,
+    along with their ActionSets."""
+
+    __slots__ = (
+        "expanded_actions",
+        "expanded_actions_mask",
+        "not_action_effective_actions",
+        "restrictable_actions",
+        "restrictable_actions_mask",
+        "unrestrictable_actions",
+        "unrestrictable_actions_mask",
+    )
+
+    def __init__(
+        self,
+        expanded_actions: list[str],
+        not_action_effective_actions: list[str] | None,
+        restrictable_actions: list[str],
+    ) -> None:
+        action_index = get_action_index()
+        self.expanded_actions = tuple(expanded_actions)
+        self.not_action_effective_actions = (
+            None if not_action_effective_actions is None else tuple(not_action_effective_actions)
+        )
+        self.restrictable_actions = tuple(restrictable_actions)
+        self.expanded_actions_mask = action_index.mask(self.expanded_actions)
+        self.restrictable_actions_mask = action_index.mask(self.restrictable_actions)
+        # Everything that was expanded, minus the actions that can be restricted to resource ARNs
+        self.unrestrictable_actions_mask = self.expanded_actions_mask - self.restrictable_actions_mask
+        self.unrestrictable_actions = tuple(action_index.actions(self.unrestrictable_actions_mask))
+
+
+class CacheInfo(NamedTuple):
+    """Statistics about the statement expansion cache, in the style of functools.lru_cache"""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def get_statement_cache_key(statement: dict[str, Any]) -> str:
+    """
+    Get a stable hash of the statement elements that the expansion depends on.
+
+    Action, NotAction, and Resource are normalized to sorted lists so that equivalent statements share a key.
+    """
+    canonical = {"Effect": statement.get("Effect")}
+    for element in ("Action", "NotAction", "Resource"):
+        value = statement.get(element)
+        if not value:
+            canonical[element] = []
+        elif isinstance(value, list):
+            canonical[element] = sorted(value, key=str)
+        else:
+            canonical[element] = [value]
+    return sha256(json.dumps(canonical, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class StatementExpansionCache:
+    """A bounded LRU cache of StatementExpansion objects, keyed by get_statement_cache_key"""
+
+    def __init__(self, maxsize: int = DEFAULT_STATEMENT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, StatementExpansion] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, expand: Callable[[], StatementExpansion]) -> StatementExpansion:
+        """Return the cached expansion for the key, calling expand() to compute it on a cache miss."""
+        with self._lock:
+            expansion = self._cache.get(key)
+            if expansion is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return expansion
+            self.misses += 1
+
+        expansion = expand()
+        if self.maxsize <= 0:
+            return expansion
+        with self._lock:
+            self._cache[key] = expansion
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return expansion
+
+    def cache_info(self) -> CacheInfo:
+        """Report the cache statistics"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def cache_clear(self) -> None:
+        """Clear the cache and its statistics"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every StatementDetail in the process, so repeated statements are re-used across policies,
+# principals, and accounts (e.g., by scan_multi_account).
+STATEMENT_EXPANSION_CACHE = StatementExpansionCache()
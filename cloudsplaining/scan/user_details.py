@@ -19,6 +19,7 @@ from cloudsplaining.shared.utils import (
 if TYPE_CHECKING:
     from cloudsplaining.scan.group_details import GroupDetail, GroupDetailList
     from cloudsplaining.scan.managed_policy_detail import ManagedPolicyDetails
+    from cloudsplaining.scan.policy_attachments import PolicyAttachments
     from cloudsplaining.scan.statement_detail import StatementDetail
 
 
@@ -64,10 +65,12 @@ class UserDetailList:
             "roles": {},
         }
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for user in self.users:
-            user.set_iam_data(iam_data)
+            user.set_iam_data(iam_data, policy_attachments)
 
     def get_all_allowed_actions_for_user(self, name: str) -> list[str] | None:
         """Returns a list of all allowed actions by the user across all its policies"""
@@ -117,6 +120,22 @@ class UserDetailList:
 class UserDetail:
     """Processes an entry under UserDetailList"""
 
+    __slots__ = (
+        "arn",
+        "attached_managed_policies",
+        "create_date",
+        "flag_conditional_statements",
+        "flag_resource_arn_statements",
+        "groups",
+        "iam_data",
+        "inline_policies",
+        "is_excluded",
+        "path",
+        "severity",
+        "user_id",
+        "user_name",
+    )
+
     def __init__(
         self,
         user_detail: dict[str, Any],
@@ -202,10 +221,12 @@ class UserDetail:
                     except NotFoundException as e:
                         utils.print_red(f"\tError in user {self.user_name}: {e}")
 
-    def set_iam_data(self, iam_data: dict[str, dict[Any, Any]]) -> None:
+    def set_iam_data(
+        self, iam_data: dict[str, dict[Any, Any]], policy_attachments: PolicyAttachments | None = None
+    ) -> None:
         self.iam_data = iam_data
         for inline_policy in self.inline_policies:
-            inline_policy.set_iam_data(iam_data)
+            inline_policy.set_iam_data(iam_data, policy_attachments)
 
     def _is_excluded(self, exclusions: Exclusions) -> bool:
         """Determine whether the principal name or principal ID is excluded"""
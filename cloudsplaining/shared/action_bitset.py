@@ -0,0 +1,120 @@
+"""Represents sets of IAM actions as integer bitmaps, so PolicyDocument's allow/deny algebra works on machine words
+instead of sets of up to ~15k strings.
+
+Every known IAM action gets a fixed bit position in sorted order. Action strings that are not in the policy_sentry
+database - including known actions spelled with a different case - are kept as strings next to the bitmap, so set
+operations behave exactly like set operations on the original strings, and the index does not grow with every
+unknown action that is scanned.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING
+
+from cloudsplaining.shared.action_catalog import get_action_catalog
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# The bit offsets that are set in each possible byte value
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+class ActionSet:
+    """A set of action strings: a bitmap of the actions in an ActionIndex, and the strings of any other actions"""
+
+    __slots__ = ("extras", "mask")
+
+    def __init__(self, mask: int = 0, extras: frozenset[str] = frozenset()) -> None:
+        self.mask = mask
+        self.extras = extras
+
+    def __or__(self, other: ActionSet) -> ActionSet:
+        return ActionSet(self.mask | other.mask, self.extras | other.extras if other.extras else self.extras)
+
+    def __sub__(self, other: ActionSet) -> ActionSet:
+        return ActionSet(self.mask & ~other.mask, self.extras - other.extras if other.extras else self.extras)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ActionSet) and self.mask == other.mask and self.extras == other.extras
+
+    def __hash__(self) -> int:
+        return hash((self.mask, self.extras))
+
+    def __bool__(self) -> bool:
+        return bool(self.mask or self.extras)
+
+    def __repr__(self) -> str:
+        return f"ActionSet({self.mask:#x}, {set(self.extras) or '{}'})"
+
+
+EMPTY_ACTION_SET = ActionSet()
+
+
+class ActionIndex:
+    """Maps action strings to bit positions and back. The positions are fixed when the index is created."""
+
+    def __init__(self, actions: Iterable[str]) -> None:
+        self._actions: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._positions_by_lowercase: dict[str, list[int]] = {}
+        for action in actions:
+            position = len(self._actions)
+            self._actions.append(action)
+            self._positions[action] = position
+            self._positions_by_lowercase.setdefault(action.lower(), []).append(position)
+        # Every action in the index. For the global index, that is every known action.
+        self.all_actions = ActionSet((1 << len(self._actions)) - 1)
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+    def mask(self, actions: Iterable[str]) -> ActionSet:
+        """Get the ActionSet of a collection of action strings"""
+        positions = []
+        extras = []
+        for action in actions:
+            position = self._positions.get(action)
+            if position is None:
+                extras.append(action)
+            else:
+                positions.append(position)
+        if not positions:
+            return ActionSet(0, frozenset(extras))
+        bits = bytearray((max(positions) >> 3) + 1)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return ActionSet(int.from_bytes(bits, "little"), frozenset(extras))
+
+    def actions(self, action_set: ActionSet) -> list[str]:
+        """Materialize the action strings in an ActionSet. Known actions come first, in sorted order, and then the
+        others, sorted."""
+        names = self._actions
+        results: list[str] = []
+        mask = action_set.mask
+        for byte_index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) >> 3, "little")):
+            if byte:
+                base = byte_index << 3
+                results.extend(names[base + bit] for bit in _BYTE_BITS[byte])
+        results.extend(sorted(action_set.extras))
+        return results
+
+    def lookup(self, action_set: ActionSet, action: str) -> str | None:
+        """Case-insensitive membership test. Returns the matching action string in the ActionSet, if any."""
+        action_lower = action.lower()
+        for position in self._positions_by_lowercase.get(action_lower, ()):
+            if action_set.mask >> position & 1:
+                return self._actions[position]
+        return min((extra for extra in action_set.extras if extra.lower() == action_lower), default=None)
+
+
+@functools.cache
+def get_action_index() -> ActionIndex:
+    """Get the process-wide ActionIndex, seeded with every action in the action catalog."""
+    return ActionIndex(sorted(metadata.action for metadata in get_action_catalog().values()))
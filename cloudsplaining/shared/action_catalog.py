@@ -0,0 +1,119 @@
+"""In-memory catalog of IAM action metadata, built once from the policy_sentry database.
+
+The scan evaluates the same ~15k IAM actions over and over. Querying policy_sentry for each of them
+(via get_action_data or remove_actions_not_matching_access_level) rebuilds the same metadata on every call,
+so we flatten what we need into a single dictionary the first time it is requested.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, NamedTuple
+
+from policy_sentry.querying.all import get_all_service_prefixes
+from policy_sentry.shared.iam_data import get_service_prefix_data
+
+logger = logging.getLogger(__name__)
+
+
+class ActionMetadata(NamedTuple):
+    """The subset of policy_sentry's action data that Cloudsplaining needs"""
+
+    # CamelCase action, like s3:GetObject
+    action: str
+    # CamelCase action without the service prefix, like GetObject
+    action_name: str
+    # Read, List, Write, Tagging, or Permissions management
+    access_level: str
+    # Whether the action can be restricted to resource ARNs (i.e., it is not a wildcard-only action)
+    restrictable: bool
+
+
+def _is_restrictable(service_prefix_data: dict[str, Any], action_data: dict[str, Any]) -> bool:
+    """Mirrors how remove_wildcard_only_actions interpreted the output of policy_sentry's get_action_data:
+    an action is wildcard-only when it has exactly one resource type and that resource type has no ARN format."""
+    resource_types = action_data["resource_types"]
+    if len(resource_types) == 0:
+        return False
+    if len(resource_types) > 1:
+        return True
+    resource_type = next(iter(resource_types))
+    if not resource_type:
+        return False
+    service_resource_data = service_prefix_data["resources"].get(resource_type)
+    if not service_resource_data:
+        return False
+    return bool(service_resource_data.get("arn", "*") != "*")
+
+
+@functools.cache
+def get_action_catalog() -> dict[str, ActionMetadata]:
+    """
+    Get the action catalog, building it on first use.
+
+    :return: A dictionary of lowercase action names (like s3:getobject) to their ActionMetadata
+    """
+    catalog = {}
+    for service_prefix in sorted(get_all_service_prefixes()):
+        service_prefix_data = get_service_prefix_data(service_prefix)
+        if not service_prefix_data:
+            continue  # pragma: no cover
+        prefix = service_prefix_data["prefix"]
+        for action_name, action_data in service_prefix_data["privileges"].items():
+            catalog[f"{prefix}:{action_name.lower()}"] = ActionMetadata(
+                action=f"{prefix}:{action_name}",
+                action_name=action_name,
+                access_level=action_data["access_level"],
+                restrictable=_is_restrictable(service_prefix_data, action_data),
+            )
+    logger.debug("Built the IAM action catalog with %s actions", len(catalog))
+    return catalog
+
+
+def get_action_metadata(action: str) -> ActionMetadata | None:
+    """Get the ActionMetadata for an action, regardless of the case used. Returns None for unknown actions."""
+    return get_action_catalog().get(action.lower())
+
+
+def classify_actions_by_access_level(actions_list: list[str]) -> dict[str, list[str]]:
+    """
+    Partition a list of actions by access level in a single pass over the action catalog.
+
+    :param actions_list: A list of actions. ["*"] means every action in the catalog.
+    :return: A dictionary of access levels to the matching actions, with CamelCase action names. Access levels
+        without any matching actions are left out.
+    """
+    catalog = get_action_catalog()
+    results: dict[str, list[str]] = {}
+    if actions_list == ["*"]:
+        for metadata in catalog.values():
+            results.setdefault(metadata.access_level, []).append(metadata.action)
+        return results
+
+    for action in actions_list:
+        service_prefix, _, action_name = action.partition(":")
+        if not action_name or ":" in action_name:
+            logger.debug("Skipping the malformed action %s", action)
+            continue
+        metadata = catalog.get(action.lower())
+        if metadata:
+            # Keep the service prefix as supplied, the way policy_sentry does
+            results.setdefault(metadata.access_level, []).append(f"{service_prefix}:{metadata.action_name}")
+    return results
+
+
+def remove_actions_not_matching_access_level(actions_list: list[str], access_level: str) -> list[str]:
+    """
+    Drop-in replacement for policy_sentry's function of the same name that reads from the action catalog.
+
+    :param actions_list: A list of actions
+    :param access_level: Read, List, Write, Tagging, or Permissions management
+    :return: The actions matching the access level, with CamelCase action names
+    """
+    return classify_actions_by_access_level(actions_list).get(access_level, [])
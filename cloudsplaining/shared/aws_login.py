@@ -4,33 +4,162 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import TYPE_CHECKING
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, cast
 
 import boto3
+import botocore.session
 from botocore.config import Config
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
+from botocore.loaders import create_loader
+
+from cloudsplaining.shared.rate_limiter import rate_limit_client
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
     from boto3.resources.base import ServiceResource
     from botocore.client import BaseClient
     from types_boto3_sts import STSClient
 
 logger = logging.getLogger(__name__)
 
+# Sessions that have not been used for a while, like those of accounts that were already scanned, are dropped
+MAX_CACHED_SESSIONS = 128
+
+
+class SessionPool:
+    """
+    Shares boto3 sessions, and the clients made from them, between callers.
+
+    Creating a session loads the service models from disk, and every client opens its own HTTP connection pool, which
+    adds up when scanning hundreds of accounts. Sessions are kept by a key like the profile, region, or credentials,
+    and clients by session key, service, region, and connection pool size. Clients are thread-safe; sessions and resources
+    are not, so clients and resources are made under a lock. Every session shares one service model loader. Clients of
+    sessions that the pool did not create are not shared, since the pool cannot tell when those sessions are gone.
+    """
+
+    def __init__(self, maxsize: int = MAX_CACHED_SESSIONS) -> None:
+        self.maxsize = maxsize
+        self._sessions: OrderedDict[Hashable, boto3.Session] = OrderedDict()
+        self._session_keys: weakref.WeakKeyDictionary[boto3.Session, Hashable] = weakref.WeakKeyDictionary()
+        self._clients: dict[tuple[Hashable, str, str, str | None, int | None], BaseClient] = {}
+        self._lock = threading.RLock()
+        self._loader = create_loader()
+
+    def get_session(self, key: Hashable, create: Callable[[botocore.session.Session], boto3.Session]) -> boto3.Session:
+        """
+        Get the session for the key, calling create with a new botocore session if there is none.
+
+        create can make network calls, like AssumeRole, so it runs outside the lock. If two threads create a session
+        for the same key at once, the first one to finish is kept.
+        """
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+        botocore_session = botocore.session.get_session()
+        botocore_session.register_component("data_loader", self._loader)
+        created = create(botocore_session)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+            session = self._sessions[key] = created
+            self._session_keys[session] = key
+            while len(self._sessions) > self.maxsize:
+                evicted_key, evicted = self._sessions.popitem(last=False)
+                self._session_keys.pop(evicted, None)
+                self._clients = {
+                    client_key: client for client_key, client in self._clients.items() if client_key[0] != evicted_key
+                }
+            return session
+
+    def get_client(
+        self,
+        session: boto3.Session,
+        service: str,
+        region: str,
+        endpoint_url: str | None = None,
+        max_pool_connections: int | None = None,
+    ) -> BaseClient:
+        """Get a client from a session. IAM and STS clients share an adaptive rate limiter."""
+        with self._lock:
+            session_key = self._session_keys.get(session)
+            key = (session_key, service, region, endpoint_url, max_pool_connections)
+            client = self._clients.get(key) if session_key is not None else None
+            if client is None:
+                config = Config(connect_timeout=5, retries={"max_attempts": 10, "mode": "standard"})
+                if max_pool_connections:
+                    config = config.merge(Config(max_pool_connections=max_pool_connections))
+                client = session.client(service, region_name=region, config=config, endpoint_url=endpoint_url)
+                rate_limit_client(client)
+                if session_key is not None:
+                    self._clients[key] = client
+            return client
+
+    def get_resource(self, session: boto3.Session, service: str, region: str) -> ServiceResource:
+        """Create a resource from a session. Resources are not thread-safe, so they are not shared."""
+        config = Config(connect_timeout=5, retries={"max_attempts": 10, "mode": "standard"})
+        with self._lock:
+            resource: ServiceResource = session.resource(service, region_name=region, config=config)
+        return resource
+
+    def clear(self) -> None:
+        """Drop every session and client, e.g., after the credentials of a profile changed"""
+        with self._lock:
+            self._sessions.clear()
+            self._session_keys.clear()
+            self._clients.clear()
 
-def get_boto3_client(service: str, profile: str | None = None, region: str = "us-east-1") -> BaseClient:
-    """Get a boto3 client for a given service"""
+
+SESSION_POOL = SessionPool()
+
+
+def get_boto3_session(
+    region_name: str = "us-east-1",
+    profile_name: str | None = None,
+    aws_access_key_id: str | None = None,
+    aws_secret_access_key: str | None = None,
+    aws_session_token: str | None = None,
+) -> boto3.Session:
+    """Get the shared boto3 session for a profile, region, and credentials. Takes the arguments of boto3.Session."""
+    kwargs: dict[str, Any] = {
+        "region_name": region_name,
+        "profile_name": profile_name,
+        "aws_access_key_id": aws_access_key_id,
+        "aws_secret_access_key": aws_secret_access_key,
+        "aws_session_token": aws_session_token,
+    }
+    return SESSION_POOL.get_session(
+        ("session", *kwargs.values()),
+        lambda botocore_session: boto3.Session(**kwargs, botocore_session=botocore_session),
+    )
+
+
+def get_boto3_client(
+    service: str,
+    profile: str | None = None,
+    region: str = "us-east-1",
+    session: boto3.Session | None = None,
+    max_pool_connections: int | None = None,
+) -> BaseClient:
+    """Get a shared boto3 client for a given service. IAM and STS clients share an adaptive rate limiter."""
     logging.getLogger("botocore").setLevel(logging.CRITICAL)
-    session = boto3.Session(region_name=region, profile_name=profile)
-
-    config = Config(connect_timeout=5, retries={"max_attempts": 10})
-    if os.environ.get("LOCALSTACK_ENDPOINT_URL"):
-        client: BaseClient = session.client(
-            service,
-            config=config,
-            endpoint_url=os.environ.get("LOCALSTACK_ENDPOINT_URL"),
-        )
-    else:
-        client = session.client(service, config=config)
+    if session is None:
+        session = get_boto3_session(region_name=region, profile_name=profile)
+
+    client = SESSION_POOL.get_client(
+        session,
+        service,
+        region,
+        endpoint_url=os.environ.get("LOCALSTACK_ENDPOINT_URL") or None,
+        max_pool_connections=max_pool_connections,
+    )
     logger.debug(f"{client.meta.endpoint_url} in {client.meta.region_name}: boto3 client login successful")
     return client
 
@@ -38,11 +167,8 @@ def get_boto3_client(service: str, profile: str | None = None, region: str = "us
 def get_boto3_resource(service: str, profile: str | None = None, region: str = "us-east-1") -> ServiceResource:
     """Get a boto3 resource for a given service"""
     logging.getLogger("botocore").setLevel(logging.CRITICAL)
-    session = boto3.Session(region_name=region, profile_name=profile)
-
-    config = Config(connect_timeout=5, retries={"max_attempts": 10})
-    resource: ServiceResource = session.resource(service, config=config)
-    return resource
+    session = get_boto3_session(region_name=region, profile_name=profile)
+    return SESSION_POOL.get_resource(session, service, region)
 
 
 def get_current_account_id(sts_client: STSClient) -> str:
@@ -61,6 +187,63 @@ def get_available_regions(service: str) -> list[str]:
     return regions
 
 
+class _RefreshableCredentialProvider(CredentialProvider):
+    """Provides credentials that are refreshed by calling the function that loaded them again"""
+
+    def __init__(self, load_metadata: Callable[[], dict[str, str]], method: str) -> None:
+        super().__init__()
+        self.METHOD = method
+        self._load_metadata = load_metadata
+
+    def load(self) -> RefreshableCredentials:
+        return RefreshableCredentials.create_from_metadata(
+            metadata=self._load_metadata(), refresh_using=self._load_metadata, method=self.METHOD
+        )
+
+
+def get_target_account_session(
+    target_account_role_name: str,
+    target_account_id: str,
+    role_session_name: str = "Cloudsplaining",
+    profile: str | None = None,
+) -> boto3.Session:
+    """
+    Get the shared session for a role in a target account.
+
+    The role is assumed once per account, and the session's credentials are refreshed by assuming it again before
+    they expire, so long scans do not fail halfway through.
+
+    :param target_account_role_name: The name of the target account role
+    :param target_account_id: The target account ID
+    :param role_session_name: AssumeRole session name
+    :param profile: The profile to assume the role with
+    """
+    role_arn = f"arn:aws:iam::{target_account_id}:role/{target_account_role_name}"
+
+    def assume_role() -> dict[str, str]:
+        sts_client = cast("STSClient", get_boto3_client("sts", profile=profile))
+        credentials = sts_client.assume_role(RoleArn=role_arn, RoleSessionName=role_session_name)["Credentials"]
+        return {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretAccessKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"].isoformat(),
+        }
+
+    def create(botocore_session: botocore.session.Session) -> boto3.Session:
+        # The only credentials of the session. botocore refreshes them within 15 minutes of the expiry time, whenever
+        # they are used.
+        botocore_session.register_component(
+            "credential_provider", CredentialResolver([_RefreshableCredentialProvider(assume_role, "sts-assume-role")])
+        )
+        session = boto3.Session(region_name="us-east-1", botocore_session=botocore_session)
+        # Assume the role now, outside the pool lock, rather than when the first client is made
+        session.get_credentials()
+        return session
+
+    return SESSION_POOL.get_session(("assume-role", profile, role_arn, role_session_name), create)
+
+
 def get_target_account_credentials(
     target_account_role_name: str,
     target_account_id: str,
@@ -68,7 +251,7 @@ def get_target_account_credentials(
     profile: str | None = None,
 ) -> tuple[str, str, str]:
     """
-    Get a boto3 client for a given AWS service
+    Get credentials for a role in a target account
 
     :param profile:
     :param role_session_name: AssumeRole session name
@@ -76,17 +259,19 @@ def get_target_account_credentials(
     :param target_account_id: The target account ID
     :return:
     """
-    session = boto3.Session(region_name="us-east-1", profile_name=profile)
-    config = Config(connect_timeout=5, retries={"max_attempts": 10})
-    sts_client: STSClient = session.client("sts", config=config)
-
-    acct_b = sts_client.assume_role(
-        RoleArn=f"arn:aws:iam::{target_account_id}:role/{target_account_role_name}",
-        RoleSessionName=role_session_name,
+    session = get_target_account_session(
+        target_account_role_name=target_account_role_name,
+        target_account_id=target_account_id,
+        role_session_name=role_session_name,
+        profile=profile,
+    )
+    # Refreshed first, if they are about to expire
+    credentials = session.get_credentials()
+    if credentials is None:
+        raise Exception(f"Could not get credentials for the {target_account_role_name} role in {target_account_id}")
+    frozen_credentials = credentials.get_frozen_credentials()
+    return (
+        cast("str", frozen_credentials.access_key),
+        cast("str", frozen_credentials.secret_key),
+        cast("str", frozen_credentials.token),
     )
-
-    aws_access_key_id = acct_b["Credentials"]["AccessKeyId"]
-    aws_secret_access_key = acct_b["Credentials"]["SecretAccessKey"]
-    aws_session_token = acct_b["Credentials"]["SessionToken"]
-
-    return aws_access_key_id, aws_secret_access_key, aws_session_token
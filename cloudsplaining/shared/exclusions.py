@@ -7,13 +7,18 @@
 # or https://opensource.org/licenses/BSD-3-Clause
 from __future__ import annotations
 
+import functools
 import logging
 from contextvars import ContextVar
+from typing import TYPE_CHECKING
 
 from cloudsplaining.shared import utils
 from cloudsplaining.shared.constants import DEFAULT_EXCLUSIONS_CONFIG
 from cloudsplaining.shared.validation import check_exclusions_schema
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
 logger = logging.getLogger(__name__)
 
 # Whether exclusion-match messages print to stdout. The CLI turns this on for the duration
@@ -33,6 +38,11 @@ def set_exclusion_output(enabled: bool) -> bool:
     return previous
 
 
+def get_exclusion_output() -> bool:
+    """Whether exclusion-match messages print to stdout, for passing the setting on to worker processes."""
+    return _print_exclusion_matches.get()
+
+
 def _report_exclusion(message: str) -> None:
     """Emit an exclusion-match message: print to stdout (CLI) or logger.debug (library)."""
     if _print_exclusion_matches.get():
@@ -54,6 +64,13 @@ class Exclusions:
         self.groups = self._groups()
         self.policies = self._policies()
         self.known_accounts = self._known_accounts()
+        # Compiled once, since every policy, principal, and candidate action is checked against these
+        self._role_matcher = ExclusionMatcher(self.roles)
+        self._user_matcher = ExclusionMatcher(self.users)
+        self._group_matcher = ExclusionMatcher(self.groups)
+        self._policy_matcher = ExclusionMatcher(self.policies)
+        self._exclude_actions_matcher = ExclusionMatcher(self.exclude_actions)
+        self._include_actions_set = set(self.include_actions)
 
     def _roles(self) -> list[str]:
         provided_roles = self.config.get("roles", [])
@@ -96,7 +113,7 @@ class Exclusions:
 
         :return:
         """
-        if action_in_question.lower() in self.include_actions:
+        if action_in_question.lower() in self._include_actions_set:
             return action_in_question
 
         return False
@@ -108,7 +125,7 @@ class Exclusions:
         :return:
         """
         if self.exclude_actions:
-            return is_name_excluded(action_in_question.lower(), self.exclude_actions)
+            return self._exclude_actions_matcher.is_excluded(action_in_question.lower())
 
         return False  # pragma: no cover
 
@@ -119,7 +136,7 @@ class Exclusions:
         :param policy_name: Policy name or Policy path
         :return:
         """
-        return is_name_excluded(policy_name, self.policies)
+        return self._policy_matcher.is_excluded(policy_name)
 
     def is_principal_excluded(self, principal: str, principal_type: str) -> bool:
         """
@@ -130,11 +147,11 @@ class Exclusions:
         :return: a boolean decision
         """
         if principal_type == "User":
-            return is_name_excluded(principal.lower(), self.users)
+            return self._user_matcher.is_excluded(principal.lower())
         if principal_type == "Group":
-            return is_name_excluded(principal.lower(), self.groups)
+            return self._group_matcher.is_excluded(principal.lower())
         if principal_type == "Role":
-            return is_name_excluded(principal.lower(), self.roles)
+            return self._role_matcher.is_excluded(principal.lower())
 
         raise Exception("Please supply User, Group, or Role as the principal argument.")  # pragma: no cover
 
@@ -149,16 +166,121 @@ class Exclusions:
         for action in requested_actions:
             action_lower = action.lower()
             # ALWAYS INCLUDE ACTIONS
-            if action_lower in self.include_actions:
+            if action_lower in self._include_actions_set:
                 allowed_actions.add(action)
             # RULE OUT EXCLUDED ACTIONS
-            if not is_name_excluded(action_lower, self.exclude_actions):
+            if not self._exclude_actions_matcher.is_excluded(action_lower):
                 allowed_actions.add(action)
 
         return list(allowed_actions)
 
 
-# pylint: disable=inconsistent-return-statements
+# The kinds of exclusion matches, in the order they are checked for a single exclusion
+_EXACT_MATCH = 0
+_PREFIX_MATCH = 1
+_SUFFIX_MATCH = 2
+
+# Bound on the number of decisions each ExclusionMatcher caches
+MAX_CACHED_EXCLUSION_DECISIONS = 65536
+
+
+class _TrieNode:
+    """A node in the prefix or suffix trie of an ExclusionMatcher"""
+
+    __slots__ = ("children", "index")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # Position in the exclusions list of the first exclusion that ends at this node
+        self.index: int | None = None
+
+
+def _insert(root: _TrieNode, key: str, index: int) -> None:
+    node = root
+    for character in key:
+        node = node.children.setdefault(character, _TrieNode())
+    if node.index is None:
+        node.index = index
+
+
+def _first_index(root: _TrieNode, characters: Iterable[str]) -> int | None:
+    """Walk the trie along the characters, returning the earliest exclusion on the path"""
+    node = root
+    first = node.index
+    for character in characters:
+        next_node = node.children.get(character)
+        if next_node is None:
+            break
+        node = next_node
+        if node.index is not None and (first is None or node.index < first):
+            first = node.index
+    return first
+
+
+class ExclusionMatcher:
+    """
+    A list of exclusions, compiled once so names can be checked without looping over every exclusion.
+
+    Exact names go in a set, "foo*" patterns in a prefix trie, and "*foo" patterns in a suffix trie. When several
+    exclusions match a name, the first one in the list is reported, the same as the order they are checked in.
+    """
+
+    def __init__(self, exclusions_list: Iterable[str]) -> None:
+        self.exclusions = [exclusion for exclusion in exclusions_list if exclusion != ""]
+        self._exact: dict[str, int] = {}
+        self._prefixes = _TrieNode()
+        self._suffixes = _TrieNode()
+        self._decisions: dict[str, tuple[int, int] | None] = {}
+        for index, exclusion in enumerate(self.exclusions):
+            self._exact.setdefault(exclusion.lower(), index)
+            # ThePerfectManDoesntExi*
+            if exclusion.endswith("*"):
+                _insert(self._prefixes, exclusion[:-1].lower(), index)
+            if exclusion.startswith("*"):
+                _insert(self._suffixes, exclusion[1:].lower()[::-1], index)
+
+    def _match(self, name: str) -> tuple[int, int] | None:
+        """Get the position of the first matching exclusion and the kind of match, if any"""
+        if name in self._decisions:
+            return self._decisions[name]
+        name_lower = name.lower()
+        candidates = []
+        exact_index = self._exact.get(name_lower)
+        if exact_index is not None:
+            candidates.append((exact_index, _EXACT_MATCH))
+        prefix_index = _first_index(self._prefixes, name_lower)
+        if prefix_index is not None:
+            candidates.append((prefix_index, _PREFIX_MATCH))
+        suffix_index = _first_index(self._suffixes, reversed(name_lower))
+        if suffix_index is not None:
+            candidates.append((suffix_index, _SUFFIX_MATCH))
+        decision = min(candidates) if candidates else None
+        if len(self._decisions) >= MAX_CACHED_EXCLUSION_DECISIONS:
+            self._decisions.clear()
+        self._decisions[name] = decision
+        return decision
+
+    def is_excluded(self, name: str) -> bool:
+        """Determine whether the name matches any of the exclusions"""
+        decision = self._match(name)
+        if decision is None:
+            return False
+        index, kind = decision
+        exclusion = self.exclusions[index]
+        if kind == _EXACT_MATCH:
+            logger.debug(f"\tExcluded: {exclusion}")
+        elif kind == _PREFIX_MATCH:
+            _report_exclusion(f"\tExcluded prefix: {exclusion}")
+        else:
+            _report_exclusion(f"\tExcluded suffix: {exclusion}")
+        return True
+
+
+@functools.lru_cache(maxsize=256)
+def _get_exclusion_matcher(exclusions: tuple[str, ...]) -> ExclusionMatcher:
+    return ExclusionMatcher(exclusions)
+
+
 def is_name_excluded(name: str, exclusions_list: str | list[str]) -> bool:
     """
     :param name: The name of the policy, role, user, or group
@@ -167,27 +289,7 @@ def is_name_excluded(name: str, exclusions_list: str | list[str]) -> bool:
     """
     if isinstance(exclusions_list, str):
         exclusions_list = [exclusions_list]
-
-    for exclusion in exclusions_list:
-        # Skip empty items
-        if exclusion == "":
-            continue
-        if exclusion.lower() == name.lower():
-            logger.debug(f"\tExcluded: {exclusion}")
-            return True
-        # ThePerfectManDoesntExi*
-        if exclusion.endswith("*"):
-            prefix = exclusion[:-1]
-            # print(prefix)
-            if name.lower().startswith(prefix.lower()):
-                _report_exclusion(f"\tExcluded prefix: {exclusion}")
-                return True
-        if exclusion.startswith("*"):
-            suffix = exclusion[1:]
-            if name.lower().endswith(suffix.lower()):
-                _report_exclusion(f"\tExcluded suffix: {exclusion}")
-                return True
-    return False
+    return _get_exclusion_matcher(tuple(exclusions_list)).is_excluded(name)
 
 
 DEFAULT_EXCLUSIONS = Exclusions(DEFAULT_EXCLUSIONS_CONFIG)
@@ -0,0 +1,264 @@
+"""Incremental reader and writer for large JSON files, like the output of the aws iam get-account-authorization-details
+command.
+
+json.loads needs the whole file as one string, and then holds that string and the parsed tree at the same time.
+The reader here walks the top-level object one member at a time, and yields the items of large arrays one by one,
+so only a small window of the raw text is ever held in memory. The writer does the reverse, appending array items to
+the file as they are produced. Files whose name ends in .gz are compressed with gzip.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Literal
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# The arrays in an account authorization details file that hold one item per policy or principal
+AUTHORIZATION_DETAILS_LIST_KEYS = ("UserDetailList", "GroupDetailList", "RoleDetailList", "Policies")
+
+_WHITESPACE = " \t\n\r"
+# The characters that can follow a value
+_VALUE_DELIMITERS = _WHITESPACE + ",]}"
+
+
+class _JsonStream:
+    """A window over a text file that JSON values are decoded from, one at a time"""
+
+    def __init__(self, fp: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read more of the file into the window, dropping the text that was already decoded"""
+        if self.eof:
+            return False
+        if self.position:
+            self.buffer = self.buffer[self.position :]
+            self.position = 0
+        # Read at least as much as is already buffered, so that very large values take a few reads, not many
+        chunk = self.fp.read(max(self.chunk_size, len(self.buffer)))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty string at the end of the file"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position : self.position + 1]
+
+    def expect(self, character: str) -> None:
+        if self.peek() != character:
+            raise json.JSONDecodeError(f"Expecting '{character}'", self.buffer, self.position)
+        self.position += 1
+
+    def decode(self) -> object:
+        """Decode the next value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal that runs to the end of the window might continue in the next read. A number can
+            # also stop short of it, like -1 of a window ending in -1., so it has to be followed by a delimiter.
+            if (
+                not isinstance(value, (str, list, dict))
+                and (end == len(self.buffer) or self.buffer[end] not in _VALUE_DELIMITERS)
+                and self._fill()
+            ):
+                continue
+            self.position = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """Decode the items of an array one by one"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.position += 1
+                continue
+            self.expect("]")
+            return
+
+
+def iter_json_object(
+    fp: IO[str], array_keys: Collection[str] = (), chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """
+    Iterate over the members of a top-level JSON object without loading the whole file.
+
+    :param fp: A text file containing a JSON object
+    :param array_keys: Members whose arrays are yielded as iterators over their items, instead of as lists.
+        Like itertools.groupby, each iterator must be consumed before moving on to the next member.
+    :param chunk_size: How many characters to read at a time
+    :return: (key, value) pairs, in file order
+    """
+    stream = _JsonStream(fp, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.position += 1
+    else:
+        while True:
+            key = stream.decode()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", stream.buffer, stream.position)
+            stream.expect(":")
+            if key in array_keys and stream.peek() == "[":
+                items = stream.iter_array()
+                yield key, items
+                # Skip whatever the caller did not consume
+                for _ in items:
+                    pass
+            else:
+                yield key, stream.decode()
+            if stream.peek() == ",":
+                stream.position += 1
+                continue
+            stream.expect("}")
+            break
+    if stream.peek():
+        raise json.JSONDecodeError("Extra data", stream.buffer, stream.position)
+
+
+def open_json_file(path: str | Path, mode: Literal["r", "w"] = "r") -> IO[str]:
+    """Open a JSON file as text, compressing or decompressing it with gzip if the name ends in .gz"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt" if mode == "r" else "wt", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def write_json_object(
+    fp: IO[str],
+    keys: Collection[str],
+    members: Iterable[tuple[str, Iterable[object]]],
+    indent: int | None = None,
+) -> None:
+    """
+    Write a JSON object whose members are arrays, appending the items as they are produced.
+
+    The output is the same as json.dump(obj, fp, indent=indent, default=str) on the whole object.
+
+    :param fp: A text file to write to
+    :param keys: The members of the object, in order. Keys without any items are written as empty arrays.
+    :param members: (key, items) pairs. The same key can be given several times, but only in the order of keys.
+    :param indent: Like the indent of json.dump
+    """
+    newline = "" if indent is None else "\n"
+    separator = ", " if indent is None else ","
+    member_indent = newline + " " * (indent or 0)
+    item_indent = newline + " " * 2 * (indent or 0)
+    remaining_keys = iter(keys)
+    current_key: str | None = None
+    items_written = 0
+
+    def close_member() -> None:
+        fp.write(f"{member_indent if items_written else ''}]")
+
+    fp.write("{")
+    for key, items in members:
+        while key != current_key:
+            if current_key is not None:
+                close_member()
+                fp.write(separator)
+            next_key = next(remaining_keys, None)
+            if next_key is None:
+                raise ValueError(f"{key} is not one of the remaining keys of the object")
+            current_key = next_key
+            items_written = 0
+            fp.write(f"{member_indent}{json.dumps(current_key)}: [")
+        for item in items:
+            encoded = json.dumps(item, indent=indent, default=str)
+            fp.write(f"{separator if items_written else ''}{item_indent}{encoded.replace(newline, item_indent)}")
+            items_written += 1
+    for key in remaining_keys:
+        if current_key is not None:
+            close_member()
+            fp.write(separator)
+        current_key = key
+        items_written = 0
+        fp.write(f"{member_indent}{json.dumps(current_key)}: [")
+    if current_key is not None:
+        close_member()
+    fp.write(f"{newline}}}" if current_key is not None else "}")
+
+
+def iter_encode_json(
+    value: object, depth: int = 2, indent: int | None = None, sort_keys: bool = False
+) -> Iterator[str]:
+    """
+    Encode a value as JSON in chunks, one per member of its objects down to the given depth.
+
+    Joined, the chunks are the same as json.dumps(value, default=str, indent=indent, sort_keys=sort_keys). Each chunk
+    is still encoded by json.dumps, so this is about as fast, but only one member is held as a string at a time.
+
+    :param depth: How many levels of nested objects are split into their members
+    :param indent: Like the indent of json.dumps
+    :param sort_keys: Like the sort_keys of json.dumps
+    """
+    return _iter_encode_json(value, depth, indent, sort_keys, "\n")
+
+
+def _iter_encode_json(value: object, depth: int, indent: int | None, sort_keys: bool, newline: str) -> Iterator[str]:
+    """Encode a value as JSON in chunks, with newline being the line break and indentation of the value's level"""
+    if depth > 0 and isinstance(value, dict) and value and all(isinstance(key, str) for key in value):
+        members = sorted(value.items()) if sort_keys else value.items()
+        member_newline = "" if indent is None else newline + " " * indent
+        separator = ", " if indent is None else ","
+        yield "{"
+        for index, (key, member) in enumerate(members):
+            yield f"{separator if index else ''}{member_newline}{json.dumps(key)}: "
+            yield from _iter_encode_json(member, depth - 1, indent, sort_keys, member_newline)
+        yield "}" if indent is None else f"{newline}}}"
+    else:
+        encoded = json.dumps(value, default=str, indent=indent, sort_keys=sort_keys)
+        yield encoded if indent is None else encoded.replace("\n", newline)
+
+
+def load_authorization_details_file(path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict[str, Any]:
+    """
+    Load an account authorization details file, decoding its policies and principals item by item.
+    The file can be compressed with gzip, if its name ends in .gz.
+
+    Equivalent to json.loads on the file contents, but the peak memory is bounded by the parsed data rather than
+    the parsed data plus the full text of the file.
+    """
+    auth_json: dict[str, Any] = {}
+    with open_json_file(path) as fp:
+        for key, value in iter_json_object(fp, AUTHORIZATION_DETAILS_LIST_KEYS, chunk_size):
+            if isinstance(value, Iterator):
+                auth_json[key] = list(value)
+                logger.debug("Loaded %s items from %s", len(auth_json[key]), key)
+            else:
+                auth_json[key] = value
+    return auth_json
@@ -0,0 +1,196 @@
+"""Client-side rate limiting for the IAM and STS calls, so that parallel downloads slow down before they throttle.
+
+Every IAM client shares one token bucket, and every STS client another. Each bucket starts at a conservative rate
+and adapts with AIMD: the rate grows additively while calls succeed, and is cut multiplicatively when AWS answers
+with a throttling error. The buckets are attached to clients with botocore event hooks, so every attempt - including
+botocore's own retries - waits for a token.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from botocore.client import BaseClient
+
+logger = logging.getLogger(__name__)
+
+# The services whose clients get a shared rate limiter
+RATE_LIMITED_SERVICES = ("iam", "sts")
+
+# The error codes that mean the caller is sending too many requests
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottledException",
+        "TooManyRequestsException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "SlowDown",
+        "PriorRequestNotComplete",
+    }
+)
+
+DEFAULT_RATE = 10.0
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 100.0
+
+
+class RateLimiterMetrics(NamedTuple):
+    """What an AdaptiveRateLimiter has seen so far"""
+
+    requests: int
+    throttles: int
+    retries: int
+    # The requests per second since the first request
+    requests_per_second: float
+    # The current rate of the token bucket
+    rate: float
+
+
+class AdaptiveRateLimiter:
+    """
+    A thread-safe token bucket with an AIMD rate.
+
+    :param name: What the limiter is for, like a service name, for the logs
+    :param rate: The initial requests per second
+    :param min_rate: The rate never drops below this, however much AWS throttles
+    :param max_rate: The rate never grows past this
+    :param increase: How many requests per second the rate grows by, for every second's worth of successful calls
+    :param decrease: The factor the rate is multiplied by when a call is throttled
+    :param cooldown: Throttles within this many seconds of the last decrease do not decrease the rate again, since
+        they are usually answers to calls that were sent before the decrease
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        rate: float = DEFAULT_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = time.sleep,
+    ) -> None:
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("The rates must satisfy 0 < min_rate <= rate <= max_rate")
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._last_refill = clock()
+        self._last_decrease: float | None = None
+        self._first_request: float | None = None
+        self.requests = 0
+        self.throttles = 0
+        self.retries = 0
+
+    def _refill(self, now: float) -> None:
+        # Up to one second of burst
+        self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Wait for a token"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    if self._first_request is None:
+                        self._first_request = now
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def record_success(self) -> None:
+        """Additive increase: about `increase` requests per second more, per second of successful calls"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def record_throttle(self) -> None:
+        """Multiplicative decrease, and drop the tokens that were saved up"""
+        with self._lock:
+            self.throttles += 1
+            now = self._clock()
+            if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            logger.debug("%s throttled. Lowering the rate to %.2f requests per second", self.name, self.rate)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def metrics(self) -> RateLimiterMetrics:
+        """Get the throttles, retries, and the achieved requests per second"""
+        with self._lock:
+            elapsed = 0.0 if self._first_request is None else self._clock() - self._first_request
+            requests_per_second = self.requests / elapsed if elapsed > 0 else float(self.requests)
+            return RateLimiterMetrics(self.requests, self.throttles, self.retries, requests_per_second, self.rate)
+
+    def _before_send(self, **_: object) -> None:
+        self.acquire()
+
+    def _needs_retry(
+        self,
+        response: tuple[object, dict[str, Any]] | None = None,
+        attempts: int = 1,
+        caught_exception: Exception | None = None,
+        **_: object,
+    ) -> None:
+        if attempts > 1:
+            self.record_retry()
+        error_code = None if response is None else response[1].get("Error", {}).get("Code")
+        if error_code in THROTTLING_ERROR_CODES:
+            self.record_throttle()
+        elif error_code is None and caught_exception is None:
+            self.record_success()
+
+    def attach(self, client: BaseClient) -> BaseClient:
+        """Make every request the client sends, including retries, go through this rate limiter"""
+        events = client.meta.events
+        # First, so that handlers that answer the request themselves - like test stubs - do not skip them
+        events.register_first("before-send", self._before_send, unique_id=f"rate-limiter-{id(self)}-before-send")
+        events.register_first("needs-retry", self._needs_retry, unique_id=f"rate-limiter-{id(self)}-needs-retry")
+        return client
+
+
+@functools.cache
+def get_rate_limiter(service: str) -> AdaptiveRateLimiter:
+    """Get the process-wide rate limiter for a service"""
+    return AdaptiveRateLimiter(service)
+
+
+def rate_limit_client(client: BaseClient) -> BaseClient:
+    """Attach the shared rate limiter of the client's service, if it is one of RATE_LIMITED_SERVICES"""
+    service = client.meta.service_model.service_name
+    if service in RATE_LIMITED_SERVICES:
+        get_rate_limiter(service).attach(client)
+    return client
@@ -0,0 +1,134 @@
+"""Uploads reports to S3 in the background, so that scan_multi_account can analyze the next account meanwhile.
+
+The reports are mostly text, including the JS bundles that every HTML report embeds, so they can be gzip-encoded with
+Content-Encoding: gzip; browsers decompress them transparently. Large bodies are sent as multipart uploads, and
+bodies that are produced in chunks, like a streamed HTML report, are compressed, if enabled, and uploaded part by part
+as they are produced.
+"""
+
+# Copyright (c) 2020, salesforce.com, inc.
+# All rights reserved.
+# Licensed under the BSD 3-Clause license.
+# For full license text, see the LICENSE file in the repo root
+# or https://opensource.org/licenses/BSD-3-Clause
+from __future__ import annotations
+
+import gzip
+import io
+import logging
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING
+
+from boto3.s3.transfer import TransferConfig
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from types_boto3_s3 import S3Client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_WORKERS = 4
+# Bodies larger than this, after compression, are sent in parts of this size
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+# The wbits of zlib for a gzip header and trailer
+_GZIP_WBITS = 31
+
+
+class _ChunkReader(io.RawIOBase):
+    """A non-seekable binary file over chunks of text, which are encoded, and optionally compressed, as they are read"""
+
+    def __init__(self, chunks: Iterable[str], compress: bool) -> None:
+        self._chunks = iter(chunks)
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, _GZIP_WBITS) if compress else None
+        self._buffer = bytearray()
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # ty: ignore[invalid-method-override]
+        while not self._buffer and not self._exhausted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                if self._compressor is not None:
+                    self._buffer += self._compressor.flush()
+            elif self._compressor is not None:
+                self._buffer += self._compressor.compress(chunk.encode("utf-8"))
+            else:
+                self._buffer += chunk.encode("utf-8")
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+
+class ReportUploader:
+    """
+    Uploads files to an S3 bucket from a thread pool.
+
+    :param s3_client: An S3 client, which can be shared, since clients are thread-safe
+    :param bucket: The bucket to upload to
+    :param compress: gzip the bodies, and set Content-Encoding: gzip
+    :param max_workers: How many files are uploaded at once
+    :param multipart_threshold: Use a multipart upload for bodies larger than this many bytes
+    :param multipart_chunk_size: The size of each part of a multipart upload. S3 needs at least 5 MiB.
+    """
+
+    def __init__(
+        self,
+        s3_client: S3Client,
+        bucket: str,
+        compress: bool = False,
+        max_workers: int = DEFAULT_UPLOAD_WORKERS,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        multipart_chunk_size: int = DEFAULT_MULTIPART_CHUNK_SIZE,
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.compress = compress
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=max_workers,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-upload")
+
+    def upload(self, key: str, body: str | bytes, content_type: str) -> Future[str]:
+        """Start uploading a body. The future resolves to the S3 URI of the object once it is uploaded."""
+        return self._executor.submit(self._upload, key, body, content_type)
+
+    def upload_stream(self, key: str, chunks: Iterable[str], content_type: str) -> Future[str]:
+        """
+        Start uploading a body that is produced in chunks, like HTMLReport.iter_html_report(). The chunks are consumed
+        in an upload thread, so only about one multipart chunk per worker is held in memory at a time.
+        """
+        return self._executor.submit(self._upload_stream, key, chunks, content_type)
+
+    def _upload(self, key: str, body: str | bytes, content_type: str) -> str:
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        if self.compress:
+            data = gzip.compress(data, compresslevel=6)
+        self._upload_fileobj(key, io.BytesIO(data), content_type)
+        logger.debug("Uploaded %s bytes to s3://%s/%s", len(data), self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+
+    def _upload_stream(self, key: str, chunks: Iterable[str], content_type: str) -> str:
+        # Buffered, since the transfer manager expects every read to return as much as it asked for
+        self._upload_fileobj(key, io.BufferedReader(_ChunkReader(chunks, self.compress)), content_type)
+        logger.debug("Uploaded a stream to s3://%s/%s", self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+
+    def _upload_fileobj(self, key: str, fileobj: IO[bytes], content_type: str) -> None:
+        extra_args = {"ACL": "bucket-owner-full-control", "ContentType": content_type}
+        if self.compress:
+            extra_args["ContentEncoding"] = "gzip"
+        # upload_fileobj switches to a multipart upload above the threshold
+        self.s3_client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=extra_args, Config=self.transfer_config)
+
+    def close(self) -> None:
+        """Wait for the uploads that were started"""
+        self._executor.shutdown(wait=True)
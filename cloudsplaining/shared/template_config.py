@@ -3,6 +3,8 @@
 import json
 from pathlib import Path
 
+from cloudsplaining.shared.utils import read_text_cached
+
 
 class TemplateConfig:
     """Detects and processes custom guidance and appendices files"""
@@ -31,7 +33,8 @@ class TemplateConfig:
             return "default"
 
         try:
-            content = file_path.read_text(encoding="utf-8").strip()
+            # Cached until the file changes, since every report in a run reads the same files
+            content = read_text_cached(file_path).strip()
             if content:
                 json_str = json.dumps(content)
                 return json_str[1:-1]
@@ -8,6 +8,7 @@
 from __future__ import annotations
 
 import contextlib
+import functools
 import json
 import logging
 from hashlib import sha256
@@ -15,13 +16,14 @@ from pathlib import Path
 from typing import Any
 
 import yaml
-from policy_sentry.querying.actions import (
-    get_action_data,
-    remove_actions_not_matching_access_level,
-)
 from policy_sentry.querying.all import get_all_service_prefixes
 from policy_sentry.util.arns import get_account_from_arn
 
+from cloudsplaining.shared.action_catalog import (
+    classify_actions_by_access_level,
+    get_action_catalog,
+)
+
 all_service_prefixes = get_all_service_prefixes()
 logger = logging.getLogger(__name__)
 OK_GREEN = "\033[92m"
@@ -37,24 +39,16 @@ def remove_wildcard_only_actions(actions_list: list[str]) -> list[str]:
     except TypeError as t_e:  # pragma: no cover
         print(t_e)
         return []
+    catalog = get_action_catalog()
     results = []
     for action in actions_list_unique:
         service_prefix, action_name = action.split(":")
         if service_prefix not in all_service_prefixes:
             continue  # pragma: no cover
-        action_data = get_action_data(service_prefix, action_name)
-        if action_data:
-            service_data_len = len(action_data.get(service_prefix, []))
-            if service_data_len == 0:
-                pass  # pragma: no cover
-            elif service_data_len == 1:
-                if action_data[service_prefix][0]["resource_arn_format"] == "*":
-                    pass
-                else:
-                    # Let's return the CamelCase action name format
-                    results.append(action_data[service_prefix][0]["action"])
-            else:
-                results.append(action_data[service_prefix][0]["action"])
+        action_data = catalog.get(f"{service_prefix}:{action_name.lower()}")
+        if action_data and action_data.restrictable:
+            # Let's return the CamelCase action name format
+            results.append(action_data.action)
     return results
 
 
@@ -62,10 +56,12 @@ def remove_read_level_actions(actions_list: list[str]) -> list[str]:
     """Given a set of actions, return that list of actions,
     but only with actions at the 'Write', 'Tagging', or 'Permissions management' levels
     """
-    modify_actions: list[str] = remove_actions_not_matching_access_level(actions_list, "Write")
-    modify_actions.extend(remove_actions_not_matching_access_level(actions_list, "Permissions management"))
-    modify_actions.extend(remove_actions_not_matching_access_level(actions_list, "Tagging"))
-    return modify_actions
+    actions_by_access_level = classify_actions_by_access_level(actions_list)
+    return [
+        *actions_by_access_level.get("Write", []),
+        *actions_by_access_level.get("Permissions management", []),
+        *actions_by_access_level.get("Tagging", []),
+    ]
 
 
 def get_full_policy_path(arn: str) -> str:
@@ -132,6 +128,18 @@ def write_results_data_file(results: dict[str, dict[str, Any]], raw_data_file: P
     return raw_data_file
 
 
+def read_text_cached(path: str | Path) -> str:
+    """Read a UTF-8 text file, re-using the last contents read as long as the file's mtime and size are unchanged"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return _read_text(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_text(path: Path, mtime_ns: int, size: int) -> str:  # noqa: ARG001
+    return path.read_text(encoding="utf-8")
+
+
 def read_yaml_file(filename: str) -> dict[str, Any]:
     """Reads a YAML file, safe loads, and returns the dictionary"""
     cfg: dict[str, Any] = yaml.safe_load(Path(filename).read_text(encoding="utf-8"))
@@ -0,0 +1,71 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import boto3
+from click.testing import CliRunner
+from moto import mock_aws
+
+from cloudsplaining.command.download import download, get_account_authorization_details
+from cloudsplaining.shared.json_stream import load_authorization_details_file
+from cloudsplaining.shared.validation import check_authorization_details_schema
+
+
+class DownloadTestCase(unittest.TestCase):
+    @mock_aws
+    def test_get_account_authorization_details(self):
+        """command.download.get_account_authorization_details: the filters are merged in a fixed order"""
+        iam_client = boto3.client("iam", region_name="us-east-1")
+        policy_document = json.dumps(
+            {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}]}
+        )
+        trust_policy = json.dumps(
+            {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {"Effect": "Allow", "Principal": {"Service": "ec2.amazonaws.com"}, "Action": "sts:AssumeRole"}
+                ],
+            }
+        )
+        attached_policy_arn = iam_client.create_policy(PolicyName="Attached", PolicyDocument=policy_document)["Policy"][
+            "Arn"
+        ]
+        iam_client.create_policy(PolicyName="Unattached", PolicyDocument=policy_document)
+        for name in ("alice", "bob"):
+            iam_client.create_user(UserName=name)
+        iam_client.attach_user_policy(UserName="alice", PolicyArn=attached_policy_arn)
+        iam_client.create_group(GroupName="admins")
+        iam_client.create_role(RoleName="app", AssumeRolePolicyDocument=trust_policy)
+
+        results = get_account_authorization_details({"region_name": "us-east-1"}, False)
+
+        self.assertListEqual(list(results), ["UserDetailList", "GroupDetailList", "RoleDetailList", "Policies"])
+        self.assertListEqual([user["UserName"] for user in results["UserDetailList"]], ["alice", "bob"])
+        self.assertListEqual([group["GroupName"] for group in results["GroupDetailList"]], ["admins"])
+        self.assertListEqual([role["RoleName"] for role in results["RoleDetailList"]], ["app"])
+        # Only the policies that are attached to a principal are kept
+        self.assertListEqual([policy["Arn"] for policy in results["Policies"]], [attached_policy_arn])
+
+    @mock_aws
+    def test_download_compressed_file_with_click(self):
+        """command.download: the streamed, compressed file has the same contents and can be scanned"""
+        iam_client = boto3.client("iam", region_name="us-east-1")
+        for name in ("alice", "bob"):
+            iam_client.create_user(UserName=name)
+        iam_client.create_group(GroupName="admins")
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        response = CliRunner().invoke(cli=download, args=["--output", temp_dir, "--compact", "--gzip"])
+
+        self.assertEqual(response.exit_code, 0)
+        output_file = Path(temp_dir) / "default.json.gz"
+        self.assertIn(f"Saved results to {output_file}", response.output)
+        downloaded = load_authorization_details_file(output_file)
+        self.assertTrue(check_authorization_details_schema(downloaded))
+        self.assertEqual(
+            json.loads(json.dumps(downloaded)),
+            json.loads(json.dumps(get_account_authorization_details({"region_name": "us-east-1"}, False), default=str)),
+        )
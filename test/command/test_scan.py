@@ -1,6 +1,11 @@
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
 import shlex
+from pathlib import Path
 from click.testing import CliRunner
 from cloudsplaining.command.scan import scan
 
@@ -21,3 +26,66 @@ class ScanClickUnitTests(unittest.TestCase):
         response = self.runner.invoke(cli=scan, args=args)
         # print(response.output)
         self.assertTrue(response.exit_code == 0)
+
+    def test_scan_directory_with_workers(self):
+        """cloudsplaining.command.scan: each file in a directory is scanned once, and failures are summarized"""
+        examples_directory = Path(__file__).parents[2] / "examples"
+        input_directory = Path(tempfile.mkdtemp())
+        output_directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, input_directory)
+        self.addCleanup(shutil.rmtree, output_directory)
+        shutil.copy(examples_directory / "files" / "example.json", input_directory / "account-a.json")
+        shutil.copy(examples_directory / "files" / "example.json", input_directory / "account-b.json")
+        (input_directory / "not-authorization-details.json").write_text('{"UserDetailList": "x"}')
+        (input_directory / "truncated.json").write_text('{"UserDetailList": [')
+
+        args = ["--input-file", str(input_directory), "--output", str(output_directory), "--skip-open-report", "-m"]
+        response = self.runner.invoke(cli=scan, args=[*args, "--workers", "2"])
+
+        self.assertEqual(response.exit_code, 1)
+        self.assertIn("Scanned 2 of 4 files (1 skipped, 1 failed)", response.output)
+        self.assertIn("truncated.json", response.output)
+        self.assertEqual(
+            sorted(file.name for file in output_directory.iterdir()),
+            [
+                "iam-findings-account-a.json",
+                "iam-findings-account-b.json",
+                "iam-report-account-a.html",
+                "iam-report-account-b.html",
+                "iam-results-account-a.json",
+                "iam-results-account-b.json",
+            ],
+        )
+
+    def test_scan_directory_with_workers_prints_exclusions(self):
+        """cloudsplaining.command.scan: the workers print the exclusion matches, like a scan without workers"""
+        examples_directory = Path(__file__).parents[2] / "examples"
+        input_directory = Path(tempfile.mkdtemp())
+        output_directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, input_directory)
+        self.addCleanup(shutil.rmtree, output_directory)
+        shutil.copy(examples_directory / "files" / "example.json", input_directory / "account-a.json")
+        shutil.copy(examples_directory / "files" / "example.json", input_directory / "account-b.json")
+        # Spawned workers do not inherit the settings of the CLI, unlike forked ones
+        code = (
+            "import multiprocessing, sys; from cloudsplaining.bin.cli import cloudsplaining; "
+            "multiprocessing.set_start_method('spawn'); cloudsplaining(sys.argv[1:])"
+        )
+        args = [
+            "scan",
+            "--input-file",
+            str(input_directory),
+            "--exclusions-file",
+            str(examples_directory / "example-exclusions.yml"),
+            "--output",
+            str(output_directory),
+            "--skip-open-report",
+            "--workers",
+            "2",
+        ]
+
+        response = subprocess.run([sys.executable, "-c", code, *args], capture_output=True, text=True, check=False)
+
+        self.assertEqual(response.returncode, 0, response.stderr)
+        self.assertIn("Scanned 2 of 2 files (0 skipped, 0 failed)", response.stdout)
+        self.assertIn("Excluded prefix: /aws-service-role*", response.stdout)
@@ -1,11 +1,15 @@
+import gzip
+import json
 import shutil
 import tempfile
 import unittest
 from pathlib import Path
 
+import boto3
 from click.testing import CliRunner
 from moto import mock_aws
 
+from cloudsplaining.bin.cli import cloudsplaining
 from cloudsplaining.command.scan_multi_account import scan_multi_account
 
 
@@ -35,3 +39,169 @@ class ScanClickUnitTests(unittest.TestCase):
         self.assertEqual(len(list(Path(self.temp_dir).glob("*.html"))), 3)
         self.assertEqual(response.output.count("Scanning account"), 3)
         self.assertEqual(response.output.count("Saved the HTML report to"), 3)
+
+    @mock_aws
+    def test_scan_accounts_prints_exclusions_with_click(self):
+        # given
+        examples_directory = Path(__file__).parents[2] / "examples"
+        config_file = examples_directory / "files/accounts.yaml"
+        boto3.client("iam", region_name="us-east-1").create_role(
+            RoleName="excluded-role", AssumeRolePolicyDocument=json.dumps({"Version": "2012-10-17", "Statement": []})
+        )
+        exclusions_file = Path(self.temp_dir) / "exclusions.yml"
+        exclusions_file.write_text("roles:\n  - excluded-*\n")
+
+        args = [
+            "scan-multi-account",
+            "--config",
+            config_file,
+            "--role-name",
+            "example-role",
+            "--exclusions-file",
+            exclusions_file,
+            "--output-directory",
+            self.temp_dir,
+            "--io-workers",
+            "2",
+        ]
+
+        # when
+        response = self.runner.invoke(cli=cloudsplaining, args=args)
+
+        # then
+        self.assertTrue(response.exit_code == 0)
+        # The accounts are scanned in threads, which still print the exclusion matches of the CLI
+        self.assertIn("Excluded prefix: excluded-*", response.output)
+
+    @mock_aws
+    def test_scan_accounts_concurrently_with_click(self):
+        # given
+        examples_directory = Path(__file__).parents[2] / "examples"
+        config_file = examples_directory / "files/accounts.yaml"
+
+        args = [
+            "--config",
+            config_file,
+            "--role-name",
+            "example-role",
+            "--output-directory",
+            self.temp_dir,
+            "--write-data-file",
+            "--io-workers",
+            "3",
+            "--analysis-workers",
+            "2",
+        ]
+
+        # when
+        response = self.runner.invoke(cli=scan_multi_account, args=args)
+
+        # then
+        self.assertTrue(response.exit_code == 0)
+
+        # Reported in the order of the config file, whichever account finished first
+        saved = [line for line in response.output.splitlines() if "Saved the HTML report to" in line]
+        self.assertEqual(
+            [Path(line.split(": ", 1)[1].split("\033")[0]).name for line in saved],
+            ["default_account.html", "prod.html", "test.html"],
+        )
+        self.assertEqual(len(list(Path(self.temp_dir).glob("*.json"))), 3)
+
+    @mock_aws
+    def test_scan_accounts_to_bucket_with_click(self):
+        # given
+        examples_directory = Path(__file__).parents[2] / "examples"
+        config_file = examples_directory / "files/accounts.yaml"
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="reports")
+
+        args = ["--config", config_file, "--role-name", "example-role", "--output-bucket", "reports", "-w"]
+
+        # when
+        response = self.runner.invoke(cli=scan_multi_account, args=args)
+
+        # then
+        self.assertTrue(response.exit_code == 0)
+        self.assertEqual(response.output.count("Saved the HTML report to: s3://reports/"), 3)
+        keys = sorted(item["Key"] for item in s3_client.list_objects_v2(Bucket="reports")["Contents"])
+        self.assertEqual(
+            keys,
+            [f"{name}.{extension}" for name in ("default_account", "prod", "test") for extension in ("html", "json")],
+        )
+        data = s3_client.get_object(Bucket="reports", Key="prod.json")
+        self.assertNotIn("ContentEncoding", data)
+        self.assertIn("roles", json.loads(data["Body"].read()))
+
+    @mock_aws
+    def test_scan_accounts_to_bucket_compressed_with_click(self):
+        # given
+        examples_directory = Path(__file__).parents[2] / "examples"
+        config_file = examples_directory / "files/accounts.yaml"
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="reports")
+
+        args = [
+            "--config",
+            config_file,
+            "--role-name",
+            "example-role",
+            "--output-bucket",
+            "reports",
+            "-w",
+            "--compress-uploads",
+        ]
+
+        # when
+        response = self.runner.invoke(cli=scan_multi_account, args=args)
+
+        # then
+        self.assertTrue(response.exit_code == 0)
+        report = s3_client.get_object(Bucket="reports", Key="prod.json")
+        self.assertEqual(report["ContentEncoding"], "gzip")
+        self.assertIn("roles", json.loads(gzip.decompress(report["Body"].read())))
+
+    @mock_aws
+    def test_scan_accounts_with_split_report(self):
+        # given
+        examples_directory = Path(__file__).parents[2] / "examples"
+        config_file = examples_directory / "files/accounts.yaml"
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="reports")
+
+        args = [
+            "--config",
+            config_file,
+            "--role-name",
+            "example-role",
+            "--output-directory",
+            self.temp_dir,
+            "--output-bucket",
+            "reports",
+            "--split-report",
+        ]
+
+        # when
+        response = self.runner.invoke(cli=scan_multi_account, args=args)
+
+        # then
+        self.assertTrue(response.exit_code == 0)
+        output_directory = Path(self.temp_dir)
+        assets = sorted(path.name for path in (output_directory / "assets").iterdir())
+        self.assertIn("index.js", assets)
+        report = (output_directory / "prod.html").read_text(encoding="utf-8")
+        self.assertIn('<script type="text/javascript" src="prod.data.js"></script>', report)
+        self.assertIn('<script type="text/javascript" src="assets/index.js"></script>', report)
+        self.assertNotIn("var iam_data", report)
+        data = (output_directory / "prod.data.js").read_text(encoding="utf-8")
+        self.assertIn("roles", json.loads(data.removeprefix("var iam_data = ")))
+
+        keys = sorted(item["Key"] for item in s3_client.list_objects_v2(Bucket="reports")["Contents"])
+        self.assertEqual(
+            keys,
+            [f"assets/{name}" for name in assets]
+            + [
+                f"{name}.{extension}"
+                for name in ("default_account", "prod", "test")
+                for extension in ("data.js", "html")
+            ],
+        )
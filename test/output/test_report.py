@@ -0,0 +1,105 @@
+import base64
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+from cloudsplaining.output.report import HTMLReport, ReportRenderer, get_report_renderer
+
+example_results_file = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        os.path.pardir,
+        os.path.pardir,
+        "examples",
+        "files",
+        "iam-results-example.json",
+    )
+)
+
+
+class TestReportRenderer(unittest.TestCase):
+    def test_reports_share_the_compiled_template(self):
+        renderer = get_report_renderer()
+        template = renderer.template
+        first = HTMLReport("123456789012", "first", {"groups": {}}, minimize=True).get_html_report()
+        second = HTMLReport("210987654321", "second", {"groups": {}}, minimize=True).get_html_report()
+        self.assertIn("123456789012", first)
+        self.assertIn("210987654321", second)
+        self.assertIs(get_report_renderer(), renderer)
+        self.assertIs(renderer.template, template)
+
+    def test_script_is_reloaded_when_the_bundle_changes(self):
+        renderer = ReportRenderer()
+        with tempfile.TemporaryDirectory() as tmp:
+            bundle_path = Path(tmp) / "index.js"
+            bundle_path.write_text("var version = 1;", encoding="utf-8")
+            script = renderer.script(bundle_path)
+            self.assertIn("var version = 1;", script)
+            self.assertIs(renderer.script(bundle_path), script)
+
+            bundle_path.write_text("var version = 2;", encoding="utf-8")
+            stat = bundle_path.stat()
+            os.utime(bundle_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertIn("var version = 2;", renderer.script(bundle_path))
+
+
+class TestHTMLReportStreaming(unittest.TestCase):
+    def test_streamed_report_matches_rendered_report(self):
+        with open(example_results_file) as f:
+            results = json.load(f)
+        html_report = HTMLReport("123456789012", "example", results, minimize=True)
+        rendered = html_report.get_html_report()
+        self.assertIn(f"var iam_data = {json.dumps(results)}", rendered)
+        self.assertEqual(html_report.results, f"var iam_data = {json.dumps(results)}")
+
+        chunks = list(html_report.iter_html_report())
+        self.assertEqual("".join(chunks), rendered)
+        # The results are encoded in pieces, at least one per policy, not as one string
+        self.assertGreater(len(chunks), len(results["aws_managed_policies"]))
+        self.assertLess(max(len(chunk) for chunk in chunks), len(json.dumps(results)))
+
+        fp = io.StringIO()
+        html_report.write_html_report(fp)
+        self.assertEqual(fp.getvalue(), rendered)
+
+    def test_split_report_references_assets_and_data_file(self):
+        results = {"roles": {"example": {"name": "example"}}}
+        html_report = HTMLReport("123456789012", "my account", results, split=True)
+        rendered = html_report.get_html_report()
+        self.assertIn('<script type="text/javascript" src="my%20account.data.js"></script>', rendered)
+        self.assertIn('<script type="text/javascript" src="assets/index.js"></script>', rendered)
+        self.assertIn('<script type="text/javascript" src="assets/chunk-vendors.js"></script>', rendered)
+        self.assertNotIn("var iam_data", rendered)
+        # The data file is loaded before the script that reads iam_data
+        self.assertLess(rendered.index("my%20account.data.js"), rendered.index("Object.keys(iam_data)"))
+
+        self.assertEqual(html_report.data_file_name, "my account.data.js")
+        fp = io.StringIO()
+        html_report.write_data_file(fp)
+        self.assertEqual(fp.getvalue(), f"var iam_data = {json.dumps(results)}")
+
+
+class TestCompressedResults(unittest.TestCase):
+    def test_compressed_results_decompress_to_the_results(self):
+        with open(example_results_file) as f:
+            results = json.load(f)
+        decompress = {"gzip": gzip.decompress, "deflate": zlib.decompress}
+        for compression in ("gzip", "deflate"):
+            html_report = HTMLReport("123456789012", "example", results, minimize=True, compression=compression)
+            statement = html_report.results
+            prefix = f'var iam_data = {{}};\n    var iam_data_compressed = {{"encoding": "{compression}", "data": "'
+            self.assertTrue(statement.startswith(prefix))
+            self.assertTrue(statement.endswith('"}'))
+            payload = base64.b64decode(statement[len(prefix) : -2], validate=True)
+            self.assertEqual(json.loads(decompress[compression](payload)), results)
+            self.assertLess(len(statement), len(json.dumps(results)) / 2)
+            self.assertIn(statement, html_report.get_html_report())
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            HTMLReport("123456789012", "example", {}, compression="brotli")
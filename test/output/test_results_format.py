@@ -0,0 +1,59 @@
+import json
+import os
+import unittest
+
+from cloudsplaining.output.results_format import NORMALIZED_RESULTS_FORMAT_VERSION, normalize_results
+from cloudsplaining.scan.authorization_details import AuthorizationDetails
+from cloudsplaining.shared.constants import RISK_DEFINITION
+
+example_authz_details_file = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        os.path.pardir,
+        "files",
+        "example-authz-details.json",
+    )
+)
+
+
+class TestNormalizeResults(unittest.TestCase):
+    def setUp(self):
+        with open(example_authz_details_file) as f:
+            auth_json = json.load(f)
+        self.results = AuthorizationDetails(auth_json, flag_trust_policies=True).results
+        self.normalized = normalize_results(self.results)
+
+    def test_groups_are_referenced_by_id(self):
+        for user_id, user in self.results["users"].items():
+            normalized_groups = self.normalized["users"][user_id]["groups"]
+            self.assertEqual(normalized_groups, {name: group["id"] for name, group in user["groups"].items()})
+            for group_id in normalized_groups.values():
+                self.assertIn(group_id, self.normalized["groups"])
+        self.assertTrue(any(user["groups"] for user in self.normalized["users"].values()))
+
+    def test_risk_descriptions_are_in_a_lookup_table(self):
+        self.assertEqual(self.normalized["format_version"], NORMALIZED_RESULTS_FORMAT_VERSION)
+        self.assertEqual(self.normalized["risk_definitions"], RISK_DEFINITION)
+        for policy_type in ("inline_policies", "aws_managed_policies", "customer_managed_policies"):
+            for policy_id, policy in self.normalized[policy_type].items():
+                risk = policy["PrivilegeEscalation"]
+                self.assertNotIn("description", risk)
+                self.assertEqual(
+                    risk["findings"], self.results[policy_type][policy_id]["PrivilegeEscalation"]["findings"]
+                )
+        for role in self.normalized["roles"].values():
+            self.assertNotIn("description", role["AssumableByComputeServices"])
+            self.assertIn("findings", role["AssumableByComputeServices"])
+        self.assertNotIn(json.dumps(RISK_DEFINITION["ResourceExposure"]), json.dumps(self.normalized["roles"]))
+
+    def test_managed_policies_only_list_the_default_version(self):
+        for policy_type in ("aws_managed_policies", "customer_managed_policies"):
+            for policy in self.normalized[policy_type].values():
+                self.assertEqual(len(policy["PolicyVersionList"]), 1)
+                self.assertTrue(policy["PolicyVersionList"][0]["IsDefaultVersion"])
+
+    def test_results_are_not_modified(self):
+        before = json.dumps(self.results, default=str)
+        normalize_results(self.results)
+        self.assertEqual(json.dumps(self.results, default=str), before)
+        self.assertLess(len(json.dumps(self.normalized, default=str)), len(before))
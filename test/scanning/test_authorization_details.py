@@ -144,3 +144,61 @@ class TestAuthorizationFileDetails(unittest.TestCase):
                 "sts:AssumeRole",
             ],
         )
+
+    def test_authorization_details_memory_lean(self):
+        """Case: memory-lean mode drops the raw JSON and cached action lists, without changing the results"""
+        expected_results = AuthorizationDetails(auth_json=self.authz_json).results
+        authz_details = AuthorizationDetails(auth_json=self.authz_json, memory_lean=True)
+        self.assertIsNone(authz_details.auth_json)
+        self.assertIsNone(authz_details.policies.policy_details[0].policy_detail)
+        self.assertDictEqual(authz_details.results, expected_results)
+        statement = authz_details.policies.policy_details[0].policy_document.statements[0]
+        self.assertNotIn("restrictable_actions", statement.__dict__)
+        # Rebuilt on demand
+        self.assertTrue(statement.restrictable_actions)
+        self.assertDictEqual(authz_details.results, expected_results)
+
+    def test_authorization_details_results_are_cached(self):
+        """Case: the result tree is built once, until it is invalidated"""
+        authz_details = AuthorizationDetails(auth_json=self.authz_json)
+        results = authz_details.results
+        self.assertIs(authz_details.results, results)
+        statement = authz_details.policies.policy_details[0].policy_document.statements[0]
+        self.assertIn("_expansion", statement.__dict__)
+
+        authz_details.invalidate_results()
+        self.assertNotIn("_expansion", statement.__dict__)
+        rebuilt_results = authz_details.results
+        self.assertIsNot(rebuilt_results, results)
+        self.assertDictEqual(rebuilt_results, results)
+
+    def test_authorization_details_options_can_be_changed(self):
+        """Case: changing an option analyzes the account again, like a new AuthorizationDetails with that option"""
+        authz_details = AuthorizationDetails(auth_json=self.authz_json)
+        results = authz_details.results
+        expected_results = AuthorizationDetails(
+            auth_json=self.authz_json, flag_conditional_statements=True, flag_resource_arn_statements=True
+        ).results
+        self.assertNotEqual(results, expected_results)
+
+        authz_details.flag_conditional_statements = True
+        authz_details.flag_resource_arn_statements = True
+        self.assertTrue(authz_details.flag_conditional_statements)
+        self.assertDictEqual(authz_details.results, expected_results)
+
+        authz_details.severity = ["high"]
+        self.assertDictEqual(
+            authz_details.results,
+            AuthorizationDetails(
+                auth_json=self.authz_json,
+                flag_conditional_statements=True,
+                flag_resource_arn_statements=True,
+                severity=["high"],
+            ).results,
+        )
+
+    def test_authorization_details_options_cannot_be_changed_when_memory_lean(self):
+        """Case: the raw JSON that an option change is analyzed from is released in memory_lean mode"""
+        authz_details = AuthorizationDetails(auth_json=self.authz_json, memory_lean=True)
+        with self.assertRaises(Exception):
+            authz_details.flag_conditional_statements = True
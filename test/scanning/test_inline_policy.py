@@ -2,6 +2,8 @@ import os
 import unittest
 import json
 from cloudsplaining.scan.inline_policy import InlinePolicy
+from cloudsplaining.shared.exclusions import Exclusions
+from cloudsplaining.shared.utils import get_non_provider_id
 
 example_authz_details_file = os.path.abspath(
     os.path.join(
@@ -50,3 +52,20 @@ class TestInlinePolicyDetail(unittest.TestCase):
             expected_results = json.loads(contents)
 
         self.assertDictEqual(results, expected_results)
+
+    def test_inline_policy_document_is_lazy(self):
+        inline_policy_detail = {
+            "PolicyName": "ExcludedPolicy",
+            "PolicyDocument": {
+                "Version": "2012-10-17",
+                "Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}],
+            },
+        }
+        inline_policy = InlinePolicy(inline_policy_detail, exclusions=Exclusions({"policies": ["ExcludedPolicy"]}))
+        self.assertTrue(inline_policy.is_excluded)
+        self.assertNotIn("policy_document", inline_policy.__dict__)
+        # The ID is still derived from the policy document contents
+        self.assertEqual(
+            inline_policy.policy_id, get_non_provider_id(json.dumps(inline_policy_detail["PolicyDocument"]))
+        )
+        self.assertEqual(inline_policy.policy_document.json, inline_policy_detail["PolicyDocument"])
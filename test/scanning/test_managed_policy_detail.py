@@ -2,6 +2,7 @@ import os
 import unittest
 import json
 from cloudsplaining.scan.managed_policy_detail import ManagedPolicyDetails
+from cloudsplaining.shared.exceptions import NotFoundException
 
 example_authz_details_file = os.path.abspath(
     os.path.join(
@@ -52,6 +53,19 @@ class TestManagedPolicyDetail(unittest.TestCase):
         ]
         self.assertListEqual(list(results.keys()), expected_keys)
 
+    def test_get_policy_detail(self):
+        policy_details = ManagedPolicyDetails(auth_details_json.get("Policies"))
+        policy = policy_details.get_policy_detail("arn:aws:iam::012345678901:policy/InsecurePolicy")
+        self.assertEqual(policy.policy_name, "InsecurePolicy")
+        self.assertIs(policy_details.get_policy_detail_by_id("InsecurePolicy"), policy)
+        self.assertIs(policy_details.get_policy_detail_by_name("InsecurePolicy"), policy)
+        with self.assertRaises(NotFoundException):
+            policy_details.get_policy_detail("arn:aws:iam::012345678901:policy/DoesNotExist")
+        with self.assertRaises(NotFoundException):
+            policy_details.get_policy_detail_by_id("DoesNotExist")
+        with self.assertRaises(NotFoundException):
+            policy_details.get_policy_detail_by_name("DoesNotExist")
+
     # def test_infrastructure_modification_actions(self):
     #     policy_details = ManagedPolicyDetails(auth_details_json.get("Policies"))
     #     infra_mod_actions = sorted(policy_details.all_infrastructure_modification_actions)
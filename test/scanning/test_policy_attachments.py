@@ -0,0 +1,63 @@
+import os
+import json
+import unittest
+
+from cloudsplaining.scan.authorization_details import AuthorizationDetails
+from cloudsplaining.scan.policy_attachments import get_attached_principals, get_policy_attachments
+
+example_authz_details_file = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        os.path.pardir,
+        "files",
+        "example-authz-details.json",
+    )
+)
+with open(example_authz_details_file) as f:
+    auth_details_json = json.load(f)
+
+
+class TestPolicyAttachments(unittest.TestCase):
+    def test_get_policy_attachments(self):
+        iam_data = {
+            "roles": {
+                "r1": {
+                    "name": "MyRole",
+                    "inline_policies": {},
+                    "aws_managed_policies": {"A": "x"},
+                    "customer_managed_policies": {},
+                }
+            },
+            "groups": {},
+            "users": {
+                "u1": {
+                    "name": "MyUser",
+                    "inline_policies": {"I": "y"},
+                    "aws_managed_policies": {"A": "x"},
+                    "customer_managed_policies": {},
+                }
+            },
+        }
+        attachments = get_policy_attachments(iam_data)
+        self.assertDictEqual(
+            get_attached_principals(attachments, "aws_managed_policies", "A"),
+            {"roles": ["MyRole"], "groups": [], "users": ["MyUser"]},
+        )
+        self.assertDictEqual(
+            get_attached_principals(attachments, "inline_policies", "I"),
+            {"roles": [], "groups": [], "users": ["MyUser"]},
+        )
+        self.assertDictEqual(
+            get_attached_principals(attachments, "customer_managed_policies", "A"),
+            {"roles": [], "groups": [], "users": []},
+        )
+
+    def test_get_attached_matches_principal_scan(self):
+        authorization_details = AuthorizationDetails(auth_details_json)
+        policies = list(authorization_details.policies.policy_details)
+        for principal in authorization_details.user_detail_list.users:
+            policies.extend(principal.inline_policies)
+        for policy in policies:
+            indexed = policy.getAttached
+            policy.policy_attachments = None
+            self.assertEqual(indexed, policy.getAttached)
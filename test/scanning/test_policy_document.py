@@ -586,3 +586,27 @@ class TestPolicyDocument(unittest.TestCase):
         self.assertListEqual(policy_document_condition.allows_privilege_escalation, [])
         self.assertListEqual(policy_document_condition.permissions_management_without_constraints, [])
         self.assertListEqual(policy_document.service_wildcard, [])
+
+    def test_get_findings_is_memoized_and_applies_severity(self):
+        test_policy = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {"Effect": "Allow", "Action": ["iam:PassRole", "ec2:RunInstances", "s3:GetObject"], "Resource": "*"}
+            ],
+        }
+        policy_document = PolicyDocument(test_policy)
+        findings = policy_document.get_findings()
+        self.assertIs(findings, policy_document.get_findings([]))
+        self.assertListEqual(findings.privilege_escalation, policy_document.allows_privilege_escalation)
+        self.assertEqual(
+            findings.privilege_escalation_links, {"CreateEC2WithExistingIP": "https://pathfinding.cloud/paths/ec2-001"}
+        )
+        self.assertListEqual(findings.data_exfiltration, ["s3:GetObject"])
+        self.assertIn("InfrastructureModification", findings.json_large)
+        self.assertNotIn("InfrastructureModification", findings.json)
+
+        # Severity is case-insensitive and filters out the other risk types
+        high_findings = policy_document.get_findings(["HIGH"])
+        self.assertIs(high_findings, policy_document.get_findings(["high"]))
+        self.assertListEqual(high_findings.privilege_escalation, findings.privilege_escalation)
+        self.assertListEqual(high_findings.infrastructure_modification, [])
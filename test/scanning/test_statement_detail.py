@@ -290,3 +290,25 @@ class TestStatementDetail(unittest.TestCase):
         statement = StatementDetail(this_statement)
         self.assertListEqual(statement.unrestrictable_actions, ["ecr:GetAuthorizationToken"])
         self.assertTrue(statement.has_resource_constraints)
+
+    def test_not_action_wildcard_resource_complement(self):
+        this_statement = {
+            "Effect": "Allow",
+            "NotAction": ["iam:*", "s3:getobject"],
+            "Resource": "*",
+        }
+        statement = StatementDetail(this_statement)
+        results = statement.not_action_effective_actions
+        self.assertListEqual(results, sorted(results))
+        self.assertEqual(len(results), len(set(results)))
+        self.assertNotIn("s3:GetObject", results)
+        self.assertFalse(any(action.startswith("iam:") for action in results))
+        self.assertIn("s3:PutObject", results)
+
+    def test_statement_expansion_is_lazy(self):
+        this_statement = {"Effect": "Allow", "Action": ["s3:*"], "Resource": "*"}
+        statement = StatementDetail(this_statement)
+        self.assertNotIn("_expansion", statement.__dict__)
+        self.assertFalse(statement.has_resource_constraints)
+        self.assertIn("_expansion", statement.__dict__)
+        self.assertIn("s3:GetObject", statement.restrictable_actions)
@@ -0,0 +1,70 @@
+import unittest
+
+from cloudsplaining.scan.policy_document import PolicyDocument
+from cloudsplaining.scan.statement_detail import StatementDetail
+from cloudsplaining.scan.statement_expansion import (
+    STATEMENT_EXPANSION_CACHE,
+    StatementExpansion,
+    StatementExpansionCache,
+    get_statement_cache_key,
+)
+
+
+class TestStatementExpansionCache(unittest.TestCase):
+    def setUp(self):
+        STATEMENT_EXPANSION_CACHE.cache_clear()
+
+    def test_statement_cache_key(self):
+        statement = {"Effect": "Allow", "Action": ["s3:GetObject", "s3:PutObject"], "Resource": "*"}
+        equivalent = {
+            "Sid": "Reordered",
+            "Effect": "Allow",
+            "Action": ["s3:PutObject", "s3:GetObject"],
+            "Resource": ["*"],
+            "Condition": {"Bool": {"aws:SecureTransport": "true"}},
+        }
+        self.assertEqual(get_statement_cache_key(statement), get_statement_cache_key(equivalent))
+        deny = dict(statement, Effect="Deny")
+        self.assertNotEqual(get_statement_cache_key(statement), get_statement_cache_key(deny))
+        not_action = {"Effect": "Allow", "NotAction": ["s3:GetObject", "s3:PutObject"], "Resource": "*"}
+        self.assertNotEqual(get_statement_cache_key(statement), get_statement_cache_key(not_action))
+
+    def test_identical_statements_share_expansion(self):
+        statement = {"Effect": "Allow", "Action": "s3:*", "Resource": "*"}
+        policy = {"Version": "2012-10-17", "Statement": [statement, dict(statement, Sid="CopyPasted")]}
+        policy_document = PolicyDocument(policy)
+        first, second = policy_document.statements
+        self.assertIs(first._expansion, second._expansion)
+        self.assertListEqual(first.expanded_actions, second.expanded_actions)
+        info = STATEMENT_EXPANSION_CACHE.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+
+    def test_cached_results_are_not_shared_mutable_lists(self):
+        statement = {"Effect": "Allow", "Action": "ecr:*", "Resource": "*"}
+        first = StatementDetail(statement)
+        first.restrictable_actions.clear()
+        second = StatementDetail(statement)
+        self.assertTrue(second.restrictable_actions)
+
+    def test_lru_eviction(self):
+        cache = StatementExpansionCache(maxsize=2)
+        calls = []
+
+        def expand(name):
+            def _expand():
+                calls.append(name)
+                return StatementExpansion([name], None, [])
+
+            return _expand
+
+        cache.get("a", expand("a"))
+        cache.get("b", expand("b"))
+        cache.get("a", expand("a"))
+        cache.get("c", expand("c"))
+        # "b" was the least recently used
+        cache.get("b", expand("b"))
+        self.assertListEqual(calls, ["a", "b", "c", "b"])
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize, info.currsize), (1, 4, 2, 2))
@@ -0,0 +1,42 @@
+import unittest
+
+from cloudsplaining.shared.action_bitset import EMPTY_ACTION_SET, ActionIndex, get_action_index
+
+
+class TestActionIndex(unittest.TestCase):
+    def test_set_algebra(self):
+        action_index = ActionIndex(["a:One", "a:Three", "a:Two"])
+        allowed = action_index.mask(["a:Two", "a:One", "a:Three"])
+        denied = action_index.mask(["a:Three"])
+        self.assertListEqual(action_index.actions(allowed - denied), ["a:One", "a:Two"])
+        self.assertListEqual(action_index.actions(allowed | denied), ["a:One", "a:Three", "a:Two"])
+        self.assertListEqual(action_index.actions(EMPTY_ACTION_SET), [])
+        self.assertEqual(action_index.mask([]), EMPTY_ACTION_SET)
+        self.assertFalse(action_index.mask([]))
+
+    def test_unknown_actions_are_not_added(self):
+        action_index = ActionIndex(["a:One"])
+        action_set = action_index.mask(["a:one", "b:Unknown", "a:One"])
+        self.assertEqual(len(action_index), 1)
+        # Exact string semantics, like a set of strings
+        self.assertListEqual(action_index.actions(action_set), ["a:One", "a:one", "b:Unknown"])
+        self.assertListEqual(action_index.actions(action_set - action_index.mask(["a:One"])), ["a:one", "b:Unknown"])
+        self.assertListEqual(action_index.actions(action_set - action_index.mask(["b:Unknown"])), ["a:One", "a:one"])
+        self.assertListEqual(
+            action_index.actions(action_index.all_actions | action_set), ["a:One", "a:one", "b:Unknown"]
+        )
+
+    def test_lookup(self):
+        action_index = ActionIndex(["a:One", "a:Two"])
+        action_set = action_index.mask(["a:one", "a:Two"])
+        self.assertEqual(action_index.lookup(action_set, "A:ONE"), "a:one")
+        self.assertEqual(action_index.lookup(action_set, "a:two"), "a:Two")
+        self.assertIsNone(action_index.lookup(action_set, "a:Three"))
+        self.assertIsNone(action_index.lookup(action_index.mask(["a:Two"]), "a:One"))
+
+    def test_global_index_is_sorted(self):
+        action_index = get_action_index()
+        action_set = action_index.mask(["s3:PutObject", "ec2:RunInstances", "iam:PassRole", "s3:GetObject"])
+        self.assertListEqual(
+            action_index.actions(action_set), ["ec2:RunInstances", "iam:PassRole", "s3:GetObject", "s3:PutObject"]
+        )
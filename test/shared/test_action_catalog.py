@@ -0,0 +1,62 @@
+import unittest
+
+from policy_sentry.querying.actions import remove_actions_not_matching_access_level as policy_sentry_remove_actions
+from policy_sentry.querying.all import get_all_actions
+
+from cloudsplaining.shared.action_catalog import (
+    classify_actions_by_access_level,
+    get_action_catalog,
+    get_action_metadata,
+    remove_actions_not_matching_access_level,
+)
+
+
+class TestActionCatalog(unittest.TestCase):
+    def test_catalog_covers_all_actions(self):
+        catalog = get_action_catalog()
+        self.assertEqual(len(catalog), len(get_all_actions()))
+        # Built once and re-used
+        self.assertIs(catalog, get_action_catalog())
+
+    def test_get_action_metadata(self):
+        metadata = get_action_metadata("S3:getobject")
+        self.assertEqual(metadata.action, "s3:GetObject")
+        self.assertEqual(metadata.action_name, "GetObject")
+        self.assertEqual(metadata.access_level, "Read")
+        self.assertTrue(metadata.restrictable)
+        # Wildcard-only action
+        self.assertFalse(get_action_metadata("secretsmanager:ListSecrets").restrictable)
+        self.assertIsNone(get_action_metadata("fakeservice:FakeAction"))
+
+    def test_remove_actions_not_matching_access_level(self):
+        actions = ["ssm:GetParameters", "ecr:putimage", "iam:PassRole", "malformed", "a:b:c"]
+        self.assertListEqual(remove_actions_not_matching_access_level(actions, "Write"), ["ecr:PutImage"])
+        self.assertListEqual(
+            remove_actions_not_matching_access_level(actions, "Permissions management"), ["iam:PassRole"]
+        )
+
+    def test_remove_actions_not_matching_access_level_matches_policy_sentry(self):
+        actions = sorted(get_all_actions())
+        for access_level in ("Read", "List", "Write", "Tagging", "Permissions management"):
+            self.assertListEqual(
+                remove_actions_not_matching_access_level(actions, access_level),
+                policy_sentry_remove_actions(actions, access_level),
+            )
+            self.assertCountEqual(
+                remove_actions_not_matching_access_level(["*"], access_level),
+                policy_sentry_remove_actions(["*"], access_level),
+            )
+
+    def test_classify_actions_by_access_level(self):
+        actions = ["ssm:GetParameters", "ecr:putimage", "iam:PassRole", "ecr:TagResource", "malformed"]
+        self.assertDictEqual(
+            classify_actions_by_access_level(actions),
+            {
+                "Read": ["ssm:GetParameters"],
+                "Write": ["ecr:PutImage"],
+                "Permissions management": ["iam:PassRole"],
+                "Tagging": ["ecr:TagResource"],
+            },
+        )
+        all_actions = classify_actions_by_access_level(["*"])
+        self.assertEqual(sum(len(level) for level in all_actions.values()), len(get_all_actions()))
@@ -1,8 +1,14 @@
+import threading
+
 import boto3
 from moto import mock_aws
 
 from cloudsplaining.shared.aws_login import (
+    SESSION_POOL,
+    SessionPool,
+    get_boto3_session,
     get_current_account_id,
+    get_target_account_session,
     get_available_regions,
     get_target_account_credentials,
     get_boto3_client,
@@ -77,3 +83,100 @@ def test_get_target_account_credentialscredentials():
     assert creds[0]  # make sure it is not empty
     assert creds[1]  # make sure it is not empty
     assert creds[2]  # make sure it is not empty
+
+
+@mock_aws
+def test_sessions_and_clients_are_shared():
+    # given
+    region = "eu-west-1"
+
+    # when
+    client = get_boto3_client(service="iam", region=region)
+
+    # then
+    assert get_boto3_client(service="iam", region=region) is client
+    assert get_boto3_client(service="iam", region=region, max_pool_connections=5) is not client
+    assert get_boto3_session(region_name=region) is get_boto3_session(region_name=region)
+
+
+@mock_aws
+def test_get_target_account_session():
+    # given
+    # Sessions are shared across tests, but their credentials are only valid in the moto backend that issued them
+    SESSION_POOL.clear()
+
+    # when
+    session = get_target_account_session(target_account_role_name="example-role", target_account_id="111111111111")
+
+    # then
+    assert get_target_account_session(target_account_role_name="example-role", target_account_id="111111111111") is (
+        session
+    )
+    credentials = session.get_credentials()
+    # Assumed-role credentials are refreshed by assuming the role again before they expire
+    assert credentials.method == "sts-assume-role"
+    assert credentials.refresh_needed() is False
+    caller_arn = session.client("sts").get_caller_identity()["Arn"]
+    assert caller_arn == "arn:aws:sts::111111111111:assumed-role/example-role/Cloudsplaining"
+
+
+def test_session_pool_evicts_the_least_recently_used_session():
+    # given
+    pool = SessionPool(maxsize=2)
+    sessions = [
+        pool.get_session(key, lambda botocore_session: boto3.Session(botocore_session=botocore_session)) for key in "ab"
+    ]
+
+    # when
+    pool.get_session("a", lambda botocore_session: boto3.Session(botocore_session=botocore_session))
+    pool.get_session("c", lambda botocore_session: boto3.Session(botocore_session=botocore_session))
+
+    # then
+    assert (
+        pool.get_session("a", lambda botocore_session: boto3.Session(botocore_session=botocore_session))
+        is (sessions[0])
+    )
+    assert (
+        pool.get_session("b", lambda botocore_session: boto3.Session(botocore_session=botocore_session))
+        is not (sessions[1])
+    )
+
+
+def test_session_pool_creates_sessions_outside_the_lock():
+    # given
+    pool = SessionPool()
+    other_sessions = []
+
+    def create(botocore_session):
+        # Another thread can get a session while this one is created, like while a role is assumed
+        thread = threading.Thread(
+            target=lambda: other_sessions.append(
+                pool.get_session("b", lambda other: boto3.Session(botocore_session=other))
+            )
+        )
+        thread.start()
+        thread.join(timeout=5)
+        return boto3.Session(botocore_session=botocore_session)
+
+    # when
+    session = pool.get_session("a", create)
+
+    # then
+    assert len(other_sessions) == 1
+    assert pool.get_session("a", create) is session
+
+
+@mock_aws
+def test_session_pool_only_shares_clients_of_its_own_sessions():
+    # given
+    pool = SessionPool()
+    session = boto3.Session(region_name="us-east-1")
+    pooled_session = pool.get_session("a", lambda botocore_session: boto3.Session(botocore_session=botocore_session))
+
+    # when
+    client = pool.get_client(session, "iam", "us-east-1")
+    pooled_client = pool.get_client(pooled_session, "iam", "us-east-1")
+
+    # then
+    assert pool.get_client(session, "iam", "us-east-1") is not client
+    assert pool.get_client(pooled_session, "iam", "us-east-1") is pooled_client
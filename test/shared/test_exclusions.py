@@ -1,7 +1,7 @@
 import unittest
 import os
 import json
-from cloudsplaining.shared.exclusions import is_name_excluded, Exclusions
+from cloudsplaining.shared.exclusions import is_name_excluded, Exclusions, ExclusionMatcher
 from cloudsplaining.scan.authorization_details import AuthorizationDetails
 
 
@@ -42,6 +42,35 @@ class ExclusionsTestCase(unittest.TestCase):
         result = is_name_excluded(policy_name, exclusions_list)
         self.assertTrue(result)
 
+    def test_exclusions_no_match(self):
+        exclusions_list = ["", "Beyonce", "Secure*", "*ish"]
+        self.assertFalse(is_name_excluded("Jay-Z", exclusions_list))
+        self.assertFalse(is_name_excluded("Insecure", exclusions_list))
+
+
+class ExclusionMatcherTestCase(unittest.TestCase):
+    def test_first_matching_exclusion_is_reported(self):
+        """When several exclusions match, the one listed first is reported, like the original loop"""
+        matcher = ExclusionMatcher(["*role", "admin*", "AdminRole"])
+        with self.assertLogs("cloudsplaining.shared.exclusions", level="DEBUG") as captured:
+            self.assertTrue(matcher.is_excluded("AdminRole"))
+            self.assertTrue(matcher.is_excluded("administrator"))
+        self.assertIn("Excluded suffix: *role", captured.output[0])
+        self.assertIn("Excluded prefix: admin*", captured.output[1])
+
+        matcher = ExclusionMatcher(["AdminRole", "admin*"])
+        with self.assertLogs("cloudsplaining.shared.exclusions", level="DEBUG") as captured:
+            self.assertTrue(matcher.is_excluded("adminrole"))
+            # Decisions are cached, but still reported every time
+            self.assertTrue(matcher.is_excluded("adminrole"))
+        self.assertEqual(len(captured.output), 2)
+        self.assertTrue(all("Excluded: AdminRole" in message for message in captured.output))
+
+    def test_wildcard_matches_everything(self):
+        matcher = ExclusionMatcher(["*"])
+        self.assertTrue(matcher.is_excluded("anything"))
+        self.assertFalse(ExclusionMatcher([]).is_excluded("anything"))
+
 
 class AuthorizationsFileComponentsExclusionsTestCase(unittest.TestCase):
     def test_exclusions_for_service_roles(self):
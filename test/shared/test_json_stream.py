@@ -0,0 +1,121 @@
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cloudsplaining.shared.json_stream import (
+    iter_encode_json,
+    iter_json_object,
+    load_authorization_details_file,
+    open_json_file,
+    write_json_object,
+)
+
+example_authz_details_file = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        os.path.pardir,
+        "files",
+        "example-authz-details.json",
+    )
+)
+
+
+class JsonStreamTestCase(unittest.TestCase):
+    def test_load_authorization_details_file_matches_json_load(self):
+        with open(example_authz_details_file) as f:
+            expected = json.load(f)
+        # A tiny chunk size makes every value cross a chunk boundary
+        for chunk_size in (1, 13, 1024 * 1024):
+            self.assertEqual(load_authorization_details_file(example_authz_details_file, chunk_size), expected)
+
+    def test_iter_json_object_yields_array_items(self):
+        contents = '{"Policies": [{"a": 1}, {"b": [2, 3]}], "Marker": 12345, "IsTruncated": false, "Empty": []}'
+        members = []
+        for key, value in iter_json_object(io.StringIO(contents), ["Policies", "Empty"], chunk_size=4):
+            if key in ("Policies", "Empty"):
+                self.assertNotIsInstance(value, list)
+                value = list(value)
+            members.append((key, value))
+        self.assertListEqual(
+            members,
+            [("Policies", [{"a": 1}, {"b": [2, 3]}]), ("Marker", 12345), ("IsTruncated", False), ("Empty", [])],
+        )
+
+    def test_numbers_split_across_chunks(self):
+        contents = (
+            '{"abc": -1.5e10, "Policies": [-1.5, 2e-05, -3.25E+100, 0, -0.0, 12345678901234567890, {"n": -6.02e23}], '
+            '"exponents": [1e5, -1E+5, 1.5e-7], "literals": [true, false, null], "last": -7.125}'
+        )
+        expected = json.loads(contents)
+        for chunk_size in range(1, len(contents) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                members = {
+                    key: list(value) if key == "Policies" else value
+                    for key, value in iter_json_object(io.StringIO(contents), ["Policies"], chunk_size=chunk_size)
+                }
+                self.assertDictEqual(members, expected)
+
+    def test_unconsumed_arrays_are_skipped(self):
+        contents = '{"Policies": [1, 2, 3], "UserDetailList": [4]}'
+        keys = [key for key, _ in iter_json_object(io.StringIO(contents), ["Policies", "UserDetailList"])]
+        self.assertListEqual(keys, ["Policies", "UserDetailList"])
+
+    def test_invalid_json(self):
+        for contents in ('{"a": 1,}', '{"a": 1} extra', "[1]", '{"Policies": [1,]}', '{"Policies": [1'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_object(io.StringIO(contents), ["Policies"]))
+
+    def test_write_json_object_matches_json_dump(self):
+        with open(example_authz_details_file) as f:
+            authz_details = json.load(f)
+        keys = ["UserDetailList", "GroupDetailList", "RoleDetailList", "Policies"]
+        expected = {key: authz_details[key] for key in keys}
+        # Items of the same key can arrive in several pages, some of them empty
+        members = [
+            (key, items[start : start + 2]) for key, items in expected.items() for start in range(0, len(items) + 2, 2)
+        ]
+        for indent in (None, 4):
+            fp = io.StringIO()
+            write_json_object(fp, keys, members, indent=indent)
+            self.assertEqual(fp.getvalue(), json.dumps(expected, indent=indent, default=str))
+
+        fp = io.StringIO()
+        write_json_object(fp, keys, [("Policies", [1])], indent=4)
+        self.assertEqual(fp.getvalue(), json.dumps({**dict.fromkeys(keys[:3], []), "Policies": [1]}, indent=4))
+        with self.assertRaises(ValueError):
+            write_json_object(io.StringIO(), keys, [("Policies", [1]), ("UserDetailList", [2])])
+
+    def test_iter_encode_json_matches_json_dumps(self):
+        with open(example_authz_details_file) as f:
+            authz_details = json.load(f)
+        values = [
+            authz_details,
+            {},
+            {"nested": {"empty": {}, "date": datetime.date(2020, 1, 1)}},
+            # Non-string keys are left to json.dumps
+            {1: {"a": 1}},
+            [1, {"a": 2}],
+            "string",
+        ]
+        for value in values:
+            for depth in (0, 1, 2, 5):
+                self.assertEqual("".join(iter_encode_json(value, depth)), json.dumps(value, default=str))
+                for indent in (0, 4):
+                    self.assertEqual(
+                        "".join(iter_encode_json(value, depth, indent=indent, sort_keys=True)),
+                        json.dumps(value, default=str, indent=indent, sort_keys=True),
+                    )
+
+    def test_load_gzip_authorization_details_file(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        compressed_file = Path(temp_dir) / "example.json.gz"
+        with open(example_authz_details_file) as source, open_json_file(compressed_file, "w") as destination:
+            destination.write(source.read())
+        with open(example_authz_details_file) as f:
+            self.assertEqual(load_authorization_details_file(compressed_file), json.load(f))
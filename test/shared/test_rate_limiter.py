@@ -0,0 +1,70 @@
+import unittest
+
+from moto import mock_aws
+
+from cloudsplaining.shared.aws_login import get_boto3_client
+from cloudsplaining.shared.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class AdaptiveRateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(
+            rate=2.0, min_rate=0.5, max_rate=4.0, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_acquire_waits_for_tokens(self):
+        for _ in range(3):
+            self.limiter.acquire()
+        # The first token is there from the start, then one every half a second
+        self.assertListEqual(self.clock.sleeps, [0.5, 0.5])
+        self.assertEqual(self.limiter.metrics().requests, 3)
+        self.assertEqual(self.limiter.metrics().requests_per_second, 3.0)
+
+    def test_aimd(self):
+        self.limiter.record_throttle()
+        self.assertEqual(self.limiter.rate, 1.0)
+        # Throttles that follow right away are answers to calls sent at the old rate
+        self.limiter.record_throttle()
+        self.assertEqual(self.limiter.rate, 1.0)
+        self.clock.now += 1
+        self.limiter.record_throttle()
+        self.limiter.record_throttle()
+        self.assertEqual(self.limiter.rate, 0.5)
+        self.assertEqual(self.limiter.metrics().throttles, 4)
+
+        self.limiter.record_success()
+        self.assertEqual(self.limiter.rate, 2.5)
+        for _ in range(10):
+            self.limiter.record_success()
+        self.assertEqual(self.limiter.rate, 4.0)
+
+    def test_botocore_hooks(self):
+        throttled = ({}, {"Error": {"Code": "Throttling"}})
+        self.limiter._needs_retry(response=throttled, attempts=1)
+        self.limiter._needs_retry(response=({}, {}), attempts=2)
+        metrics = self.limiter.metrics()
+        self.assertEqual((metrics.throttles, metrics.retries), (1, 1))
+        self.assertEqual(metrics.rate, 2.0)
+
+    @mock_aws
+    def test_clients_share_a_rate_limiter(self):
+        iam_limiter = get_rate_limiter("iam")
+        requests = iam_limiter.metrics().requests
+        for _ in range(2):
+            get_boto3_client("iam").list_users()
+        get_boto3_client("s3").list_buckets()
+        self.assertEqual(iam_limiter.metrics().requests, requests + 2)
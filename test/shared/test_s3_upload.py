@@ -0,0 +1,81 @@
+import gzip
+import os
+import unittest
+
+import boto3
+from moto import mock_aws
+
+from cloudsplaining.shared.s3_upload import ReportUploader
+
+
+@mock_aws
+class ReportUploaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s3_client = boto3.client("s3", region_name="us-east-1")
+        self.s3_client.create_bucket(Bucket="reports")
+
+    def test_upload(self):
+        uploader = ReportUploader(self.s3_client, "reports")
+        uploader.upload("account.json", b'{"roles": {}}', "application/json").result()
+        uploader.close()
+
+        response = self.s3_client.get_object(Bucket="reports", Key="account.json")
+        self.assertNotIn("ContentEncoding", response)
+        self.assertEqual(response["Body"].read(), b'{"roles": {}}')
+
+    def test_upload_gzip_encoded(self):
+        uploader = ReportUploader(self.s3_client, "reports", compress=True)
+        html = uploader.upload("account.html", "<html>report</html>", "text/html; charset=utf-8")
+        data = uploader.upload("account.json", b'{"roles": {}}', "application/json")
+        uploader.close()
+
+        self.assertEqual(html.result(), "s3://reports/account.html")
+        self.assertEqual(data.result(), "s3://reports/account.json")
+        response = self.s3_client.get_object(Bucket="reports", Key="account.html")
+        self.assertEqual(response["ContentEncoding"], "gzip")
+        self.assertEqual(response["ContentType"], "text/html; charset=utf-8")
+        self.assertEqual(gzip.decompress(response["Body"].read()), b"<html>report</html>")
+
+    def test_multipart_upload(self):
+        body = os.urandom(6 * 1024 * 1024)
+        uploader = ReportUploader(
+            self.s3_client,
+            "reports",
+            multipart_threshold=5 * 1024 * 1024,
+            multipart_chunk_size=5 * 1024 * 1024,
+        )
+        uploader.upload("large.json", body, "application/json").result()
+        uploader.close()
+
+        response = self.s3_client.get_object(Bucket="reports", Key="large.json")
+        self.assertNotIn("ContentEncoding", response)
+        # Multipart uploads have an ETag with the number of parts
+        self.assertTrue(response["ETag"].strip('"').endswith("-2"))
+        self.assertEqual(response["Body"].read(), body)
+
+    def test_upload_stream(self):
+        # Hex compresses to about half its size, which still needs two parts
+        chunks = [os.urandom(512 * 1024).hex() for _ in range(12)]
+        uploader = ReportUploader(
+            self.s3_client,
+            "reports",
+            compress=True,
+            multipart_threshold=5 * 1024 * 1024,
+            multipart_chunk_size=5 * 1024 * 1024,
+        )
+        large = uploader.upload_stream("large.html", iter(chunks), "text/html; charset=utf-8")
+        small = uploader.upload_stream("small.html", iter(["<html>", "report", "</html>"]), "text/html")
+        empty = uploader.upload_stream("empty.html", iter([]), "text/html")
+        uploader.close()
+
+        self.assertEqual(large.result(), "s3://reports/large.html")
+        response = self.s3_client.get_object(Bucket="reports", Key="large.html")
+        self.assertEqual(response["ContentEncoding"], "gzip")
+        self.assertTrue(response["ETag"].strip('"').endswith("-2"))
+        self.assertEqual(gzip.decompress(response["Body"].read()), "".join(chunks).encode())
+        small.result()
+        response = self.s3_client.get_object(Bucket="reports", Key="small.html")
+        self.assertEqual(gzip.decompress(response["Body"].read()), b"<html>report</html>")
+        empty.result()
+        response = self.s3_client.get_object(Bucket="reports", Key="empty.html")
+        self.assertEqual(gzip.decompress(response["Body"].read()), b"")
@@ -1,6 +1,11 @@
+import os
+import tempfile
 import unittest
+from pathlib import Path
+
 from cloudsplaining.shared.utils import (
     get_account_id_from_principal,
+    read_text_cached,
     remove_read_level_actions,
     remove_wildcard_only_actions,
 )
@@ -32,3 +37,17 @@ class TestUtils(unittest.TestCase):
         )
         self.assertEqual(get_account_id_from_principal(" 210987654321"), "210987654321")
         self.assertIsNone(get_account_id_from_principal("invalid"))
+
+    def test_read_text_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "content.txt"
+            path.write_text("first", encoding="utf-8")
+            first = read_text_cached(path)
+            self.assertEqual(first, "first")
+            # The same string is returned while the file is unchanged
+            self.assertIs(read_text_cached(path), first)
+
+            path.write_text("second", encoding="utf-8")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(read_text_cached(path), "second")
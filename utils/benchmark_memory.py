@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Compare the memory retained by a scan with and without AuthorizationDetails' memory-lean mode.
+
+Each mode is measured in isolation with tracemalloc: the account authorization details file is parsed, the
+results are generated, and then the memory still held by the AuthorizationDetails object (plus the results)
+is reported, in total and per scan object (role, user, group, or managed policy).
+
+Run: ``uv run ./utils/benchmark_memory.py --input-file examples/files/example.json``
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from cloudsplaining.scan.authorization_details import AuthorizationDetails
+from cloudsplaining.scan.statement_expansion import STATEMENT_EXPANSION_CACHE
+
+
+def measure(auth_json_path: Path, memory_lean: bool) -> tuple[int, dict[str, int]]:
+    """Return the bytes retained after generating the results, and the number of scan objects"""
+    STATEMENT_EXPANSION_CACHE.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    auth_json: Any = json.loads(auth_json_path.read_text(encoding="utf-8"))
+    authorization_details = AuthorizationDetails(auth_json, memory_lean=memory_lean)
+    del auth_json
+    results = authorization_details.results
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    counts = {
+        "roles": len(authorization_details.role_detail_list.roles),
+        "users": len(authorization_details.user_detail_list.users),
+        "groups": len(authorization_details.group_detail_list.groups),
+        "managed policies": len(authorization_details.policies.policy_details),
+    }
+    del results
+    return retained, counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input-file", type=Path, required=True, help="Account authorization details file")
+    args = parser.parse_args()
+
+    default_bytes, counts = measure(args.input_file, memory_lean=False)
+    lean_bytes, _ = measure(args.input_file, memory_lean=True)
+    saved = default_bytes - lean_bytes
+
+    print(f"Retained by default:  {default_bytes / 1024:,.1f} KiB")
+    print(f"Retained memory-lean: {lean_bytes / 1024:,.1f} KiB")
+    print(f"Saved:                {saved / 1024:,.1f} KiB ({saved / default_bytes:.0%})")
+    objects = sum(counts.values())
+    print(f"Scan objects:         {objects:,} ({', '.join(f'{count:,} {label}' for label, count in counts.items())})")
+    if objects:
+        print(f"Saved per object:     {saved / objects:,.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()